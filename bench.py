@@ -0,0 +1,199 @@
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import platform
+import tempfile
+import subprocess
+
+import sysv_ipc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+COMMANDE_QUIT = 3   # même type que dans env.py / display.py
+BASE_PORT = 6001    # ports propres au benchmark (une paire par exécution) pour ne pas gêner une simulation en cours
+BASE_MQ_KEY = 4321
+READY_TIMEOUT = 10.0  # attente max du démarrage d'env (secondes)
+STOP_TIMEOUT = 30.0   # attente max de l'arrêt d'env après QUIT
+
+
+# Mémoire résidente d'un process (ko), 0 s'il est déjà terminé
+def rss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (FileNotFoundError, ProcessLookupError):
+        pass
+    return 0
+
+
+# Attend qu'env accepte les connexions sur ses deux ports
+def wait_ready(ports, proc) -> bool:
+    deadline = time.monotonic() + READY_TIMEOUT
+    pending = list(ports)
+    while pending and time.monotonic() < deadline:
+        if proc.poll() is not None:
+            return False
+        try:
+            socket.create_connection(("127.0.0.1", pending[0]), timeout=0.5).close()
+            pending.pop(0)
+        except OSError:
+            time.sleep(0.1)
+    return not pending
+
+
+# Lancement des clients synthétiques : herds (plusieurs individus par process) ou un process par individu
+def start_clients(n_preys: int, n_predators: int, mode: str, per_herd: int, env_vars: dict, log) -> list:
+    procs = []
+    if mode == "herd":
+        roles = ["PREY"] * n_preys + ["PREDATOR"] * n_predators
+        for i in range(0, len(roles), per_herd):
+            chunk = roles[i:i + per_herd]
+            cmd = [sys.executable, "herd.py", "--preys", str(chunk.count("PREY")),
+                   "--predators", str(chunk.count("PREDATOR"))]
+            procs.append(subprocess.Popen(cmd, cwd=HERE, env=env_vars, stdout=log, stderr=log))
+    else:
+        for script, n in (("prey.py", n_preys), ("predator.py", n_predators)):
+            for _ in range(n):
+                procs.append(subprocess.Popen([sys.executable, script], cwd=HERE, env=env_vars,
+                                              stdout=log, stderr=log))
+    return procs
+
+
+# Une exécution : env + N clients pendant duration secondes, renvoie les mesures
+def run_one(n: int, index: int, args, workdir: str) -> dict:
+    port_socket = BASE_PORT + 2 * index
+    port_manager = port_socket + 1
+    mq_key = BASE_MQ_KEY + index
+    env_vars = dict(os.environ, PPC_PORT_SOCKET=str(port_socket), PPC_PORT_MANAGER=str(port_manager),
+                    PPC_MQ_KEY=str(mq_key))
+    stats_path = os.path.join(workdir, f"env_stats_{n}.json")
+    env_log = open(os.path.join(workdir, f"env_{n}.log"), "w")
+    clients_log = open(os.path.join(workdir, f"clients_{n}.log"), "w")
+
+    cmd = [sys.executable, "env.py", "--stats", stats_path]
+    if args.shm:
+        cmd.append("--shm")
+    env_proc = subprocess.Popen(cmd, cwd=HERE, env=env_vars, stdout=env_log, stderr=env_log)
+    clients = []
+    try:
+        if not wait_ready((port_socket, port_manager), env_proc):
+            raise RuntimeError(f"env n'a pas démarré (voir {env_log.name})")
+
+        n_predators = max(1, n // 10)
+        n_preys = n - n_predators
+        started = time.monotonic()
+        clients = start_clients(n_preys, n_predators, args.clients, args.per_herd, env_vars, clients_log)
+        launch_s = time.monotonic() - started
+        print(f"[bench] N={n} | {len(clients)} process clients lancés en {launch_s:.2f}s", flush=True)
+
+        time.sleep(args.duration)
+        client_rss = [rss_kb(p.pid) for p in clients if p.poll() is None]
+        env_rss = rss_kb(env_proc.pid)
+
+        sysv_ipc.MessageQueue(mq_key).send(b"", type=COMMANDE_QUIT)
+        env_proc.wait(timeout=STOP_TIMEOUT)
+    finally:
+        if env_proc.poll() is None:
+            env_proc.kill()
+            env_proc.wait()
+        for p in clients:
+            try:
+                p.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                p.kill()
+                p.wait()
+        env_log.close()
+        clients_log.close()
+
+    with open(stats_path) as f:
+        stats = json.load(f)
+    total_rss = sum(client_rss)
+    return {
+        "agents": n,
+        "preys": n_preys,
+        "predators": n_predators,
+        "clients": args.clients,
+        "client_processes": len(clients),
+        "client_launch_s": launch_s,
+        "client_rss_kb": {
+            "total": total_rss,
+            "per_agent": total_rss / n if n else 0.0,
+            "per_process": total_rss / len(client_rss) if client_rss else 0.0,
+        },
+        "env_rss_kb": env_rss,
+        "env": stats,
+    }
+
+
+def print_row(r: dict):
+    env = r["env"]
+    lock = max(env["locks"].values(), key=lambda st: st["wait_total_s"])
+    print(
+        f"[bench] N={r['agents']:>5} | "
+        f"jitter moy={env['tick_jitter_s']['mean'] * 1000:.1f} ms max={env['tick_jitter_s']['max'] * 1000:.1f} ms | "
+        f"verrou le plus attendu {lock['name']} moy={lock['wait_mean_s'] * 1e6:.1f} µs "
+        f"max={lock['wait_max_s'] * 1000:.2f} ms | "
+        f"RPC/s={env['rpc']['round_trips_per_s']:.0f} (ops/s={env['rpc']['ops_per_s']:.0f}) | "
+        f"joins/s={env['joins']['per_s']:.0f} | "
+        f"RSS/agent={r['client_rss_kb']['per_agent']:.0f} ko | "
+        f"CPU env/tick={env['cpu_per_tick_s']['mean'] * 1000:.1f} ms",
+        flush=True
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark d'env avec N clients synthétiques")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000],
+                        help="nombres d'individus à tester")
+    parser.add_argument("--duration", type=float, default=20.0, help="durée de chaque exécution (secondes)")
+    parser.add_argument("--clients", choices=("herd", "process"), default="herd",
+                        help="herd : plusieurs individus par process (herd.py), process : un process par individu")
+    parser.add_argument("--per-herd", type=int, default=100, help="individus par process herd")
+    parser.add_argument("--shm", action="store_true", help="lance env avec --shm")
+    parser.add_argument("--out", default="bench_results.json", help="fichier de résultats (JSON)")
+    parser.add_argument("--keep-logs", action="store_true", help="conserve les sorties d'env et des clients")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="ppc_bench_")
+    runs = []
+    try:
+        for index, n in enumerate(args.sizes):
+            print(f"[bench] Exécution N={n} ({args.clients}, {args.duration:.0f}s)...", flush=True)
+            try:
+                result = run_one(n, index, args, workdir)
+            except Exception as e:
+                print(f"[bench] N={n} échec : {e}", file=sys.stderr, flush=True)
+                continue
+            runs.append(result)
+            print_row(result)
+    except KeyboardInterrupt:
+        print("[bench] Interrompu par l'utilisateur (ctrl+c)", flush=True)
+
+    results = {
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "duration_s": args.duration,
+        "runs": runs,
+    }
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"[bench] Résultats écrits dans {args.out}", flush=True)
+
+    if args.keep_logs:
+        print(f"[bench] Journaux conservés dans {workdir}", flush=True)
+    else:
+        for name in os.listdir(workdir):
+            os.remove(os.path.join(workdir, name))
+        os.rmdir(workdir)
+
+
+if __name__ == "__main__":
+    main()
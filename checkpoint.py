@@ -0,0 +1,89 @@
+import os
+import time
+import array
+import struct
+
+from shm_world import FIELDS, LAYOUT
+
+# Checkpoint d'env : en-tête, champs du monde (même disposition que shm_world), ensembles de PIDs, puis
+# (version 2) fins de fenêtre de cooldown des parents et dernières positions des inscrits
+MAGIC = b"PPCK"
+VERSION = 2
+VERSIONS = (1, 2)  # versions lues (v1 : ni fenêtres de cooldown ni positions)
+HEADER = struct.Struct("<4sHxxqddq")  # magic, version, tick, date, délai avant la prochaine sécheresse, prochain id virtuel
+COUNT = struct.Struct("<I")
+
+# Ensembles sauvegardés, dans l'ordre du fichier
+SETS = ("alive_preys", "alive_predators", "huntable", "reproducible_preys", "reproducible_predators")
+
+
+# Écriture atomique (fichier temporaire puis rename) : un crash pendant l'écriture garde l'ancien checkpoint
+# state : {"tick", "drought_in", "next_virtual_id", "world": dict, <SETS>: liste de PIDs,
+#          "reproduced": {pid: tick de fin de fenêtre}, "positions": {pid: (x, y)}}
+def save_checkpoint(path: str, state: dict) -> int:
+    parts = [
+        HEADER.pack(MAGIC, VERSION, state["tick"], time.time(), state["drought_in"], state["next_virtual_id"]),
+        LAYOUT.pack(*(state["world"][key] for key in FIELDS)),
+    ]
+    for name in SETS:
+        pids = array.array("q", state[name])
+        parts.append(COUNT.pack(len(pids)))
+        parts.append(pids.tobytes())
+    reproduced = state.get("reproduced", {})
+    parts += [COUNT.pack(len(reproduced)), array.array("q", reproduced).tobytes(),
+              array.array("q", reproduced.values()).tobytes()]
+    positions = state.get("positions", {})
+    parts += [COUNT.pack(len(positions)), array.array("q", positions).tobytes(),
+              array.array("d", (x for x, _ in positions.values())).tobytes(),
+              array.array("d", (y for _, y in positions.values())).tobytes()]
+    data = b"".join(parts)
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return len(data)
+
+
+def load_checkpoint(path: str) -> dict:
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < HEADER.size + LAYOUT.size:
+        raise ValueError(f"{path} : checkpoint incomplet")
+    magic, version, tick, saved_at, drought_in, next_virtual_id = HEADER.unpack_from(data)
+    if magic != MAGIC or version not in VERSIONS:
+        raise ValueError(f"{path} : format de checkpoint non supporté ({magic!r}, v{version})")
+
+    state = {
+        "tick": tick,
+        "saved_at": saved_at,
+        "drought_in": drought_in,
+        "next_virtual_id": next_virtual_id,
+        "world": dict(zip(FIELDS, LAYOUT.unpack_from(data, HEADER.size))),
+    }
+    offset = HEADER.size + LAYOUT.size
+
+    # n puis k tableaux de n valeurs 8 octets (typecodes) -> k listes
+    def read_columns(*typecodes) -> list:
+        nonlocal offset
+        (n,) = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        columns = []
+        for typecode in typecodes:
+            column = array.array(typecode)
+            column.frombytes(data[offset:offset + 8 * n])
+            offset += 8 * n
+            columns.append(column.tolist())
+        return columns
+
+    for name in SETS:
+        (state[name],) = read_columns("q")
+    state["reproduced"], state["positions"] = {}, {}
+    if version >= 2:
+        pids, ends = read_columns("q", "q")
+        state["reproduced"] = dict(zip(pids, ends))
+        pids, xs, ys = read_columns("q", "d", "d")
+        state["positions"] = dict(zip(pids, zip(xs, ys)))
+    return state
@@ -0,0 +1,74 @@
+import os
+import sys
+import argparse
+
+import sysv_ipc
+
+MQ_KEY = int(os.environ.get("PPC_MQ_KEY", 1234))  # même clé qu'env
+
+# Types de commandes vers env (même type que dans env.py / display.py)
+COMMANDE_PAUSE = 1
+COMMANDE_START = 2
+COMMANDE_QUIT = 3
+COMMANDE_GROWTH = 4
+COMMANDE_GRASS = 5
+COMMANDE_SPAWN = 6
+COMMANDE_CULL = 7
+COMMANDE_PROFILE = 8
+
+ROLES = {"prey": "PREY", "proie": "PREY", "predator": "PREDATOR", "predateur": "PREDATOR"}
+
+
+# Pilotage d'env en ligne de commande (scripts, tests de charge) : mêmes commandes que la fenêtre de display.py
+#   python3 ctl.py spawn prey 1000
+#   python3 ctl.py cull predator 10
+#   python3 ctl.py pause | start | quit | growth 2.5 | grass 500
+#   python3 ctl.py profile start 10 --agents
+def main():
+    parser = argparse.ArgumentParser(description="Envoie une commande à env par la Message Queue")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("pause", "start", "quit"):
+        sub.add_parser(name)
+    sub.add_parser("growth").add_argument("value", type=float)
+    sub.add_parser("grass").add_argument("value", type=int)  # env attend un entier
+    for name in ("spawn", "cull"):
+        p = sub.add_parser(name)
+        p.add_argument("role", type=str.lower, choices=sorted(ROLES))
+        p.add_argument("n", type=int)
+    p = sub.add_parser("profile")
+    p.add_argument("action", type=str.lower, choices=("start", "stop"))
+    p.add_argument("seconds", type=float, nargs="?", default=0.0, help="durée (défaut : jusqu'à profile stop)")
+    p.add_argument("--agents", action="store_true", help="profile aussi les agents connectés")
+    args = parser.parse_args()
+
+    if args.command in ("spawn", "cull"):
+        if args.n < 0:
+            parser.error("n doit être positif")
+        cmd = COMMANDE_SPAWN if args.command == "spawn" else COMMANDE_CULL
+        message = f"{ROLES[args.role]} {args.n}"
+    elif args.command == "profile":
+        cmd = COMMANDE_PROFILE
+        words = [args.action.upper()]
+        if args.action == "start" and args.seconds:
+            words.append(f"{args.seconds:g}")
+        if args.agents:
+            words.append("AGENTS")
+        message = " ".join(words)
+    elif args.command in ("growth", "grass"):
+        cmd = COMMANDE_GROWTH if args.command == "growth" else COMMANDE_GRASS
+        message = repr(args.value)  # relu tel quel par float()/int() côté env
+    else:
+        cmd = {"pause": COMMANDE_PAUSE, "start": COMMANDE_START, "quit": COMMANDE_QUIT}[args.command]
+        message = ""
+
+    try:
+        mq = sysv_ipc.MessageQueue(MQ_KEY)
+    except sysv_ipc.ExistentialError:
+        print("Erreur : Impossible de se connecter à la Message Queue. Assurez-vous que env.py est en cours d'exécution.",
+              file=sys.stderr)
+        sys.exit(1)
+    mq.send(message.encode(), type=cmd)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
+import os
 import sys
 import sysv_ipc
-import time
 import tkinter as tk
-from threading import Thread
+
+from protocol import decode_state, format_state
+from shm_world import SharedWorld, segment_name
+
+MQ_KEY = int(os.environ.get("PPC_MQ_KEY", 1234))  # même clé qu'env
 
 # Types de commandes de display vers env
 COMMANDE_PAUSE = 1
@@ -10,8 +14,12 @@ COMMANDE_START = 2
 COMMANDE_QUIT = 3
 COMMANDE_GROWTH = 4
 COMMANDE_GRASS = 5
+COMMANDE_SPAWN = 6
+COMMANDE_CULL = 7
+COMMANDE_PROFILE = 8
 # Type de message d'env vers display
-MSG_STATE =7
+MSG_STATE = 16
+STATE_POLL_MS = 100  # période de lecture de l'état (timer Tk)
 
 # Envoie une commande à env via la MQ 
 def send_command(mq, cmd_type, param=None):
@@ -21,25 +29,42 @@ def send_command(mq, cmd_type, param=None):
         message = "".encode()
     mq.send(message, type=cmd_type)
 
-# lire et afficher l'état dans la fenêtre graphique
-def update_display(mq, state_label):
+# lire et afficher l'état dans la fenêtre graphique (dans le thread Tk, via after)
+def update_display(root, mq, state_label, last_seq=None):
+    # ne garder que l'instantané le plus récent
+    latest = None
     while True:
         try:
-            # Lire l'état envoyé par env via MQ
-            state, t = mq.receive(type=MSG_STATE)
-            state_str = state.decode()
-            
+            latest, t = mq.receive(block=False, type=MSG_STATE)
+        except sysv_ipc.BusyError:
+            break
+        except sysv_ipc.ExistentialError:
+            state_label.config(text="env arrêté (Message Queue supprimée)")
+            return
+
+    if latest is not None:
+        seq, state = decode_state(latest)
+        if seq != last_seq:
             # Mise à jour du texte dans la fenêtre graphique
-            state_label.config(text=state_str)
+            state_label.config(text=format_state(state))
+            last_seq = seq
 
-        except sysv_ipc.BusyError:
-            time.sleep(0.1) 
-            continue
+    root.after(STATE_POLL_MS, update_display, root, mq, state_label, last_seq)
+
+# env lancé avec --shm : état lu directement dans le bloc partagé (seqlock), sans attendre les envois par la MQ
+def update_display_shm(root, shared, state_label):
+    state = shared.snapshot()
+    if state["quit"]:
+        state_label.config(text="env arrêté")
+        shared.close()
+        return
+    state_label.config(text=format_state(state))
+    root.after(STATE_POLL_MS, update_display_shm, root, shared, state_label)
 
 def main():
     # Connexion à la MQ de env
     try:
-        mq = sysv_ipc.MessageQueue(1234)
+        mq = sysv_ipc.MessageQueue(MQ_KEY)
     except sysv_ipc.ExistentialError:
         print("Erreur : Impossible de se connecter à la Message Queue. Assurez-vous que env.py est en cours d'exécution.", flush=True)
         sys.exit(1)
@@ -57,7 +82,7 @@ def main():
     command_entry.pack(pady=10)
 
     # Rappel des commandes possibles
-    command_hint = tk.Label(root, text="Commandes possibles :\nPAUSE, START, QUIT, GROWTH <valeur>, GRASS <valeur>", font=("Helvetica", 10), anchor="w")
+    command_hint = tk.Label(root, text="Commandes possibles :\nPAUSE, START, QUIT, GROWTH <valeur>, GRASS <valeur>,\nSPAWN <PREY|PREDATOR> <n>, CULL <PREY|PREDATOR> <n>,\nPROFILE START [secondes] [AGENTS], PROFILE STOP [AGENTS]", font=("Helvetica", 10), anchor="w")
     command_hint.pack(pady=10, padx=10)
 
     def on_command_submit():
@@ -82,6 +107,23 @@ def main():
                 send_command(mq, COMMANDE_GRASS, value)
             except ValueError:
                 print("Commande GRASS invalide. Format attendu : 'GRASS <valeur>'", flush=True)
+        elif user_input.lower().startswith(("spawn", "cull")):
+            try:
+                cmd, role, n = user_input.split()
+                if role.upper() not in ("PREY", "PREDATOR"):
+                    raise ValueError(role)
+                int(n)
+                send_command(mq, COMMANDE_SPAWN if cmd.lower() == "spawn" else COMMANDE_CULL, f"{role.upper()} {n}")
+            except ValueError:
+                print("Commande invalide. Format attendu : 'SPAWN <PREY|PREDATOR> <n>' ou 'CULL <PREY|PREDATOR> <n>'",
+                      flush=True)
+        elif user_input.lower().startswith("profile"):
+            words = user_input.upper().split()[1:]
+            if not words or words[0] not in ("START", "STOP"):
+                print("Commande PROFILE invalide. Format attendu : 'PROFILE START [secondes] [AGENTS]' ou "
+                      "'PROFILE STOP [AGENTS]'", flush=True)
+            else:
+                send_command(mq, COMMANDE_PROFILE, " ".join(words))
         else:
             print("Commande invalide. Essayez 'PAUSE', 'START', 'QUIT' ou 'GROWTH <valeur>'", flush=True)
 
@@ -89,9 +131,12 @@ def main():
     submit_button = tk.Button(root, text="Envoyer la commande", command=on_command_submit)
     submit_button.pack(pady=10)
 
-    # Lecture de l'état dans un thread séparé pour ne pas bloquer l'interface graphique
-    display_thread = Thread(target=update_display, args=(mq, state_label), daemon=True)
-    display_thread.start()
+    # Lecture de l'état par timer Tk (pas de thread : l'interface n'est modifiée que par le thread Tk)
+    try:
+        shared = SharedWorld.attach(segment_name(MQ_KEY))
+        root.after(STATE_POLL_MS, update_display_shm, root, shared, state_label)
+    except FileNotFoundError:
+        root.after(STATE_POLL_MS, update_display, root, mq, state_label)
 
     # Lancer la fenêtre tkinter
     root.mainloop()
@@ -0,0 +1,205 @@
+import time
+
+import numpy as np
+
+import simlog
+from env import world as WORLD_INIT, grass_tick, DROUGHT_DURATION, DROUGHT_PERIOD, BIRTH_CAP
+from protocol import format_state
+from prey import (REPRO_COOLDOWN_INIT as PREY_COOLDOWN_INIT, H as PREY_H, R as PREY_R, ENERGY_LOST_TICK as PREY_ENERGY_LOST_TICK,
+                  EAT_AMOUNT, EAT_GAIN as PREY_EAT_GAIN, REPRO_COOLDOWN as PREY_REPRO_COOLDOWN,
+                  ENERGY_INIT as PREY_ENERGY_INIT)
+from predator import (REPRO_COOLDOWN_INIT as PRED_COOLDOWN_INIT, H as PRED_H, R as PRED_R, ENERGY_LOST_TICK as PRED_ENERGY_LOST_TICK,
+                      EAT_GAIN as PRED_EAT_GAIN, REPRO_COOLDOWN as PRED_REPRO_COOLDOWN,
+                      ENERGY_INIT as PRED_ENERGY_INIT)
+
+log = simlog.get("env")
+log_headless = simlog.get("env:headless")
+
+
+# Paramètres du modèle, surchargeables pour chaque simulation (sweep.py)
+DEFAULT_PARAMS = {
+    "prey_h": PREY_H,
+    "prey_r": PREY_R,
+    "prey_energy_lost": PREY_ENERGY_LOST_TICK,
+    "prey_eat_gain": PREY_EAT_GAIN,
+    "prey_repro_cooldown": PREY_REPRO_COOLDOWN,
+    "eat_amount": EAT_AMOUNT,
+    "pred_h": PRED_H,
+    "pred_r": PRED_R,
+    "pred_energy_lost": PRED_ENERGY_LOST_TICK,
+    "pred_eat_gain": PRED_EAT_GAIN,
+    "pred_repro_cooldown": PRED_REPRO_COOLDOWN,
+    "grass_plant": WORLD_INIT["grass_plant"],
+    "grass_growth": WORLD_INIT["grass_growth"],
+    "drought_period": DROUGHT_PERIOD,
+    "drought_duration": DROUGHT_DURATION,
+    "birth_cap": BIRTH_CAP,
+}
+
+
+# Population stockée en colonnes NumPy (une ligne par individu)
+class Population:
+    def __init__(self, ids, energy, first_cooldown: int):
+        self.ids = ids
+        self.energy = energy
+        self.cooldown = np.full(len(ids), first_cooldown, dtype=np.int32)
+        self.huntable = np.zeros(len(ids), dtype=bool)       # énergie < H (proies uniquement)
+        self.reproducible = np.zeros(len(ids), dtype=bool)   # énergie >= R et cooldown écoulé
+        self.reproduced = np.zeros(len(ids), dtype=np.int32)  # tick de fin de la fenêtre après avoir eu un petit
+
+    def __len__(self):
+        return len(self.ids)
+
+    # 1) métabolisme + cooldown reproduction (équivalent du début de prey_tick/predator_tick)
+    def metabolism(self, energy_lost: float):
+        self.energy -= energy_lost
+        np.subtract(self.cooldown, 1, out=self.cooldown, where=self.cooldown > 0)
+
+    # Entrée/sortie de la liste des reproductibles
+    def update_reproducible(self, r: float, repro_cooldown: int, tick: int):
+        new = (self.energy >= r) & (self.cooldown == 0) & (self.reproduced <= tick) & ~self.reproducible
+        self.reproducible |= new
+        self.cooldown[new] = repro_cooldown  # reset cooldown
+        self.reproducible[self.energy < r] = False
+
+    # Garde uniquement les individus du masque (morts retirés)
+    def keep(self, mask):
+        self.ids = self.ids[mask]
+        self.energy = self.energy[mask]
+        self.cooldown = self.cooldown[mask]
+        self.huntable = self.huntable[mask]
+        self.reproducible = self.reproducible[mask]
+        self.reproduced = self.reproduced[mask]
+
+    # Ajout de nouveaux individus (naissances)
+    def extend(self, other: "Population"):
+        self.ids = np.concatenate((self.ids, other.ids))
+        self.energy = np.concatenate((self.energy, other.energy))
+        self.cooldown = np.concatenate((self.cooldown, other.cooldown))
+        self.huntable = np.concatenate((self.huntable, other.huntable))
+        self.reproducible = np.concatenate((self.reproducible, other.reproducible))
+        self.reproduced = np.concatenate((self.reproduced, other.reproduced))
+
+
+# Moteur headless : toute la simulation dans un seul process, ticks vectorisés
+class HeadlessEngine:
+    def __init__(self, n_preys: int, n_predators: int, seed=None, params=None):
+        unknown = set(params or {}) - set(DEFAULT_PARAMS)
+        if unknown:
+            raise ValueError(f"paramètres inconnus : {', '.join(sorted(unknown))}")
+        self.p = dict(DEFAULT_PARAMS, **(params or {}))
+        self.rng = np.random.default_rng(seed)
+        self.world = dict(WORLD_INIT)
+        self.world["grass_plant"] = self.p["grass_plant"]
+        self.world["grass_growth"] = self.p["grass_growth"]
+        self.tick = 0
+        self.next_id = 1
+        self.preys = self._newborns(n_preys, PREY_ENERGY_INIT, PREY_COOLDOWN_INIT)
+        self.predators = self._newborns(n_predators, PRED_ENERGY_INIT, PRED_COOLDOWN_INIT)
+        self._update_census()
+
+    def _newborns(self, n: int, energy_range, first_cooldown: int) -> Population:
+        ids = np.arange(self.next_id, self.next_id + n, dtype=np.int64)
+        self.next_id += n
+        return Population(ids, self.rng.uniform(energy_range[0], energy_range[1], n), first_cooldown)
+
+    def _update_census(self):
+        self.world["preys"] = len(self.preys)
+        self.world["predators"] = len(self.predators)
+
+    # Sécheresse périodique (équivalent de drought_call, une période = DROUGHT_PERIOD ticks)
+    def _drought(self):
+        w = self.world
+        if self.tick % self.p["drought_period"] == 0 and w["drought"] == 0:
+            w["drought"] = 1
+            w["drought_duration"] = self.p["drought_duration"]
+            log.info("Sécheresse déclenchée | durée : {duration} ticks", duration=w["drought_duration"])
+
+    def step(self):
+        self.tick += 1
+        w = self.world
+        rng = self.rng
+        prm = self.p
+        p = self.preys
+        q = self.predators
+
+        self._drought()
+        if grass_tick(w):
+            log.info("Sécheresse terminée")
+
+        # proies : métabolisme puis chassable si énergie < H (retirée si énergie > H)
+        p.metabolism(prm["prey_energy_lost"])
+        p.huntable[p.energy < prm["prey_h"]] = True
+        p.huntable[p.energy > prm["prey_h"]] = False
+
+        # prédateurs : métabolisme puis chasse pendant que les proies affamées mangent
+        q.metabolism(prm["pred_energy_lost"])
+        hunters = np.flatnonzero(q.energy < prm["pred_h"])
+        targets = np.flatnonzero(p.huntable)
+        eaten = np.zeros(len(p), dtype=bool)
+        n_meals = min(len(hunters), len(targets))
+        if n_meals > 0:
+            hunters = rng.choice(hunters, n_meals, replace=False)
+            eaten[rng.choice(targets, n_meals, replace=False)] = True
+            q.energy[hunters] += prm["pred_eat_gain"]
+
+        # proies affamées encore en vie : EAT_AMOUNT d'herbe chacune tant qu'il en reste
+        hungry = np.flatnonzero((p.energy < prm["prey_h"]) & ~eaten)
+        n_eat = min(len(hungry), int(w["grass_unity"] // prm["eat_amount"]))
+        if n_eat > 0:
+            p.energy[rng.choice(hungry, n_eat, replace=False)] += prm["prey_eat_gain"]
+            w["grass_unity"] -= n_eat * prm["eat_amount"]
+
+        p.update_reproducible(prm["prey_r"], prm["prey_repro_cooldown"], self.tick)
+        q.update_reproducible(prm["pred_r"], prm["pred_repro_cooldown"], self.tick)
+
+        # morts : mangées ou énergie <= 0
+        p.keep(~eaten & (p.energy > 0))
+        q.keep(q.energy > 0)
+
+        # reproduction (mêmes règles que reproduction_step : floor(n/2) couples par rôle, au plus birth_cap
+        # naissances réparties à tour de rôle, parents hors liste jusqu'à la fin de leur cooldown)
+        roles = ((p, prm["prey_repro_cooldown"], PREY_ENERGY_INIT, PREY_COOLDOWN_INIT),
+                 (q, prm["pred_repro_cooldown"], PRED_ENERGY_INIT, PRED_COOLDOWN_INIT))
+        possible = [np.count_nonzero(pop.reproducible) // 2 for pop, *_ in roles]
+        allowed = [0] * len(roles)
+        budget = prm["birth_cap"]
+        while budget > 0 and any(a < n for a, n in zip(allowed, possible)):
+            for i in range(len(roles)):
+                if budget > 0 and allowed[i] < possible[i]:
+                    allowed[i] += 1
+                    budget -= 1
+        for (pop, window, energy_init, cooldown_init), n in zip(roles, allowed):
+            if n == 0:
+                continue
+            parents = rng.choice(np.flatnonzero(pop.reproducible), 2 * n, replace=False)
+            pop.reproducible[parents] = False
+            pop.reproduced[parents] = self.tick + window
+            pop.extend(self._newborns(n, energy_init, cooldown_init))
+
+        self._update_census()
+
+    def snapshot(self) -> dict:
+        return dict(self.world)
+
+
+def run_headless(n_preys: int, n_predators: int, ticks: int, seed=None, report_every: int = 10,
+                 params=None) -> HeadlessEngine:
+    engine = HeadlessEngine(n_preys, n_predators, seed=seed, params=params)
+    log_headless.info("READY | proies={preys} | predateurs={predators} | ticks={ticks}", preys=n_preys,
+                      predators=n_predators, ticks=ticks)
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        engine.step()
+        if report_every > 0 and engine.tick % report_every == 0:
+            log_headless.info("tick={tick} | {state}", tick=engine.tick, state=format_state(engine.world))
+        if len(engine.preys) == 0 and len(engine.predators) == 0:
+            log_headless.info("Plus aucun individu, arrêt de la simulation")
+            break
+    elapsed = time.perf_counter() - start
+
+    per_tick = elapsed / engine.tick * 1000 if engine.tick else 0.0
+    log_headless.info("{ticks} ticks en {s:.2f}s ({per_tick:.2f} ms/tick)", ticks=engine.tick, s=elapsed,
+                      per_tick=per_tick)
+    return engine
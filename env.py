@@ -1,23 +1,56 @@
 import sys
 import socket
 import time
-from multiprocessing.managers import BaseManager, DictProxy, ListProxy, AcquirerProxy
-import multiprocessing as mp
+from multiprocessing.managers import BaseManager
 import sysv_ipc
 import signal
 import os
 import threading
-import subprocess
+import argparse
+import selectors
+import random
+import json
+from collections import deque
 
-# Configuration
+import simlog
+from shm_world import SharedWorld, segment_name
+from spawner import Spawner
+from locks import StatLock, stats_since
+from profiler import Sampler
+from spatial import SpatialGrid
+from registry import Registry, FLAG_HUNTABLE, FLAG_REPRODUCIBLE
+from hunt import POLICIES as HUNT_POLICIES, SPATIAL_ONLY as HUNT_SPATIAL_ONLY, match_random
+from checkpoint import save_checkpoint, load_checkpoint
+from journal import (JournalWriter, EV_JOIN, EV_MEAL, EV_GRAZE, EV_BIRTH, EV_DEATH, EV_DROUGHT_START,
+                     EV_DROUGHT_END, EV_COMMAND)
+from protocol import (FrameDecoder, ProtocolError, encode_ack, encode_stop, encode_kill, encode_tick, encode_control,
+                      encode_cull,
+                      MSG_JOIN, MSG_DEATH, MSG_DONE, ROLES, ROLE_CODES, JOIN_HERD, JOIN_REATTACH, ACK_OK, ACK_REFUSED,
+                      ACK_REATTACHED, ACK_CLOCK, ACK_LOCKSTEP, CTRL_PAUSE, CTRL_RESUME, CTRL_DROUGHT_ON, CTRL_DROUGHT_OFF,
+                      CTRL_GROWTH, CTRL_GRASS, CTRL_PROFILE_START, CTRL_PROFILE_STOP, REASON_TEXT, encode_state)
+from prey import H as PREY_H, R as PREY_R, EAT_AMOUNT, EAT_GAIN as PREY_EAT_GAIN, REPRO_COOLDOWN as PREY_REPRO_COOLDOWN
+from predator import H as PRED_H, R as PRED_R, EAT_GAIN as PRED_EAT_GAIN, REPRO_COOLDOWN as PRED_REPRO_COOLDOWN
+
+# Configuration (ports et clé MQ surchargeables par variables d'environnement, ex. bench.py)
 HOST = "127.0.0.1"
-PORT_SOCKET = 5001
-PORT_MANAGER = 5002
-MQ_KEY = 1234  # Clé pour MessageQueue
+PORT_SOCKET = int(os.environ.get("PPC_PORT_SOCKET", 5001))
+PORT_MANAGER = int(os.environ.get("PPC_PORT_MANAGER", 5002))
+MQ_KEY = int(os.environ.get("PPC_MQ_KEY", 1234))  # Clé pour MessageQueue
 AUTHKEY = b"memoirepartagee"
+MANAGER_BACKLOG = 1024  # connexions au manager en attente d'accept
+
+log = simlog.get("env")
+
+# Sockets clients (prédateurs/proies) -> infos de connexion (adresse, décodeur de trames, individus du herd,
+# octets en attente d'envoi)
+CLIENTS = {}
+pending_out = set()    # sockets clients dont la file de sortie n'est pas vide
+OUT_LIMIT = 64 * 1024  # file de sortie au-delà de laquelle un client lent ne reçoit plus les TICK
 
-# Liste des sockets clients (prédateurs/proies) (evite que la socket se close a la fin de la fonction)
-CLIENTS = []
+# Cadence de la boucle principale (secondes)
+TICK_PERIOD = 1.0       # tick de simulation (temps réel)
+STATE_PERIOD = 0.5      # envoi de l'état au display
+MQ_POLL_PERIOD = 0.1    # la MQ sysv n'est pas sélectionnable : scrutée au moins à cette période
 
 # Types de commandes display vers env
 COMMANDE_PAUSE = 1
@@ -25,8 +58,13 @@ COMMANDE_START = 2
 COMMANDE_QUIT = 3
 COMMANDE_GROWTH = 4
 COMMANDE_GRASS = 5
-# Types de message d'env vers display
-MSG_STATE = 7
+COMMANDE_SPAWN = 6  # "<ROLE> <n>" : n individus lancés par le spawner
+COMMANDE_CULL = 7   # "<ROLE> <n>" : n individus tirés au hasard arrêtés
+COMMANDE_PROFILE = 8  # "START [secondes] [AGENTS]" / "STOP [AGENTS]" : profilage d'env (et des agents)
+# Types de message d'env vers display (au-delà des types de commande : env ne lit que les types < MSG_STATE)
+MSG_STATE = 16
+state_seq = 0      # numéro du dernier instantané envoyé
+state_dropped = 0  # instantanés abandonnés (file pleine)
 
 #Remote Manager shared data (env <-> prey/pred)
 world = {
@@ -41,243 +79,1256 @@ world = {
     "quit": 0
 }
 
-huntable = []  # PIDs des proies chassables (energy < H)
-reproducible_preys = []  # PIDs des proies reproductibles (energy > R)
-reproducible_predators = []  # PIDs des prédateurs reproductibles (energy > R)
-world_lock = mp.Lock()
+# Ensemble de PIDs : appartenance, ajout, retrait et tirage aléatoire en O(1)
+class PidSet:
+    def __init__(self):
+        self.items = []   # PIDs (ordre quelconque)
+        self.index = {}   # pid -> position dans items
+
+    def __contains__(self, pid):
+        return pid in self.index
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def add(self, pid):
+        if pid not in self.index:
+            self.index[pid] = len(self.items)
+            self.items.append(pid)
+
+    def discard(self, pid):
+        i = self.index.pop(pid, None)
+        if i is None:
+            return
+        last = self.items.pop()
+        if i < len(self.items):  # le dernier prend la place du retiré
+            self.items[i] = last
+            self.index[last] = i
+
+    def pop_random(self):
+        pid = random.choice(self.items)
+        self.discard(pid)
+        return pid
+
+    def clear(self):
+        self.items.clear()
+        self.index.clear()
+
+huntable = PidSet()  # PIDs des proies chassables (energy < H)
+reproducible_preys = PidSet()  # PIDs des proies reproductibles (energy > R)
+reproducible_predators = PidSet()  # PIDs des prédateurs reproductibles (energy > R)
+registry = Registry()  # individus inscrits (comptés dans world) : rôle, dernier rapport, connexion...
+COUNTERS = {"PREY": "preys", "PREDATOR": "predators"}  # compteurs de world, toujours égaux à registry.count(rôle)
+grid = None  # monde 2D (--spatial) : index en grille des proies chassables, positions envoyées par les agents
+# Chasse appariée une fois par tick (hunt_step) : un prédateur affamé dépose une demande dans son rapport
+# et reçoit la proie qui lui a été attribuée dans son rapport suivant
+hunt_requests = {}   # prédateur -> position, demandes du tick en cours
+meals = {}           # prédateur -> proie attribuée, pas encore remise
+hunt_policy = match_random  # politique d'appariement (hunt.py, --hunt-policy)
+hunt_stats = {"rounds": 0, "requests": 0, "matches": 0}
+# Reproduction appariée par tick : couples tirés parmi les reproductibles, un petit par couple
+BIRTH_CAP = 8        # naissances max par tick, tous rôles confondus (--birth-cap)
+birth_cap = BIRTH_CAP
+reproduced = {}      # pid -> tick de fin de sa fenêtre de cooldown après avoir eu un petit
+# couples formés ; couples reportés par le plafond, comptés à chaque tick où ils attendent (couple-ticks)
+repro_stats = {"pairs": 0, "capped_couple_ticks": 0}
+grass_field = None  # herbe par cellule (--grass-grid), protégée par grass_lock
+
+# Verrous de l'état partagé, un par partie indépendante (jamais deux tenus à la fois, aucune I/O sous verrou)
+# Les drapeaux pause/quit, écrits par la seule boucle principale, sont lus et écrits sans verrou.
+grass_lock = StatLock(name="grass")        # herbe, sécheresse et paramètres de pousse de world
+census_lock = StatLock(name="census")      # registry et compteurs preys/predators de world
+huntable_lock = StatLock(name="huntable")  # huntable, grid, demandes de chasse et repas attribués
+repro_lock = StatLock(name="repro")        # reproducible_preys, reproducible_predators et reproduced
+LOCKS = (grass_lock, census_lock, huntable_lock, repro_lock)
+LOCK_REPORT_PERIOD = 30.0  # rapport de contention périodique (secondes, --lock-report)
+
+# Individus hébergés par un herd (herd.py) : identifiants virtuels au-delà de pid_max
+VIRTUAL_ID_BASE = 1 << 22
+VIRTUAL = {}  # id virtuel -> socket du herd qui l'héberge
+next_virtual_id = VIRTUAL_ID_BASE
+pending_kills = deque()  # ids virtuels mangés, prévenus par la boucle principale (socket)
+pending_leaves = deque()  # ids virtuels partis par le manager (mort naturelle), détachés par la boucle principale
+# Vivacité des agents : fin de connexion, pidfd des process (Linux) et audit périodique des index
+PIDFDS = {}          # pid d'un agent process -> pidfd surveillé par le selector (lisible à sa mort)
+REAP_PERIOD = 5.0    # audit des index (secondes)
+reaped = 0           # individus morts sans nettoyage retirés du monde
+# Injection en masse (commande SPAWN) : avancement par rôle
+SPAWN_CHUNK = 10     # naissances par lot confié au spawner, un lot en cours à la fois par rôle
+
+def new_spawn_job() -> dict:
+    return {"total": 0, "done": 0, "failed": 0, "pending": 0, "started": 0.0}
+
+spawn_jobs = {"PREY": new_spawn_job(), "PREDATOR": new_spawn_job()}
+culled = {"PREY": 0, "PREDATOR": 0}  # individus arrêtés par CULL
+pending_controls = deque()  # trames de contrôle à diffuser par la boucle principale (tout thread peut en ajouter)
+
+# Mort d'une proie mangée : signal pour un process, message KILL pour un individu de herd
+def kill_prey(prey_pid: int):
+    if prey_pid >= VIRTUAL_ID_BASE:
+        pending_kills.append(prey_pid)
+        return
+    try:
+        os.kill(prey_pid, signal.SIGUSR1)  # Tuer la proie
+    except ProcessLookupError:
+        pass
+
+# Service exécuté dans env : un seul appel par individu et par tick
+class WorldService:
+    def __init__(self):
+        self.ops = 0           # appels join/report/leave
+        self.calls = {"join": 0, "report": 0, "leave": 0}  # mêmes appels par méthode
+        self.batches = 0       # appels batch (un aller-retour chacun)
+        self.batched_ops = 0   # appels join/report/leave arrivés par batch
+        self.count_lock = threading.Lock()  # compteurs ci-dessus (threads du manager)
+
+    # Allers-retours RPC reçus par le manager
+    def round_trips(self) -> int:
+        return self.ops - self.batched_ops + self.batches
 
-def get_world():
-    return world
+    def _count(self, method: str):
+        with self.count_lock:
+            self.ops += 1
+            self.calls[method] += 1
 
-def get_huntable():
-    return huntable
+    # Inscription d'un individu dans le monde
+    def join(self, role: str, pid: int):
+        self._count("join")
+        census_lock.acquire()
+        try:
+            if registry.add(pid, role):
+                world[COUNTERS[role]] = registry.count(role)
+        finally:
+            census_lock.release()
 
-def get_reproducible_preys():
-    return reproducible_preys
+    # Rapport de tick : met à jour chassable/reproductible, applique repas et chasse, renvoie le résultat
+    # Chaque partie de l'état est mise à jour sous son propre verrou, un seul verrou tenu à la fois.
+    def report(self, role: str, pid: int, energy: float, cooldown: int, x: float = 0.0, y: float = 0.0) -> dict:
+        self._count("report")
+        # individu déjà retiré du monde (mangé, CULL, reaper) dont le KILL / STOP n'est pas encore arrivé :
+        # aucun index touché, il ne redevient ni chassable ni reproductible
+        census_lock.acquire()
+        try:
+            registered = pid in registry
+        finally:
+            census_lock.release()
+        if not registered:
+            return {"energy": energy, "cooldown": cooldown, "ate": False, "prey": None, "huntable": False,
+                    "reproducible": False}
+        ate = False
+        prey_pid = None
+        if role == "PREY":
+            # chassable si énergie < H, retirée si énergie > H
+            huntable_lock.acquire()
+            try:
+                if energy < PREY_H:
+                    huntable.add(pid)
+                elif energy > PREY_H:
+                    huntable.discard(pid)
+                is_huntable = pid in huntable
+                if grid is not None:  # index spatial : proies chassables à leur nouvelle position
+                    if is_huntable:
+                        grid.place(pid, x, y)
+                    else:
+                        grid.remove(pid)
+            finally:
+                huntable_lock.release()
+            # manger si faim (herbe par cellule : dans la cellule de la proie)
+            if energy < PREY_H:
+                grass_lock.acquire()
+                try:
+                    if grass_field is not None:
+                        ate = grass_field.eat(x, y, EAT_AMOUNT)
+                    else:
+                        ate = world["grass_unity"] >= EAT_AMOUNT
+                    if ate:
+                        world["grass_unity"] -= EAT_AMOUNT
+                finally:
+                    grass_lock.release()
+                if ate:
+                    energy += PREY_EAT_GAIN
+            reproducible, r, repro_cooldown = reproducible_preys, PREY_R, PREY_REPRO_COOLDOWN
+        else:
+            # repas attribué par l'appariement du tick précédent, puis demande de chasse si toujours faim
+            huntable_lock.acquire()
+            try:
+                prey_pid = meals.pop(pid, None)
+                if prey_pid is not None:
+                    energy += PRED_EAT_GAIN
+                if energy < PRED_H:
+                    hunt_requests[pid] = (x, y)
+                else:
+                    hunt_requests.pop(pid, None)
+            finally:
+                huntable_lock.release()
+            ate = prey_pid is not None
+            reproducible, r, repro_cooldown = reproducible_predators, PRED_R, PRED_REPRO_COOLDOWN
+            is_huntable = False
 
-def get_reproducible_predators():
-    return reproducible_predators
+        # reproduction si énergie haute
+        repro_lock.acquire()
+        try:
+            if energy >= r and cooldown == 0 and reproduced.get(pid, 0) <= tick:
+                if pid not in reproducible:
+                    reproducible.add(pid)
+                    cooldown = repro_cooldown  # reset cooldown
+            elif energy < r:
+                reproducible.discard(pid)
+            is_reproducible = pid in reproducible
+        finally:
+            repro_lock.release()
 
-def get_lock():
-    return world_lock
+        # dernier rapport conservé dans le registre
+        census_lock.acquire()
+        try:
+            registry.update(pid, energy, cooldown, (FLAG_HUNTABLE if is_huntable else 0)
+                            | (FLAG_REPRODUCIBLE if is_reproducible else 0), x, y)
+        finally:
+            census_lock.release()
+
+        if journal is not None and ate and prey_pid is None:  # repas de prédateur journalisé par hunt_step
+            journal.write(EV_GRAZE, ROLE_CODES[role], a=pid, value=EAT_AMOUNT)
+        return {
+            "energy": energy,
+            "cooldown": cooldown,
+            "ate": ate,
+            "prey": prey_pid,
+            "huntable": is_huntable,
+            "reproducible": is_reproducible,
+        }
+
+    # Plusieurs appels join/report/leave en un seul aller-retour (herd.py)
+    def batch(self, calls: list) -> list:
+        with self.count_lock:
+            self.batches += 1
+            self.batched_ops += len(calls)
+        results = []
+        for method, args in calls:
+            if method not in ("join", "report", "leave"):
+                raise ValueError(f"méthode inconnue : {method}")
+            results.append(getattr(self, method)(*args))
+        return results
+
+    # Départ d'un individu : retiré de tous les ensembles, compteur décrémenté une seule fois
+    def leave(self, role: str, pid: int):
+        self._count("leave")
+        huntable_lock.acquire()
+        try:
+            huntable.discard(pid)
+            if grid is not None:
+                grid.remove(pid)
+            hunt_requests.pop(pid, None)
+            meals.pop(pid, None)
+        finally:
+            huntable_lock.release()
+        repro_lock.acquire()
+        try:
+            reproducible_preys.discard(pid)
+            reproducible_predators.discard(pid)
+            reproduced.pop(pid, None)
+        finally:
+            repro_lock.release()
+        census_lock.acquire()
+        try:
+            removed = registry.remove(pid)
+            if removed is not None:
+                world[COUNTERS[removed]] = registry.count(removed)
+        finally:
+            census_lock.release()
+        if pid >= VIRTUAL_ID_BASE:
+            pending_leaves.append(pid)  # VIRTUAL et herds de CLIENTS : boucle principale uniquement
+
+service = WorldService()
+
+def get_service():
+    return service
 
 class WorldManager(BaseManager):
     pass
 
-WorldManager.register("get_world", callable=get_world, proxytype=DictProxy)
-WorldManager.register("get_huntable", callable=get_huntable, proxytype=ListProxy)
-WorldManager.register("get_reproducible_preys", callable=get_reproducible_preys, proxytype=ListProxy)
-WorldManager.register("get_reproducible_predators", callable=get_reproducible_predators, proxytype=ListProxy)
-WorldManager.register("get_lock", callable=get_lock, proxytype=AcquirerProxy)
+WorldManager.register("get_service", callable=get_service, exposed=("join", "report", "leave", "batch"))
 
+# Mesures pour le benchmark (--stats)
+tick_times = []  # instant (monotonic) de chaque tick
+tick_cpu = []    # temps CPU d'env (tous threads) à chaque tick
+join_times = []  # instant de chaque JOIN accepté
+
+# Service de naissance (créé dans main)
+spawner = None
+# Journal binaire des événements (--journal, créé dans main)
+journal = None
+
+# Compteur de ticks de simulation (sauvegardé dans le checkpoint)
+tick = 0
+# Horloge virtuelle (--clock) : env diffuse chaque tick (TICK), sécheresse comptée en ticks,
+# cadence réglée par --tick-period (0 = aussi vite que possible)
+virtual_clock = False
+tick_period = TICK_PERIOD
+ticks_skipped = 0  # TICK non envoyés à un client trop lent (file de sortie pleine)
+# Lockstep (--lockstep) : le tick suivant n'est diffusé qu'une fois que tous les clients ont répondu DONE
+# au tick courant, ou à l'échéance --tick-deadline (clients en retard comptés)
+lockstep = False
+tick_deadline = 1.0
+barrier = set()          # clients qui n'ont pas encore terminé le tick diffusé
+barrier_opened_at = 0.0
+barrier_waits = []       # durée de chaque barrière (diffusion -> fermeture)
+stragglers = 0           # réponses manquantes à l'échéance (total)
+straggler_ticks = 0      # ticks fermés par l'échéance
+# Individus du checkpoint restauré pas encore rattachés : pid -> rôle (retirés du monde après RESTORE_GRACE)
+restored = {}
+RESTORE_GRACE = 15.0
 
 # Variables locales statiques
 DROUGHT_DURATION = 15
 DROUGHT_PERIOD = 30
+drought_next_at = 0.0  # échéance (monotonic) du prochain appel de sécheresse
 
 # Fonctions message queue
 def mq_poll_commands(mq: sysv_ipc.MessageQueue):
     while True:
         try:
-            msg, t = mq.receive(block=False)
+            msg, t = mq.receive(block=False, type=-(MSG_STATE - 1))  # commandes uniquement (types < MSG_STATE)
         except sysv_ipc.BusyError:
             return  # plus de messages
         except Exception as e:
-            print("[env] Erreur dans la MQ:", e, flush=True)
+            log.error("Erreur dans la MQ: {error}", error=e)
             return
 
-        world_lock.acquire()
-        try:
-            if t == COMMANDE_PAUSE:
-                world["pause"] = 1
-
-            elif t == COMMANDE_START:
-                world["pause"] = 0
-
-            elif t == COMMANDE_QUIT:
-                world["quit"] = 1
-                return
-
-            elif t == COMMANDE_GROWTH:
-                new_growth = msg.decode().strip()
+        if journal is not None:
+            value = 0.0
+            for word in msg.decode().split():  # valeur, effectif de SPAWN/CULL ou durée de PROFILE
                 try:
-                    world["grass_growth"] = float(new_growth)
-                    print(f"[env] Croissance de l'herbe définie à {new_growth}", flush=True)
+                    value = float(word)
+                    break
                 except ValueError:
                     pass
+            journal.write(EV_COMMAND, code=t, value=value)
 
-            elif t == COMMANDE_GRASS:
-                new_grass = msg.decode().strip()
-                try:
-                    value = int(new_grass)
-                    world["grass_plant"] = value
-                    print(f"[env] Nombre de plants d'herbe défini à {value} unités", flush=True)
-                except ValueError:
-                    pass
+        if t == COMMANDE_PAUSE:
+            world["pause"] = 1
+            pending_controls.append(encode_control(CTRL_PAUSE))
+
+        elif t == COMMANDE_START:
+            world["pause"] = 0
+            pending_controls.append(encode_control(CTRL_RESUME))
+
+        elif t == COMMANDE_QUIT:
+            world["quit"] = 1
+            return
+
+        elif t == COMMANDE_GROWTH:
+            new_growth = msg.decode().strip()
+            try:
+                value = float(new_growth)
+            except ValueError:
+                log.warning("Commande invalide : {command!r} (attendu '<coef pousse>')", command=new_growth)
+                continue
+            with grass_lock:
+                world["grass_growth"] = value
+            pending_controls.append(encode_control(CTRL_GROWTH, value))
+            log.info("Croissance de l'herbe définie à {growth}", growth=new_growth)
+
+        elif t == COMMANDE_GRASS:
+            new_grass = msg.decode().strip()
+            try:
+                value = int(new_grass)
+            except ValueError:
+                log.warning("Commande invalide : {command!r} (attendu '<nombre de plants>')", command=new_grass)
+                continue
+            with grass_lock:
+                world["grass_plant"] = value
+            pending_controls.append(encode_control(CTRL_GRASS, value))
+            log.info("Nombre de plants d'herbe défini à {grass_plant} unités", grass_plant=value)
+
+        elif t in (COMMANDE_SPAWN, COMMANDE_CULL):
+            try:
+                role, n = msg.decode().split()
+                role, n = role.upper(), int(n)
+                if role not in COUNTERS or n < 0:
+                    raise ValueError(role)
+            except ValueError:
+                log.warning("Commande invalide : {command!r} (attendu '<PREY|PREDATOR> <n>')", command=msg.decode())
+                continue
+            if t == COMMANDE_SPAWN:
+                spawn_jobs[role]["total"] += n
+                spawn_jobs[role]["started"] = spawn_jobs[role]["started"] or time.monotonic()
             else:
-                pass
-        finally:
-            world_lock.release()
+                cull(role, n)
+
+        elif t == COMMANDE_PROFILE:
+            words = msg.decode().upper().split()
+            try:
+                action = words[0]
+                seconds = float(words[1]) if len(words) > 1 and words[1] != "AGENTS" else 0.0
+                if action not in ("START", "STOP") or seconds < 0:
+                    raise ValueError(action)
+            except (IndexError, ValueError):
+                log.warning("Commande invalide : {command!r} (attendu 'START [secondes] [AGENTS]' ou 'STOP [AGENTS]')",
+                            command=msg.decode())
+                continue
+            agents = "AGENTS" in words
+            if action == "START":
+                if profiler.start(seconds):
+                    log.info("Profilage démarré ({duration}{agents})", agents=", agents compris" if agents else "",
+                             duration=f"{seconds:g}s" if seconds else "jusqu'à PROFILE STOP")
+                else:
+                    log.warning("Profilage déjà en cours")
+                if agents:
+                    pending_controls.append(encode_control(CTRL_PROFILE_START, seconds))
+            else:
+                profiler.stop()
+                if agents:
+                    pending_controls.append(encode_control(CTRL_PROFILE_STOP))
+
+GRASS_KEYS = ("grass_plant", "grass_unity", "drought", "drought_duration", "grass_growth")  # champs sous grass_lock
+
+# Copie de world : compteurs et herbe copiés chacun sous son verrou
+def world_snapshot() -> dict:
+    if isinstance(world, SharedWorld):
+        return world.snapshot()  # seqlock : pas besoin de verrou
+    snapshot = dict(world)
+    with census_lock:
+        snapshot["preys"], snapshot["predators"] = world["preys"], world["predators"]
+    with grass_lock:
+        for key in GRASS_KEYS:
+            snapshot[key] = world[key]
+    return snapshot
 
-# Envoi état via MQ
+# Envoi état via MQ : dernière valeur uniquement, jamais bloquant
 def mq_send_state(mq: sysv_ipc.MessageQueue):
-    world_lock.acquire()
+    global state_seq, state_dropped
+
+    snapshot = world_snapshot()
+    state_seq += 1
+
+    # l'état précédent non lu (display absent ou lent) est remplacé par le nouveau
     try:
-        grass_unity_rounded = round(float(world["grass_unity"]), 1)
-        st = (
-            f"predateurs={world['predators']} | "
-            f"proies={world['preys']} | "
-            f"plants d'herbe={world['grass_plant']} | "
-            f"unités d'herbe={grass_unity_rounded} | "
-            f"sécheresse={world['drought']} | "
-            f"pause={world['pause']} | "
-            f"coef pousse={world['grass_growth']}"
-        )
-    finally:
-        world_lock.release()
+        while True:
+            mq.receive(block=False, type=MSG_STATE)
+    except sysv_ipc.BusyError:
+        pass
+    except Exception as e:
+        log.error("MQ receive error: {error}", error=e)
     try:
-        mq.send(st.encode(), type=MSG_STATE)
+        mq.send(encode_state(state_seq, snapshot), block=False, type=MSG_STATE)
+    except sysv_ipc.BusyError:
+        state_dropped += 1  # file pleine : état abandonné, le suivant le remplacera
     except Exception as e:
-        print("[env] MQ send error:", e, flush=True)
+        log.error("MQ send error: {error}", error=e)
 
 # Socket server (join predator/prey)
 def setup_server_socket():
     s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
     s.bind((HOST, PORT_SOCKET))
-    s.listen(20)  # backlog
-    s.settimeout(0.2)  # pour ne pas bloquer la boucle principale
+    s.listen(128)  # backlog
+    s.setblocking(False)  # accept piloté par le selector
     return s
 
-def socket_accept_one(server_socket: socket.socket):
+# Accepte toutes les connexions en attente
+def socket_accept_all(sel: selectors.BaseSelector, server_socket: socket.socket):
+    while True:
+        try:
+            conn, addr = server_socket.accept()
+        except BlockingIOError:
+            return  # plus de connexions en attente
+        except Exception as e:
+            log.error("socket accept error: {error}", error=e)
+            return
+
+        conn.setblocking(False)
+        CLIENTS[conn] = {"addr": addr, "decoder": FrameDecoder(), "herd": {}, "agents": {}, "out": bytearray(),
+                         "joined": False}  # garder la connexion ouverte
+        sel.register(conn, selectors.EVENT_READ, data="client")
+
+# Ferme une connexion client
+def socket_drop(sel: selectors.BaseSelector, conn: socket.socket):
     try:
-        conn, addr = server_socket.accept()
-    except socket.timeout:
+        sel.unregister(conn)
+    except Exception:
+        pass
+    info = CLIENTS.pop(conn, None)
+    pending_out.discard(conn)
+    barrier.discard(conn)  # client parti : plus attendu
+    conn.close()
+    # agent ou herd déconnecté : ses individus encore inscrits (mort sans nettoyage) quittent le monde
+    if info is not None:
+        for vid in info["herd"]:
+            VIRTUAL.pop(vid, None)
+        for pid in info["agents"]:
+            pidfd_close(sel, pid)
+        reap({**info["herd"], **info["agents"]}, "connexion fermée")
+
+# Suivi de la mort d'un agent process (pidfd lisible à sa terminaison, même sans fin de connexion)
+def pidfd_watch(sel: selectors.BaseSelector, pid: int, role: str):
+    if pid in PIDFDS or not hasattr(os, "pidfd_open"):
         return
-    except Exception as e:
-        print("[env] socket accept error:", e, flush=True)
+    try:
+        fd = os.pidfd_open(pid)
+    except ProcessLookupError:
+        reap({pid: role}, "process absent")
         return
+    except OSError:
+        return  # noyau sans pidfd : la fin de connexion suffit
+    PIDFDS[pid] = fd
+    sel.register(fd, selectors.EVENT_READ, data=("pidfd", pid, role))
 
-    try:
-        data = conn.recv(1024)
-        if not data:
-            return
+def pidfd_close(sel: selectors.BaseSelector, pid: int):
+    fd = PIDFDS.pop(pid, None)
+    if fd is not None:
+        sel.unregister(fd)
+        os.close(fd)
 
-        line = data.decode(errors="replace").strip()
-        conn.sendall(b"OK")
+def agent_exited(sel: selectors.BaseSelector, pid: int, role: str):
+    pidfd_close(sel, pid)
+    reap({pid: role}, "process terminé")
 
-        print(f"[env] SOCKET_JOIN | from={addr[0]}:{addr[1]} | {line}", flush=True)
+# Retire du monde, en une passe par index, des individus morts sans nettoyage : {pid: rôle}
+# Renvoie le nombre d'individus qui étaient encore inscrits (entrées périmées)
+def reap(entries: dict, why: str) -> int:
+    global reaped
+    stale = forget(entries)
+    reaped += stale
+    if stale:
+        log.info("Reaper : {stale} individu(s) retiré(s) du monde ({why})", stale=stale, why=why)
+    return stale
 
-        CLIENTS.append(conn)  # garder la connexion ouverte
+# Retrait d'individus de tous les index, un verrou à la fois ; renvoie le nombre qui étaient encore inscrits
+def forget(entries: dict) -> int:
+    if not entries:
+        return 0
+    with huntable_lock:
+        for pid in entries:
+            huntable.discard(pid)
+            if grid is not None:
+                grid.remove(pid)
+            hunt_requests.pop(pid, None)
+            meals.pop(pid, None)
+    with repro_lock:
+        for pid in entries:
+            reproducible_preys.discard(pid)
+            reproducible_predators.discard(pid)
+            reproduced.pop(pid, None)
+    stale = 0
+    with census_lock:
+        for pid in entries:
+            if registry.remove(pid) is not None:
+                stale += 1
+        for role, key in COUNTERS.items():
+            world[key] = registry.count(role)
+    return stale
 
-    except Exception as e:
-        print("[env] join socket error:", e, flush=True)
-        conn.close()
+# Injection en masse (SPAWN) : lots d'au plus SPAWN_CHUNK naissances confiés au spawner, le suivant dès que
+# le précédent est relevé (spawn_collect)
+def spawn_step():
+    for role, job in spawn_jobs.items():
+        n = min(SPAWN_CHUNK, job["total"] - job["done"])
+        if n > 0 and not job["pending"]:
+            job["pending"] = n
+            spawner.submit(role, n, "spawn")
 
-# Lecture non bloquante de toutes les connexions clients
-def socket_read_all():
-    dead_conns = []
+# Lots terminés par le spawner, relevés à chaque tour de boucle (la boucle n'attend jamais un worker) :
+# naissances par reproduction journalisées, progression des SPAWN affichée par dixième
+def spawn_collect():
+    for role, tag, pids, latency in spawner.completed():
+        if tag == "birth":
+            births_done(role, pids, latency)
+            continue
+        job = spawn_jobs[role]
+        step = job["done"] * 10 // job["total"]
+        job["done"] += job["pending"]
+        job["pending"] = 0
+        job["failed"] += pids.count(None)
+        if job["done"] * 10 // job["total"] > step:  # progression par dixième
+            log.info("SPAWN {role} : {done}/{total} lancés ({failed} échec(s))", role=role, done=job["done"],
+                     total=job["total"], failed=job["failed"])
+        if job["done"] == job["total"]:
+            log.info("SPAWN {role} terminé : {n} individus en {s:.1f}s", role=role, n=job["total"],
+                     s=time.monotonic() - job["started"])
+            spawn_jobs[role] = new_spawn_job()
 
-    for conn in CLIENTS:
-        conn.settimeout(0.0)        # lecture non bloquante
+# Retrait en masse (CULL) : n individus du rôle tirés au hasard, retirés du monde puis arrêtés
+# (STOP pour un process, CULL pour un individu de herd), une seule écriture par connexion
+def cull(role: str, n: int):
+    with census_lock:
+        members = registry.members(role)
+    victims = random.sample(members, min(n, len(members)))
+    forget({pid: role for pid, _ in victims})
+    by_fd = {c.fileno(): c for c in CLIENTS}
+    frames = {}
+    for pid, fd in victims:
+        conn = by_fd.get(fd)
+        if conn is None:
+            restored.pop(pid, None)  # individu du checkpoint pas encore rattaché : rien à prévenir
+        elif pid >= VIRTUAL_ID_BASE:
+            VIRTUAL.pop(pid, None)
+            CLIENTS[conn]["herd"].pop(pid, None)
+            frames.setdefault(conn, []).append(encode_cull(pid))
+        else:
+            frames.setdefault(conn, []).append(encode_stop())
+    for conn, parts in frames.items():
+        socket_send(conn, b"".join(parts))
+    culled[role] += len(victims)
+    log.info("CULL {role} : {n} individu(s) arrêté(s) sur {asked} demandé(s), {conns} connexion(s) prévenue(s)",
+             role=role, n=len(victims), asked=n, conns=len(frames))
+
+# Audit : PIDs des index qui n'appartiennent à aucun agent connecté (ni restauré en attente)
+def reap_unowned():
+    owned = set(VIRTUAL) | set(restored)
+    for info in CLIENTS.values():
+        owned.update(info["agents"])
+    entries = {}
+    with census_lock:
+        entries.update((pid, role) for pid, role in registry.entries().items() if pid not in owned)
+    with huntable_lock:
+        entries.update((pid, "PREY") for pid in huntable if pid not in owned and pid not in entries)
+    with repro_lock:
+        entries.update((pid, "PREY") for pid in reproducible_preys if pid not in owned and pid not in entries)
+        entries.update((pid, "PREDATOR") for pid in reproducible_predators if pid not in owned and pid not in entries)
+    reap(entries, "audit des index")
+
+# Envoi non bloquant : ce qui ne part pas tout de suite attend dans la file de sortie du client
+def socket_send(conn: socket.socket, data: bytes):
+    info = CLIENTS.get(conn)
+    if info is None:
+        return
+    out = info["out"]
+    if not out:
         try:
-            data = conn.recv(1024)
+            data = data[conn.send(data):]
+        except BlockingIOError:
+            pass
         except OSError:
+            return  # connexion cassée : fermée à la prochaine lecture
+    if data:
+        out += data
+        pending_out.add(conn)
+
+# Vide autant que possible les files de sortie (appelé à chaque tour de boucle)
+def socket_flush_out():
+    for conn in list(pending_out):
+        out = CLIENTS[conn]["out"]
+        try:
+            del out[:conn.send(out)]
+        except BlockingIOError:
+            continue
+        except OSError:
+            out.clear()
+        if not out:
+            pending_out.discard(conn)
+
+# Horloge virtuelle : numéro du tick envoyé à tous les clients, renvoie les clients qui l'ont reçu
+def socket_broadcast_tick() -> set:
+    global ticks_skipped
+    frame = encode_tick(tick)
+    sent = set()
+    for conn, info in CLIENTS.items():
+        if not info["joined"]:
+            continue  # le premier message reçu par un agent est son ACK
+        if len(info["out"]) > OUT_LIMIT:
+            ticks_skipped += 1
             continue
-        if not data:               # client déconnecté
-            dead_conns.append(conn)
+        socket_send(conn, frame)
+        sent.add(conn)
+    return sent
+
+# Lockstep : le tick diffusé est fermé quand tous les clients ont répondu, ou à l'échéance
+def barrier_check(now: float):
+    global barrier_opened_at, stragglers, straggler_ticks
+    if barrier and now < barrier_opened_at + tick_deadline:
+        return
+    barrier_waits.append(now - barrier_opened_at)
+    barrier_opened_at = 0.0
+    if barrier:
+        stragglers += len(barrier)
+        straggler_ticks += 1
+        log.warning("Tick {tick} fermé à l'échéance : {late} client(s) en retard (port {ports})", tick=tick,
+                    late=len(barrier), ports=", ".join(str(CLIENTS[c]["addr"][1]) for c in barrier))
+        barrier.clear()
+
+# Diffuse les trames de contrôle en attente à tous les clients inscrits (jamais abandonnées, même client lent)
+def socket_flush_controls():
+    while pending_controls:
+        frame = pending_controls.popleft()
+        for conn, info in CLIENTS.items():
+            if info["joined"]:
+                socket_send(conn, frame)
+
+# Prévient les herds dont un individu a été mangé
+def socket_flush_kills():
+    while pending_kills:
+        vid = pending_kills.popleft()
+        conn = VIRTUAL.pop(vid, None)
+        if conn is None:
             continue
-        msg = data.decode().strip()
-        if msg:
-            print(f"[env] {msg}")
-        conn.settimeout(None)
+        CLIENTS[conn]["herd"].pop(vid, None)
+        socket_send(conn, encode_kill(vid))
+
+# Individus de herd partis d'eux-mêmes : détachés de leur herd
+def socket_flush_leaves():
+    while pending_leaves:
+        vid = pending_leaves.popleft()
+        conn = VIRTUAL.pop(vid, None)
+        if conn in CLIENTS:
+            CLIENTS[conn]["herd"].pop(vid, None)
 
-    for conn in dead_conns:
-        CLIENTS.remove(conn)
-        conn.close()
+# Traite une trame d'un client
+def socket_handle_frame(sel: selectors.BaseSelector, conn: socket.socket, mtype: int, fields):
+    global next_virtual_id
+
+    if mtype == MSG_JOIN:
+        addr = CLIENTS[conn]["addr"]
+        role_code, flags, pid = fields
+        role = ROLES.get(role_code)
+        if role is None:
+            socket_send(conn, encode_ack(pid, ACK_REFUSED))
+            return
+        if flags & JOIN_HERD:
+            if not flags & JOIN_REATTACH:  # individu de herd : env attribue un id virtuel
+                pid = next_virtual_id
+                next_virtual_id += 1
+            elif pid < VIRTUAL_ID_BASE or VIRTUAL.get(pid, conn) is not conn:
+                socket_send(conn, encode_ack(pid, ACK_REFUSED))  # id virtuel invalide ou déjà attribué
+                return
+            else:  # rattachement : garde son id virtuel
+                next_virtual_id = max(next_virtual_id, pid + 1)
+            VIRTUAL[pid] = conn
+            CLIENTS[conn]["herd"][pid] = role
+        else:  # agent process : suivi de sa mort par pidfd
+            CLIENTS[conn]["agents"][pid] = role
+            pidfd_watch(sel, pid, role)
+        with census_lock:
+            registry.bind(pid, conn.fileno())
+        # pid restauré depuis le checkpoint : déjà inscrit dans le monde
+        status = ACK_OK
+        if flags & JOIN_REATTACH and restored.get(pid) == role:
+            del restored[pid]
+            status = ACK_REATTACHED
+        socket_send(conn, encode_ack(pid, status, (ACK_CLOCK if virtual_clock else 0) | (ACK_LOCKSTEP if lockstep else 0)))
+        if not CLIENTS[conn]["joined"] and world["pause"] == 1:
+            socket_send(conn, encode_control(CTRL_PAUSE))  # arrivée pendant une pause
+        CLIENTS[conn]["joined"] = True
+        join_times.append(time.monotonic())
+        if journal is not None:
+            journal.write(EV_JOIN, role_code, a=pid)
+        log.info("SOCKET_JOIN | from={host}:{port} | JOIN {role} {id}{herd}{reattached}", host=addr[0], port=addr[1],
+                 role=role, id=pid, herd=" (herd)" if flags & JOIN_HERD else "",
+                 reattached=" (rattaché)" if status == ACK_REATTACHED else "")
+
+    elif mtype == MSG_DONE:
+        if fields[0] == tick:  # réponse tardive à un tick déjà fermé : ignorée
+            barrier.discard(conn)
+
+    elif mtype == MSG_DEATH:
+        role_code, pid, reason = fields
+        if journal is not None:
+            journal.write(EV_DEATH, role_code, code=reason, a=pid)
+        if ROLES.get(role_code) == "PREY":
+            log.info("PROIE {id} est MORTE, raison : {reason}", id=pid, reason=REASON_TEXT.get(reason, reason), code=reason)
+        else:
+            log.info("PREDATEUR {id} est MORT, raison : {reason}", id=pid, reason=REASON_TEXT.get(reason, reason),
+                     code=reason)
+
+# Lecture d'une connexion client signalée lisible par le selector
+def socket_read(sel: selectors.BaseSelector, conn: socket.socket):
+    try:
+        data = conn.recv(4096)
+    except BlockingIOError:
+        return
+    except OSError:
+        data = b""
+    if not data:               # client déconnecté
+        socket_drop(sel, conn)
+        return
+
+    # plusieurs trames peuvent arriver dans un même recv, ou une trame en plusieurs
+    try:
+        frames = CLIENTS[conn]["decoder"].feed(data)
+    except ProtocolError as e:
+        log.warning("trame invalide ({error}), connexion fermée", error=e)
+        socket_drop(sel, conn)
+        return
+    for mtype, fields in frames:
+        socket_handle_frame(sel, conn, mtype, fields)
 
 # Close toutes les sockets clients proprement
 def stop_everyone():
+    stop = encode_stop()
     for conn in CLIENTS:
-        try:
-            conn.sendall(b"STOP\n")
-        except Exception:
-            pass
+        socket_send(conn, stop)
+    socket_flush_out()
     time.sleep(1) # sinon socket se ferme avant que prey/predator reçoivent STOP
+    socket_flush_out()
+
 
+# Déclenchement d'une sécheresse (appelé avec grass_lock tenu), renvoie True si elle commence
+def start_drought() -> bool:
+    if world["drought"] != 0:
+        return False
+    world["drought"] = 1
+    world["drought_duration"] = DROUGHT_DURATION
+    if grass_field is not None:
+        grass_field.start_drought()  # une zone du monde seulement
+    return True
+
+# Annonce d'une sécheresse (après avoir relâché grass_lock)
+def drought_started():
+    pending_controls.append(encode_control(CTRL_DROUGHT_ON, DROUGHT_DURATION))
+    log.info("Sécheresse déclenchée | durée : {duration}{unit}", duration=DROUGHT_DURATION,
+             unit=" ticks" if virtual_clock else "s")
+    if journal is not None:
+        journal.write(EV_DROUGHT_START, value=DROUGHT_DURATION)
 
 # Appel de la sécheresse périodique
 def drought_call():
-    global drought_timer
+    global drought_timer, drought_next_at
 
-    world_lock.acquire()
-    try:
-        if world["quit"] == 1:
-            return
-
-        if world["drought"] == 0:
-            world["drought"] = 1
-            world["drought_duration"] = DROUGHT_DURATION
-            print(f"[env] Sécheresse déclenchée | durée : {DROUGHT_DURATION}s", flush=True)
-    finally:
-        world_lock.release()
+    if world["quit"] == 1:
+        return
+    with grass_lock:
+        started = start_drought()
+    if started:
+        drought_started()
     # reprogrammation → périodique
+    drought_next_at = time.monotonic() + DROUGHT_PERIOD
     drought_timer = threading.Timer(DROUGHT_PERIOD, drought_call)
     drought_timer.daemon = True
     drought_timer.start()
 
+# Règles sécheresse/herbe d'un tick (partagées avec le moteur headless), renvoie True si la sécheresse se termine
+def grass_tick(w, field=None) -> bool:
+    # Gestion de la sécheresse
+    drought_ended = False
+    if w["drought"] == 1:  # Si la sécheresse est activée
+        if w["drought_duration"] > 0:
+            w["drought_duration"] -= 1  # Décrémente la durée restante
+        else:
+            w["drought"] = 0
+            if field is not None:
+                field.end_drought()
+            drought_ended = True
+
+    # Herbe par cellule : pousse vectorisée hors zones de sécheresse, grass_unity = total
+    if field is not None:
+        if w["pause"] == 0:
+            field.set_plant(w["grass_plant"])
+            field.grow(w["grass_growth"])
+            w["grass_unity"] = field.total()
+        return drought_ended
+
+    if w["drought"] == 0 and w["pause"] == 0:
+        # Calcul de la croissance totale basée sur le nombre de plants
+        growth_increment = (w["grass_plant"] - int(w["grass_unity"])) * w["grass_growth"]
+
+        # Si l'herbe actuelle est inférieure à la cible
+        if w["grass_unity"] < w["grass_plant"]:
+            # Ajouter la croissance à l'herbe actuelle
+            w["grass_unity"] += growth_increment
+
+            # Si l'herbe dépasse la quantité cible, on réajuste pour ne pas dépasser
+            if w["grass_unity"] > w["grass_plant"]:
+                w["grass_unity"] = w["grass_plant"]
+    return drought_ended
+
 # Simulation tick :
 def simulation_tick():
-    world_lock.acquire()
+    global tick
+    tick += 1
+    started = False
+    grass_lock.acquire()
     try:
-        # Gestion de la sécheresse
-        if world["drought"] == 1:  # Si la sécheresse est activée
-            if world["drought_duration"] > 0:
-                world["drought_duration"] -= 1  # Décrémente la durée restante
-            else:
-                world["drought"] = 0
-                print("[env] Sécheresse terminée", flush=True)
+        if virtual_clock and tick % DROUGHT_PERIOD == 0:  # sécheresse périodique comptée en ticks
+            started = start_drought()
+        drought_ended = grass_tick(world, grass_field)
+    finally:
+        grass_lock.release()
+    if started:
+        drought_started()
+    if drought_ended:
+        pending_controls.append(encode_control(CTRL_DROUGHT_OFF))
+        log.info("Sécheresse terminée")
+    hunt_step()
+    if journal is not None:
+        if drought_ended:
+            journal.write(EV_DROUGHT_END)
+        journal.tick = tick
+        journal.flush()  # enregistrements du tick écrits sur disque
 
-        if world["drought"] == 0 and world["pause"] == 0:
-            # Calcul de la croissance totale basée sur le nombre de plants
-            growth_increment = (world["grass_plant"] - int(world["grass_unity"])) * world["grass_growth"]
+    # Couples formés sous verrou, naissances du tick confiées au spawner en un lot par rôle (sans attente : le
+    # tick, et la barrière lockstep, ne comptent pas le démarrage des process)
+    for role, (candidates, pairs) in reproduction_step().items():
+        if pairs:
+            log.info("Reproduction des {name} : {pairs} couple(s) parmi {n} individus reproductibles",
+                     name="proies" if role == "PREY" else "prédateurs", pairs=pairs, n=candidates)
+            spawner.submit(role, pairs, "birth")
 
-            # Si l'herbe actuelle est inférieure à la cible
-            if world["grass_unity"] < world["grass_plant"]:
-                # Ajouter la croissance à l'herbe actuelle
-                world["grass_unity"] += growth_increment
+# Appariement des reproductibles : floor(n/2) couples par rôle, au plus birth_cap naissances par tick réparties
+# à tour de rôle entre proies et prédateurs. Les parents quittent la liste et ne peuvent plus y revenir avant
+# la fin de leur cooldown ; les individus sans partenaire (ou reportés par le plafond) restent candidats.
+# Renvoie {rôle: (candidats, couples retenus)}
+def reproduction_step() -> dict:
+    lists = {"PREY": (reproducible_preys, PREY_REPRO_COOLDOWN),
+             "PREDATOR": (reproducible_predators, PRED_REPRO_COOLDOWN)}
+    out = {}
+    with repro_lock:
+        for pid in [pid for pid, end in reproduced.items() if end <= tick]:
+            del reproduced[pid]
+        possible = {role: len(candidates) // 2 for role, (candidates, _) in lists.items()}
+        allowed = {role: 0 for role in lists}
+        budget = birth_cap
+        while budget > 0 and any(allowed[role] < possible[role] for role in lists):
+            for role in lists:
+                if budget > 0 and allowed[role] < possible[role]:
+                    allowed[role] += 1
+                    budget -= 1
+        for role, (candidates, window) in lists.items():
+            out[role] = (len(candidates), allowed[role])
+            if allowed[role] == 0:
+                continue
+            parents = random.sample(candidates.items, 2 * allowed[role])
+            for pid in parents:
+                candidates.discard(pid)
+                reproduced[pid] = tick + window
+    repro_stats["pairs"] += sum(allowed.values())
+    repro_stats["capped_couple_ticks"] += sum(possible.values()) - sum(allowed.values())
+    return out
 
-                # Si l'herbe dépasse la quantité cible, on réajuste pour ne pas dépasser
-                if world["grass_unity"] > world["grass_plant"]:
-                    world["grass_unity"] = world["grass_plant"]
-    finally:
-        world_lock.release()
+# Chasses du tick appariées en un lot : demandes relevées et proies retirées des chassables sous huntable_lock,
+# proies mangées retirées du registre puis des listes de reproduction, tuées hors verrou
+def hunt_step():
+    with huntable_lock:
+        requests = dict(hunt_requests)
+        hunt_requests.clear()
+    hunt_stats["rounds"] += 1
+    hunt_stats["requests"] += len(requests)
+    if not requests:
+        return
+    with census_lock:  # prédateurs partis depuis leur demande : pas d'appariement
+        requests = {predator: xy for predator, xy in requests.items() if predator in registry}
+    with huntable_lock:
+        pairs = hunt_policy(requests, huntable, grid) if requests else []
+    if not pairs:
+        return
+    # proie encore inscrite (sinon partie entre-temps) et prédateur toujours là
+    with census_lock:
+        eaten, orphans = [], []
+        for predator, prey in pairs:
+            if predator not in registry:
+                if prey in registry:
+                    orphans.append((predator, prey))
+            elif registry.remove(prey):
+                eaten.append((predator, prey))
+        world["preys"] = registry.count("PREY")
+    with repro_lock:
+        for _, prey in eaten:
+            reproducible_preys.discard(prey)
+    with huntable_lock:
+        meals.update(eaten)
+        # prédateur parti entre le filtre et l'appariement : sa proie redevient chassable (monde 2D : placée à la
+        # position de la demande, dans son voisinage, jusqu'à son prochain rapport)
+        for predator, prey in orphans:
+            huntable.add(prey)
+            if grid is not None:
+                grid.place(prey, *requests[predator])
+    hunt_stats["matches"] += len(eaten)
+    for predator, prey in eaten:
+        kill_prey(prey)
+        if journal is not None:
+            journal.write(EV_MEAL, ROLE_CODES["PREDATOR"], a=predator, b=prey)
+    log.debug("Chasse : {matches} proie(s) attribuée(s) pour {requests} demande(s)", matches=len(eaten),
+              requests=len(requests))
 
-    # Reproduction des proies
-    if len(reproducible_preys) >= 2:
-        print(f"[env] Reproduction des proies possible, individus reproductibles : {len(reproducible_preys)}", flush=True)
-        # Création d'une nouvelle proie
-        try:
-            subprocess.Popen(["cmd.exe", "/c", "start", "wsl", "--cd", "/home/maksim_npl/PPC_project", sys.executable, "prey.py"], cwd="/mnt/c")
-            print(f"[env] Une nouvelle proie est née !", flush=True)
-            reproducible_preys.clear()  # Réinitialiser la liste après reproduction
-        except Exception as e:
-            print(f"[env] Erreur lors de la création d'une nouvelle proie : {e}", flush=True)
-    
-    # Reproduction des prédateurs
-    if len(reproducible_predators) >= 2:
-        print(f"[env] Reproduction des prédateurs possible, individus reproductibles : {len(reproducible_predators)}", flush=True)
-        # Création d'un nouveau prédateur
+# Naissances par reproduction d'un lot terminé par le spawner (worker pré-chargé)
+def births_done(role: str, pids: list, latency: float):
+    name = "proie" if role == "PREY" else "prédateur"
+    latency_ms = latency * 1000
+    for pid in pids:
+        if pid is None:
+            log.error("Erreur lors de la création d'un(e) {name} | échecs={failures}", name=name,
+                      failures=spawner.failures)
+        else:
+            log.info("Naissance d'un(e) {name} | pid={id} | latence={latency_ms:.1f} ms", name=name, id=pid,
+                     latency_ms=latency_ms)
+        if journal is not None:
+            journal.write(EV_BIRTH, ROLE_CODES[role], code=0 if pid else 1, a=pid or 0, value=latency_ms / 1000)
+
+# Checkpoint : monde, ensembles de PIDs, phase de la sécheresse et tick
+# Chaque partie est copiée sous son verrou (l'une après l'autre), le fichier est écrit hors verrou.
+def write_checkpoint(path: str):
+    state = {
+        "tick": tick,
+        "drought_in": max(0.0, drought_next_at - time.monotonic()),
+        "next_virtual_id": next_virtual_id,
+    }
+    state["world"] = dict(world_snapshot(), quit=0)
+    with census_lock:
+        state["alive_preys"] = registry.pids("PREY")
+        state["alive_predators"] = registry.pids("PREDATOR")
+        state["positions"] = registry.positions()
+    with huntable_lock:
+        state["huntable"] = list(huntable)
+    with repro_lock:
+        state["reproducible_preys"] = list(reproducible_preys)
+        state["reproducible_predators"] = list(reproducible_predators)
+        state["reproduced"] = dict(reproduced)
+    try:
+        save_checkpoint(path, state)
+    except OSError as e:
+        log.error("Checkpoint impossible ({path}) : {error}", path=path, error=e)
+
+# Redémarrage à chaud : recharge le checkpoint, les individus survivants se rattachent par pid
+# Renvoie le délai avant la prochaine sécheresse
+def restore_checkpoint(path: str) -> float:
+    global tick, next_virtual_id
+    state = load_checkpoint(path)
+    for key, value in state["world"].items():
+        world[key] = value
+    world["quit"] = 0
+    for pid in state["alive_preys"]:
+        registry.add(pid, "PREY")
+        restored[pid] = "PREY"
+    for pid in state["alive_predators"]:
+        registry.add(pid, "PREDATOR")
+        restored[pid] = "PREDATOR"
+    for name, pids in (("huntable", huntable), ("reproducible_preys", reproducible_preys),
+                       ("reproducible_predators", reproducible_predators)):
+        for pid in state[name]:
+            pids.add(pid)
+    reproduced.update(state["reproduced"])  # parents encore dans leur fenêtre de cooldown
+    for pid, (x, y) in state["positions"].items():
+        registry.place(pid, x, y)
+        if grid is not None and pid in huntable:  # proies chassables de nouveau dans l'index spatial
+            grid.place(pid, x, y)
+    for role, key in COUNTERS.items():
+        world[key] = registry.count(role)
+    tick = state["tick"]
+    next_virtual_id = max(next_virtual_id, state["next_virtual_id"])
+    age = time.time() - state["saved_at"]
+    log.info("Checkpoint {path} restauré (sauvegardé il y a {age:.1f}s) | tick={tick} | proies={preys} | "
+             "prédateurs={predators}", path=path, age=age, tick=tick, preys=registry.count("PREY"),
+             predators=registry.count("PREDATOR"))
+    return state["drought_in"]
+
+# Fin du délai de rattachement : les individus restaurés absents sont retirés du monde
+def purge_unattached():
+    entries = dict(restored)
+    restored.clear()
+    reap(entries, "checkpoint, non rattachés")
+
+# Après une restauration : les process du checkpoint qui n'existent plus n'attendent pas le délai de rattachement
+def reap_dead_restored():
+    dead = {}
+    for pid, role in restored.items():
+        if pid >= VIRTUAL_ID_BASE:
+            continue  # individu de herd : seul son herd peut le rattacher
         try:
-            subprocess.Popen(["cmd.exe", "/c", "start", "wsl", "--cd", "/home/maksim_npl/PPC_project", sys.executable, "predator.py"], cwd="/mnt/c")
-            print(f"[env] Un nouveau prédateur est né !", flush=True)
-            reproducible_predators.clear()  # Réinitialiser la liste après reproduction
-        except Exception as e:
-            print(f"[env] Erreur lors de la création d'un nouveau prédateur : {e}", flush=True)
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            dead[pid] = role
+        except PermissionError:
+            pass  # pid réutilisé par un autre utilisateur : attendre le délai
+    for pid in dead:
+        del restored[pid]
+    reap(dead, "checkpoint, process absent")
+
+# Compteurs cumulés d'env relevés au début et à la fin d'une fenêtre de profilage (écart écrit dans le rapport) :
+# ticks, appels reçus par le service (proxys des agents) et temps d'attente / de détention de chaque verrou
+def profile_counters() -> dict:
+    locks = {lock.name: lock.stats() for lock in LOCKS}
+    return {
+        "ticks": len(tick_times),
+        "rpc": dict(service.calls, round_trips=service.round_trips(), batches=service.batches),
+        "locks": {name: {key: st[key] for key in ("acquisitions", "contended", "wait_total_s", "hold_total_s")}
+                  for name, st in locks.items()},
+    }
+
+profiler = Sampler("env", log, snapshot=profile_counters)
+
+# Rapport de contention : activité de chaque verrou depuis le rapport précédent
+def report_locks(previous: dict) -> dict:
+    current = {lock.name: lock.stats() for lock in LOCKS}
+    parts = []
+    for name, st in current.items():
+        d = stats_since(st, previous[name]) if name in previous else st
+        contended = 100.0 * d["contended"] / d["acquisitions"] if d["acquisitions"] else 0.0
+        parts.append(f"{name}: {d['acquisitions']} acq, contention {contended:.1f}%, "
+                     f"attente moy={d['wait_mean_s'] * 1e6:.1f} µs max={d['wait_max_s'] * 1000:.2f} ms, "
+                     f"détention moy={d['hold_mean_s'] * 1e6:.1f} µs")
+    log.info("Verrous | {locks}", locks=" | ".join(parts))
+    return current
+
+# Moyenne, écart type, min, max et 99e centile d'une série de mesures
+def distribution(values: list) -> dict:
+    if not values:
+        return {"count": 0, "mean": 0.0, "stdev": 0.0, "min": 0.0, "max": 0.0, "p99": 0.0}
+    n = len(values)
+    mean = sum(values) / n
+    ordered = sorted(values)
+    return {
+        "count": n,
+        "mean": mean,
+        "stdev": (sum((v - mean) ** 2 for v in values) / n) ** 0.5,
+        "min": ordered[0],
+        "max": ordered[-1],
+        "p99": ordered[min(n - 1, int(n * 0.99))],
+    }
+
+# Mesures de l'exécution (tick, verrou, RPC, joins, CPU), écrites en JSON par --stats
+def collect_stats(started: float, cpu_started: float) -> dict:
+    elapsed = time.monotonic() - started
+    intervals = [b - a for a, b in zip(tick_times, tick_times[1:])]
+    cpu_deltas = [b - a for a, b in zip(tick_cpu, tick_cpu[1:])]
+    ticks = len(tick_times)
+    join_span = join_times[-1] - join_times[0] if len(join_times) > 1 else 0.0
+    with census_lock:
+        population = registry.summary()
+    return {
+        "elapsed_s": elapsed,
+        "ticks": ticks,
+        "tick_period_s": tick_period,
+        "tick_interval_s": distribution(intervals),
+        "tick_jitter_s": distribution([abs(i - tick_period) for i in intervals]),
+        "ticks_skipped": ticks_skipped,
+        "lockstep": {
+            "barrier_s": distribution(barrier_waits),
+            "stragglers": stragglers,
+            "straggler_ticks": straggler_ticks,
+        },
+        "cpu_total_s": time.process_time() - cpu_started,
+        "cpu_per_tick_s": distribution(cpu_deltas),
+        "locks": {lock.name: lock.stats() for lock in LOCKS},
+        "rpc": {
+            "round_trips": service.round_trips(),
+            "ops": service.ops,
+            "batches": service.batches,
+            "calls": dict(service.calls),
+            "round_trips_per_s": service.round_trips() / elapsed if elapsed else 0.0,
+            "ops_per_s": service.ops / elapsed if elapsed else 0.0,
+        },
+        "joins": {
+            "count": len(join_times),
+            "span_s": join_span,
+            "per_s": (len(join_times) - 1) / join_span if join_span else 0.0,
+        },
+        "births": spawner.births,
+        "birth_failures": spawner.failures,
+        "state_dropped": state_dropped,
+        "reaped": reaped,
+        "culled": culled,
+        "reproduction": dict(repro_stats, birth_cap=birth_cap),
+        "hunting": dict(hunt_stats, policy=hunt_policy.__name__.removeprefix("match_")),
+        "population": population,
+    }
+
+# Arguments de la ligne de commande
+def parse_args():
+    parser = argparse.ArgumentParser(description="Environnement de la simulation Circle of Life")
+    parser.add_argument("--headless", action="store_true",
+                        help="moteur vectorisé en un seul process (pas de sockets, MQ ni display)")
+    parser.add_argument("--preys", type=int, default=1000, help="proies initiales (mode headless)")
+    parser.add_argument("--predators", type=int, default=100, help="prédateurs initiaux (mode headless)")
+    parser.add_argument("--ticks", type=int, default=100, help="nombre de ticks simulés (mode headless)")
+    parser.add_argument("--seed", type=int, default=None, help="graine aléatoire (mode headless)")
+    parser.add_argument("--report-every", type=int, default=10, help="ticks entre deux affichages (mode headless)")
+    parser.add_argument("--spawn-pool", type=int, default=2,
+                        help="workers pré-chargés par rôle pour les naissances")
+    parser.add_argument("--shm", action="store_true",
+                        help="world en mémoire partagée (seqlock) au lieu d'un dict : état lu sans verrou par display")
+    parser.add_argument("--stats", default=None, metavar="FICHIER",
+                        help="écrit les mesures de l'exécution (JSON) à l'arrêt (utilisé par bench.py)")
+    parser.add_argument("--journal", default=None, metavar="FICHIER",
+                        help="journal binaire des événements (lecture : python3 journal.py FICHIER)")
+    parser.add_argument("--spatial", action="store_true",
+                        help="monde 2D : les prédateurs ne chassent que les proies des cellules voisines")
+    parser.add_argument("--birth-cap", type=int, default=BIRTH_CAP, metavar="N",
+                        help="naissances max par tick (couples au-delà reportés au tick suivant)")
+    parser.add_argument("--hunt-policy", choices=list(HUNT_POLICIES), default=None,
+                        help="appariement des chasses de chaque tick (défaut : nearest avec --spatial, sinon random)")
+    parser.add_argument("--grass-grid", type=int, default=0, metavar="N",
+                        help="herbe par cellule sur une grille N x N (grass_plant = capacité d'une cellule)")
+    parser.add_argument("--clock", action="store_true",
+                        help="horloge virtuelle : env diffuse les ticks, agents et sécheresse avancent en ticks")
+    parser.add_argument("--tick-period", type=float, default=TICK_PERIOD,
+                        help="durée réelle d'un tick en secondes (avec --clock, 0 = aussi vite que possible)")
+    parser.add_argument("--lockstep", action="store_true",
+                        help="horloge virtuelle en lockstep : chaque tick attend la réponse DONE de tous les clients")
+    parser.add_argument("--tick-deadline", type=float, default=1.0, metavar="SECONDES",
+                        help="échéance d'un tick lockstep, les clients qui n'ont pas répondu sont comptés en retard")
+    parser.add_argument("--lock-report", type=float, default=LOCK_REPORT_PERIOD, metavar="SECONDES",
+                        help="période du rapport de contention des verrous (0 = désactivé)")
+    parser.add_argument("--checkpoint", default=None, metavar="FICHIER",
+                        help="sauvegarde périodique de l'état du monde dans ce fichier")
+    parser.add_argument("--checkpoint-every", type=int, default=10, help="ticks entre deux checkpoints")
+    parser.add_argument("--restore", default=None, metavar="FICHIER",
+                        help="redémarrage à chaud depuis un checkpoint (les agents survivants se rattachent)")
+    parser.add_argument("--log-level", choices=list(simlog.LEVELS), default=None,
+                        help="niveau des messages d'env et des individus nés (défaut : PPC_LOG_LEVEL ou info)")
+    parser.add_argument("--profile-dir", default=None, metavar="DOSSIER",
+                        help="rapports de la commande PROFILE (défaut : PPC_PROFILE_DIR ou ./profiles)")
+    return parser.parse_args()
 
 # Main :
 def main():
-    global drought_timer
+    global drought_timer, drought_next_at, world, spawner, journal, grid, grass_field, hunt_policy, birth_cap
+    global virtual_clock, tick_period, lockstep, tick_deadline, barrier_opened_at
+
+    args = parse_args()
+    if args.log_level:
+        simlog.set_level(args.log_level)
+        os.environ["PPC_LOG_LEVEL"] = args.log_level  # hérité par les workers du spawner
+    if args.profile_dir:
+        os.environ["PPC_PROFILE_DIR"] = args.profile_dir
+    if args.headless:
+        from engine import run_headless
+        run_headless(args.preys, args.predators, args.ticks, seed=args.seed, report_every=args.report_every,
+                     params={"birth_cap": max(0, args.birth_cap)})
+        return
+
+    # Backend mémoire partagée : world remplacé avant de démarrer le manager, lu par display sans passer par la MQ
+    if args.shm:
+        try:
+            world = SharedWorld.create(segment_name(MQ_KEY), world)
+        except FileExistsError:
+            log.error("Segment {name} déjà utilisé : un autre env tourne avec PPC_MQ_KEY={key}",
+                      name=segment_name(MQ_KEY), key=MQ_KEY)
+            sys.exit(1)
+
+    virtual_clock = args.clock or args.lockstep
+    lockstep = args.lockstep
+    tick_deadline = max(0.0, args.tick_deadline)
+    tick_period = max(0.0, args.tick_period)
+    if args.journal:
+        journal = JournalWriter(args.journal)
+    if args.spatial:
+        grid = SpatialGrid()
+    policy = args.hunt_policy or ("nearest" if args.spatial else "random")
+    if policy in HUNT_SPATIAL_ONLY and grid is None:
+        log.error("La politique de chasse {policy} demande --spatial", policy=policy)
+        sys.exit(1)
+    hunt_policy = HUNT_POLICIES[policy]
+    birth_cap = max(0, args.birth_cap)
+
+    drought_in = DROUGHT_PERIOD
+    if args.restore:
+        try:
+            drought_in = restore_checkpoint(args.restore)
+        except (OSError, ValueError) as e:
+            log.error("Impossible de restaurer le checkpoint : {error}", error=e)
+            sys.exit(1)
+        if journal is not None:
+            journal.tick = tick
+        reap_dead_restored()
+    if args.grass_grid > 0:
+        from grass import GrassField
+        grass_field = GrassField(args.grass_grid, world["grass_plant"])
+        grass_field.fill(world["grass_unity"])  # herbe restaurée répartie uniformément
+
+    # workers pré-chargés pour les naissances (avant les threads du manager)
+    # pool au moins égal au plafond de naissances : un tick plein ne démarre aucun worker à froid
+    spawner = Spawner(pool_size=max(args.spawn_pool, birth_cap))
 
     # Message Queue avec display
     mq = sysv_ipc.MessageQueue(MQ_KEY, sysv_ipc.IPC_CREAT)
@@ -286,53 +1337,115 @@ def main():
     # mémoire partagée avec proies/prédateurs (remote manager) : serveur
     memoire_partagee_srv = WorldManager(address=(HOST, PORT_MANAGER), authkey=AUTHKEY)
     server = memoire_partagee_srv.get_server()
+    # file d'attente d'accept du manager (16 dans multiprocessing) agrandie : des centaines d'agents nés d'un SPAWN
+    # ou arrêtés ensemble s'y connectent en même temps, les connexions en trop resteraient bloquées à l'authentification.
+    # Attributs internes de CPython : s'ils changent, le manager garde la file par défaut
+    listen_socket = getattr(getattr(getattr(server, "listener", None), "_listener", None), "_socket", None)
+    if listen_socket is not None:
+        listen_socket.listen(MANAGER_BACKLOG)
+    else:
+        log.warning("File d'attente du manager non modifiable, valeur par défaut conservée")
 
     # serveur manager en thread daemon pour ne pas bloquer le tick de env
     memoire_partagee_thread = threading.Thread(target=server.serve_forever, daemon=True)
     memoire_partagee_thread.start()
 
-    print(
-        f"[env] READY | MQ (key={MQ_KEY}) | Socket={HOST}:{PORT_SOCKET} | RemoteManager={HOST}:{PORT_MANAGER}",
-        flush=True
+    log.info(
+        f"READY | MQ (key={MQ_KEY}) | Socket={HOST}:{PORT_SOCKET} | RemoteManager={HOST}:{PORT_MANAGER}"
+        f"{' | world=shared_memory' if args.shm else ''}"
+        f"{f' | monde 2D {grid.dim}x{grid.dim} cellules' if grid is not None else ''}"
+        f" | chasse {policy}"
+        f"{f' | herbe {grass_field.dim}x{grass_field.dim} cellules' if grass_field is not None else ''}"
+        f"{f' | horloge virtuelle ({tick_period}s/tick)' if virtual_clock else ''}"
+        f"{f' | lockstep (échéance {tick_deadline}s)' if lockstep else ''}"
     )
 
-    # sécheresse périodique
-    drought_timer = threading.Timer(DROUGHT_PERIOD, drought_call)
-    drought_timer.daemon = True
-    drought_timer.start()
+    # sécheresse périodique (reprend sa phase après une restauration), en ticks avec l'horloge virtuelle
+    drought_timer = None
+    if not virtual_clock:
+        drought_next_at = time.monotonic() + drought_in
+        drought_timer = threading.Timer(drought_in, drought_call)
+        drought_timer.daemon = True
+        drought_timer.start()
 
-    # Calcul temps initial
-    last_state = time.time()
+    # sockets surveillées (epoll sous Linux)
+    sel = selectors.DefaultSelector()
+    sel.register(server_socket, selectors.EVENT_READ, data="server")
+
+    # échéances du tick de simulation et de l'envoi d'état
+    next_tick = time.monotonic() + tick_period
+    next_state = time.monotonic()
+    started, cpu_started = time.monotonic(), time.process_time()
+    restore_deadline = started + RESTORE_GRACE
+    lock_report_at = started + args.lock_report
+    lock_previous = {}
+    reap_at = started + REAP_PERIOD
 
     try:
         while True:
+            # barrière lockstep ouverte : réveil à son échéance (ou dès qu'un DONE arrive) plutôt qu'au tick
+            wake = barrier_opened_at + tick_deadline if barrier_opened_at else next_tick
+            timeout = min(wake, next_state) - time.monotonic()
+            events = sel.select(max(0.0, min(timeout, MQ_POLL_PERIOD)))
+            for key, _ in events:
+                if key.data == "server":
+                    socket_accept_all(sel, server_socket)
+                elif key.data == "client":
+                    socket_read(sel, key.fileobj)
+                else:
+                    agent_exited(sel, *key.data[1:])
+            socket_flush_kills()
+            socket_flush_leaves()
             mq_poll_commands(mq)
+            spawn_collect()
+            spawn_step()
+            socket_flush_controls()
+            socket_flush_out()
 
-            world_lock.acquire()
-            try:
-                if world["quit"] == 1:
-                    break
-                paused = (world["pause"] == 1)
-            finally:
-                world_lock.release()
+            if world["quit"] == 1:
+                break
+            paused = (world["pause"] == 1)
+
+            now = time.monotonic()
+            if barrier_opened_at:
+                barrier_check(now)
+            if now >= next_tick and not barrier_opened_at:  # lockstep : tick précédent fermé
+                if not paused:
+                    simulation_tick()
+                    socket_flush_controls()  # sécheresse du tick annoncée avant le TICK
+                    if virtual_clock:
+                        sent = socket_broadcast_tick()
+                        if lockstep:
+                            barrier.update(sent)
+                            barrier_opened_at = now
+                tick_times.append(now)
+                tick_cpu.append(time.process_time())
+                if args.checkpoint and not paused and tick % args.checkpoint_every == 0:
+                    write_checkpoint(args.checkpoint)
+                next_tick += tick_period
+                if next_tick < now:  # tick en retard : on repart de maintenant plutôt que d'enchaîner les ticks
+                    next_tick = now + tick_period
 
-            socket_accept_one(server_socket)
-            socket_read_all()
+            if restored and now >= restore_deadline:
+                purge_unattached()
 
-            if not paused:
-                simulation_tick()
+            if now >= reap_at:
+                reap_unowned()
+                reap_at = now + REAP_PERIOD
 
-            now = time.time()
-            if now - last_state >= 0.5:
+            if now >= next_state:
                 mq_send_state(mq)
-                last_state = now
+                next_state = now + STATE_PERIOD
 
-            time.sleep(1)
+            if args.lock_report > 0 and now >= lock_report_at:
+                lock_previous = report_locks(lock_previous)
+                lock_report_at = now + args.lock_report
     except KeyboardInterrupt:
-        print("[env] Interrompu par l'utilisateur (ctrl+c)", flush=True)
+        log.info("Interrompu par l'utilisateur (ctrl+c)")
 
     finally:
-        print("[env] Fermeture de l'environnement...", flush=True)
+        stats = collect_stats(started, cpu_started)
+        log.info("Fermeture de l'environnement...")
         try:
             if drought_timer is not None:
                 drought_timer.cancel()
@@ -340,9 +1453,10 @@ def main():
             pass
         try:
             stop_everyone()
-            for c in CLIENTS:
+            for c in list(CLIENTS):
                 try: c.close()
                 except: pass
+            sel.close()
             server_socket.close()
         except Exception:
             pass
@@ -350,8 +1464,41 @@ def main():
             mq.remove()
         except Exception:
             pass
+        profiler.stop(wait=True)  # rapport d'une fenêtre encore ouverte
+        log.info("Spawner : {summary}", summary=spawner.summary())
+        pop = stats["population"]
+        log.info("Registre : proies={preys} (énergie moy={prey_energy:.1f}) | prédateurs={predators} "
+                 "(énergie moy={pred_energy:.1f}) | {kb:.1f} ko", preys=pop["PREY"]["count"],
+                 prey_energy=pop["PREY"]["energy_mean"], predators=pop["PREDATOR"]["count"],
+                 pred_energy=pop["PREDATOR"]["energy_mean"], kb=pop["bytes"] / 1024)
+        if state_dropped:
+            log.info("États non transmis au display (file pleine) : {n}", n=state_dropped)
+        if reaped:
+            log.info("Reaper : {n} individu(s) mort(s) sans nettoyage retiré(s) du monde", n=reaped)
+        if ticks_skipped:
+            log.info("TICK non envoyés (clients trop lents) : {n}", n=ticks_skipped)
+        if lockstep:
+            waits = distribution(barrier_waits)
+            log.info("Lockstep : {count} ticks | barrière moy={mean_ms:.1f} ms max={max_ms:.1f} ms | {late_ticks} tick(s) "
+                     "fermé(s) à l'échéance, {late} réponse(s) manquante(s)", count=waits["count"],
+                     mean_ms=waits["mean"] * 1000, max_ms=waits["max"] * 1000, late_ticks=straggler_ticks,
+                     late=stragglers)
+        spawner.close()
+        if isinstance(world, SharedWorld):
+            world["quit"] = 1  # display attaché au bloc : fin de la simulation
+            world.close()
+        if journal is not None:
+            journal.close()
+            log.info("Journal : {records} événements écrits dans {path}", records=journal.records, path=args.journal)
+        if args.stats:
+            with open(args.stats, "w") as f:
+                json.dump(stats, f, indent=2)
+            log.info("Mesures écrites dans {path}", path=args.stats)
 
-        print("[env] Env arrêté et nettoyé", flush=True)
+        if simlog.dropped:
+            log.warning("Journal texte : {n} message(s) perdu(s) (tampon plein)", n=simlog.dropped)
+        log.info("Env arrêté et nettoyé")
+        simlog.flush()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,78 @@
+import random
+
+import numpy as np
+
+from spatial import WORLD_SIZE
+
+DROUGHT_RADIUS = 0.3  # rayon d'une zone de sécheresse (fraction du côté du monde)
+
+
+# Herbe par cellule (env.py --grass-grid N) : quantités et capacités dans des tableaux NumPy N x N,
+# pousse, plafonnement et sécheresse appliqués au tableau entier.
+# grass_plant est alors la capacité d'une cellule, grass_unity le total de l'herbe du monde.
+class GrassField:
+    def __init__(self, dim: int, plant: float, size: float = WORLD_SIZE):
+        self.dim = dim
+        self.cell_size = size / dim
+        self.capacity = np.full((dim, dim), float(plant))
+        self.amount = np.zeros((dim, dim))
+        self.drought = np.zeros((dim, dim), dtype=bool)  # cellules où l'herbe ne pousse pas
+        self.growing = np.ones((dim, dim), dtype=bool)   # complément de drought (évite ~drought à chaque tick)
+        self._increment = np.empty((dim, dim))            # tableau de travail de grow
+        self.plant = plant
+        # distances entre indices de cellules (réutilisées pour les masques de sécheresse)
+        self._idx = np.arange(dim)
+
+    # Nouvelle capacité des cellules (commande GRASS)
+    def set_plant(self, plant: float):
+        if plant != self.plant:
+            self.plant = plant
+            self.capacity.fill(plant)
+            np.minimum(self.amount, self.capacity, out=self.amount)
+
+    # Répartit uniformément une quantité totale (restauration d'un checkpoint)
+    def fill(self, total: float):
+        self.amount.fill(total / (self.dim * self.dim))
+        np.minimum(self.amount, self.capacity, out=self.amount)
+
+    # Pousse d'un tick : même règle que grass_tick, cellule par cellule, hors zones de sécheresse
+    def grow(self, growth: float):
+        increment = self._increment
+        np.subtract(self.capacity, self.amount, out=increment)
+        increment *= growth
+        np.add(self.amount, increment, out=self.amount, where=self.growing)
+        if growth > 1.0:  # sinon la capacité ne peut pas être dépassée
+            np.minimum(self.amount, self.capacity, out=self.amount)
+
+    # Zone de sécheresse : disque (monde torique) de centre aléatoire, ou tout le monde si radius est None
+    def start_drought(self, radius=DROUGHT_RADIUS):
+        if radius is None:
+            self.drought.fill(True)
+            self.growing.fill(False)
+            return
+        cx, cy = random.randrange(self.dim), random.randrange(self.dim)
+        dx = np.abs(self._idx - cx)
+        dy = np.abs(self._idx - cy)
+        dx = np.minimum(dx, self.dim - dx)
+        dy = np.minimum(dy, self.dim - dy)
+        r = radius * self.dim
+        self.drought = (dx[:, None] ** 2 + dy[None, :] ** 2) <= r * r
+        np.logical_not(self.drought, out=self.growing)
+
+    def end_drought(self):
+        self.drought.fill(False)
+        self.growing.fill(True)
+
+    def cell_of(self, x: float, y: float) -> tuple:
+        return int(x // self.cell_size) % self.dim, int(y // self.cell_size) % self.dim
+
+    # Une proie mange dans sa cellule, renvoie True s'il y avait assez d'herbe
+    def eat(self, x: float, y: float, amount: float) -> bool:
+        cell = self.cell_of(x, y)
+        if self.amount[cell] < amount:
+            return False
+        self.amount[cell] -= amount
+        return True
+
+    def total(self) -> float:
+        return float(self.amount.sum())
@@ -0,0 +1,347 @@
+import sys
+import random
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.managers import BaseProxy
+
+import prey
+import predator
+import simlog
+from profiler import Sampler
+from spatial import random_position
+from prey import HOST, PORT_SOCKET, PORT_MANAGER, AUTHKEY, WorldManager, REATTACH_TIMEOUT, REATTACH_RETRY
+from protocol import (read_frame, encode_join, encode_death, encode_done, format_control, MSG_ACK, MSG_STOP, MSG_KILL,
+                      MSG_CULL, MSG_TICK, MSG_CONTROL, ACK_OK, ACK_REATTACHED, ACK_CLOCK, ACK_LOCKSTEP, CTRL_PAUSE, CTRL_RESUME,
+                      CTRL_PROFILE_START, CTRL_PROFILE_STOP,
+                      REASON_TEXT, REASON_UNKNOWN, REASON_NATURAL, REASON_EATEN, REASON_STOPPED,
+                      REASON_ERROR, REASON_CONNECTION_LOST)
+
+BATCH_WINDOW = 0.02  # regroupement des appels au service (secondes)
+
+log = simlog.get("herd")
+profiler = Sampler("herd", log)  # fenêtre ouverte par env (commande PROFILE ... AGENTS)
+
+
+# Herd : plusieurs proies/prédateurs dans un seul process (une tâche asyncio par individu),
+# une seule connexion socket et une seule connexion manager partagées
+class Herd:
+    def __init__(self, reader, writer, service):
+        self.reader = reader
+        self.writer = writer
+        self.service = service
+        self.executor = ThreadPoolExecutor(max_workers=1)  # un seul thread => une seule connexion manager
+        self.pending = []
+        self.tasks = {}   # id -> tâche de l'individu
+        self.roles = {}   # id -> rôle
+        self.deaths = {}  # id -> code de raison imposé par env (mangée, arrêt)
+        self.connected = asyncio.Event()  # effacé pendant un rattachement à env
+        self.connected.set()
+        self.clock = False  # horloge virtuelle d'env : les individus avancent sur les trames TICK
+        self.ticks = 0      # trames TICK reçues
+        self.tick_cond = asyncio.Condition()
+        # lockstep : un seul DONE par tick pour tout le herd, quand les individus réveillés ont fini leur tick
+        self.lockstep = False
+        self.tick = 0         # numéro d'env du dernier TICK reçu
+        self.done_tick = -1   # dernier tick signalé terminé
+        self.waiters = {}     # tick attendu (compté depuis le join) -> ids en attente
+        self.stepping = set() # ids réveillés par le tick courant, pas encore revenus en attente
+        self.running = asyncio.Event()  # effacé pendant une pause diffusée par env
+        self.running.set()
+
+    # Appel au service regroupé avec ceux des autres individus (un aller-retour par lot)
+    async def call(self, method: str, *args):
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        if not self.pending:
+            loop.call_later(BATCH_WINDOW, lambda: asyncio.ensure_future(self.flush()))
+        self.pending.append((method, args, fut))
+        return await fut
+
+    async def flush(self):
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        loop = asyncio.get_running_loop()
+        calls = [(method, args) for method, args, _ in batch]
+        deadline = loop.time() + REATTACH_TIMEOUT
+        while True:
+            try:
+                # env perdu : le lot attend le rattachement (listen) puis est renvoyé au nouvel env
+                await asyncio.wait_for(self.connected.wait(), max(0.0, deadline - loop.time()))
+                results = await loop.run_in_executor(self.executor, self.service.batch, calls)
+                break
+            except (ConnectionError, EOFError, asyncio.TimeoutError) as e:
+                if loop.time() < deadline:
+                    await asyncio.sleep(REATTACH_RETRY)
+                    continue
+                error = e
+            except Exception as e:
+                error = e
+            for _, _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(error)
+            return
+        for (_, _, fut), result in zip(batch, results):
+            if not fut.done():
+                fut.set_result(result)
+
+    async def join(self, role: str) -> int:
+        self.writer.write(encode_join(role, 0, herd=True))
+        await self.writer.drain()
+        mtype, fields = await read_frame(self.reader)
+        while mtype in (MSG_TICK, MSG_CONTROL):  # diffusés pendant les joins des individus suivants
+            if mtype == MSG_CONTROL:
+                self.control(*fields)
+            mtype, fields = await read_frame(self.reader)
+        if mtype != MSG_ACK or fields[1] != ACK_OK:
+            raise Exception("Join request rejeté par env")
+        self.clock = bool(fields[2] & ACK_CLOCK)
+        self.lockstep = bool(fields[2] & ACK_LOCKSTEP)
+        return fields[0]
+
+    # Horloge virtuelle : attend que le tick numéro target (compté depuis le join) soit reçu
+    async def wait_tick(self, agent_id: int, target: int) -> int:
+        self.step_done(agent_id)
+        if target <= self.ticks:  # tick déjà reçu (barrière fermée à l'échéance sans cet individu)
+            self.stepping.add(agent_id)
+            return target
+        self.waiters.setdefault(target, set()).add(agent_id)
+        async with self.tick_cond:
+            await self.tick_cond.wait_for(lambda: self.ticks >= target)
+        return target
+
+    # Fin du tick d'un individu : le dernier du herd envoie DONE (lockstep)
+    def step_done(self, agent_id: int):
+        if agent_id not in self.stepping:
+            return
+        self.stepping.discard(agent_id)
+        if not self.stepping:
+            self.send_done()
+
+    def send_done(self):
+        if self.lockstep and self.done_tick != self.tick:
+            self.done_tick = self.tick
+            try:
+                self.writer.write(encode_done(self.tick))
+            except Exception:
+                pass  # connexion perdue : le rattachement reprend au tick suivant
+
+    # Individu mort : plus attendu pour aucun tick
+    def forget(self, agent_id: int):
+        for ids in self.waiters.values():
+            ids.discard(agent_id)
+        self.step_done(agent_id)
+
+    # Trames d'env : KILL (proie mangée), CULL (individu arrêté), STOP (fin de simulation), TICK, CONTROL
+    async def listen(self):
+        while True:
+            try:
+                mtype, fields = await read_frame(self.reader)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                if await self.reattach():
+                    continue
+                self.stop_all(REASON_CONNECTION_LOST)
+                return
+            if mtype == MSG_STOP:
+                self.stop_all(REASON_STOPPED)
+                return
+            if mtype == MSG_KILL:
+                self.kill(fields[0])
+            elif mtype == MSG_CULL:
+                self.kill(fields[0], REASON_STOPPED)
+            elif mtype == MSG_CONTROL:
+                self.control(*fields)
+            elif mtype == MSG_TICK:
+                self.ticks += 1
+                self.tick = fields[0]
+                self.stepping |= self.waiters.pop(self.ticks, set())
+                if not self.stepping:  # tous les individus mangent (ou aucun) : tick terminé
+                    self.send_done()
+                async with self.tick_cond:
+                    self.tick_cond.notify_all()
+
+    # Contrôle diffusé par env : une pause suspend tous les individus jusqu'à la reprise
+    def control(self, code: int, value: float):
+        log.info("{control}", control=format_control(code, value))
+        if code == CTRL_PAUSE:
+            self.running.clear()
+        elif code == CTRL_RESUME:
+            self.running.set()
+        elif code == CTRL_PROFILE_START:
+            profiler.start(value)
+        elif code == CTRL_PROFILE_STOP:
+            profiler.stop()
+
+    # Individu mangé (KILL) ou arrêté par env (CULL, déjà retiré du monde)
+    def kill(self, agent_id: int, reason: int = REASON_EATEN):
+        task = self.tasks.get(agent_id)
+        if task is not None:
+            self.deaths[agent_id] = reason
+            task.cancel()
+
+    # Env redémarré (--restore) : nouvelles connexions, chaque individu vivant se rattache avec son id
+    async def reattach(self) -> bool:
+        loop = asyncio.get_running_loop()
+        self.connected.clear()
+        self.running.set()  # env renvoie PAUSE à l'inscription si besoin
+        self.writer.close()
+        log.warning("connexion à env perdue, tentative de rattachement...")
+        BaseProxy._address_to_local.pop((HOST, PORT_MANAGER), None)  # connexion cassée gardée par les proxys
+        deadline = loop.time() + REATTACH_TIMEOUT
+        while loop.time() < deadline:
+            try:
+                reader, writer = await asyncio.open_connection(HOST, PORT_SOCKET)
+                service = await loop.run_in_executor(self.executor, connect_service)
+            except (OSError, EOFError):
+                await asyncio.sleep(REATTACH_RETRY)
+                continue
+            self.reader, self.writer, self.service = reader, writer, service
+
+            live = [agent_id for agent_id, task in self.tasks.items() if not task.done()]
+            for agent_id in live:
+                writer.write(encode_join(self.roles[agent_id], agent_id, herd=True, reattach=True))
+            await writer.drain()
+            rejoin = []
+            acks = 0
+            while acks < len(live):
+                mtype, fields = await read_frame(reader)
+                if mtype == MSG_KILL:  # proie rattachée déjà mangée
+                    self.kill(fields[0])
+                    continue
+                if mtype == MSG_CONTROL:
+                    self.control(*fields)
+                    continue
+                if mtype != MSG_ACK:
+                    continue
+                acks += 1
+                agent_id, status, flags = fields
+                self.clock = bool(flags & ACK_CLOCK)
+                self.lockstep = bool(flags & ACK_LOCKSTEP)
+                if status == ACK_OK:  # absent du checkpoint : nouvelle inscription
+                    rejoin.append(("join", (self.roles[agent_id], agent_id)))
+                elif status != ACK_REATTACHED:
+                    self.deaths[agent_id] = REASON_CONNECTION_LOST
+                    self.tasks[agent_id].cancel()
+            if rejoin:
+                await loop.run_in_executor(self.executor, service.batch, rejoin)
+            log.info("{live} individus rattachés ({rejoin} réinscrits)", live=len(live), rejoin=len(rejoin))
+            self.connected.set()
+            return True
+        return False
+
+    def stop_all(self, reason: int):
+        for agent_id, task in self.tasks.items():
+            self.deaths.setdefault(agent_id, reason)
+            task.cancel()
+
+    # Vie d'un individu : mêmes étapes que la boucle de prey.py / predator.py
+    async def life(self, role: str, agent_id: int):
+        if role == "PREY":
+            st = prey.PreyState()
+            st.energy = random.uniform(*prey.ENERGY_INIT)
+            st.x, st.y = random_position()
+            name = "proie"
+        else:
+            st = predator.PredatorState()
+            st.energy = random.uniform(*predator.ENERGY_INIT)
+            st.x, st.y = random_position()
+            name = "predateur"
+        reason = REASON_UNKNOWN
+        await self.call("join", role, agent_id)
+        seen = self.ticks
+
+        try:
+            while st.alive:
+                if self.clock:
+                    seen = await self.wait_tick(agent_id, seen + 1)
+                else:
+                    await asyncio.sleep(prey.TICK_PERIOD)
+                await self.running.wait()  # en pause : aucune activité jusqu'à la reprise
+                if role == "PREY":
+                    hungry = prey.prey_metabolism(st, agent_id)
+                    out = await self.call("report", role, agent_id, st.energy, st.reproduction_cooldown,
+                                          st.x, st.y)
+                    prey.prey_apply_report(st, agent_id, out)
+                    if hungry and st.alive:
+                        if self.clock:
+                            seen = await self.wait_tick(agent_id, seen + prey.EAT_DELAY_TICKS)
+                        else:
+                            await asyncio.sleep(prey.EAT_DELAY)
+                else:
+                    predator.predator_metabolism(st, agent_id)
+                    out = await self.call("report", role, agent_id, st.energy, st.reproduction_cooldown,
+                                          st.x, st.y)
+                    predator.predator_apply_report(st, agent_id, out)
+            reason = REASON_NATURAL
+        except asyncio.CancelledError:
+            reason = self.deaths.get(agent_id, REASON_UNKNOWN)
+        except Exception as e:
+            reason = REASON_ERROR
+            log.error("{name}:{id} error: {error}", name=name, id=agent_id, error=e)
+
+        self.forget(agent_id)
+        log.info("{name}:{id} est mort, raison : {reason}", name=name, id=agent_id, reason=REASON_TEXT[reason],
+                 code=reason)
+        # prévenir env (même trame qu'un process seul)
+        try:
+            self.writer.write(encode_death(role, agent_id, reason))
+        except Exception:
+            pass
+        if reason not in (REASON_STOPPED, REASON_EATEN, REASON_CONNECTION_LOST):
+            try:
+                await self.call("leave", role, agent_id)
+            except Exception:
+                pass
+
+
+# Connexion au manager d'env, renvoie le proxy du service
+def connect_service():
+    memoire_partagee = WorldManager(address=(HOST, PORT_MANAGER), authkey=AUTHKEY)
+    memoire_partagee.connect()
+    return memoire_partagee.get_service()
+
+
+async def run_herd(n_preys: int, n_predators: int):
+    reader, writer = await asyncio.open_connection(HOST, PORT_SOCKET)
+    herd = Herd(reader, writer, connect_service())
+
+    roles = ["PREY"] * n_preys + ["PREDATOR"] * n_predators
+    ids = [await herd.join(role) for role in roles]
+    log.info("{preys} proies et {predators} prédateurs ont rejoint env sur {host}:{port}", preys=n_preys,
+             predators=n_predators, host=HOST, port=PORT_SOCKET)
+
+    listener = asyncio.ensure_future(herd.listen())
+    for role, agent_id in zip(roles, ids):
+        herd.roles[agent_id] = role
+        herd.tasks[agent_id] = asyncio.ensure_future(herd.life(role, agent_id))
+    await asyncio.gather(*herd.tasks.values(), return_exceptions=True)
+
+    listener.cancel()
+    try:
+        await herd.writer.drain()
+    except ConnectionError:
+        pass
+    herd.writer.close()
+    herd.executor.shutdown()
+    profiler.stop(wait=True)  # rapport d'une fenêtre encore ouverte
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plusieurs proies/prédateurs dans un seul process")
+    parser.add_argument("--preys", type=int, default=100)
+    parser.add_argument("--predators", type=int, default=10)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run_herd(args.preys, args.predators))
+    except KeyboardInterrupt:
+        log.info("Interrompu par l'utilisateur (ctrl+c)")
+    except Exception as e:
+        log.error("ne peut pas rejoindre env: {error}", error=e)
+        simlog.flush()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import random
+
+# Appariement des chasses d'un tick (env.py) : demandes {prédateur: (x, y)} -> [(prédateur, proie)]
+# Une politique retire les proies appariées de l'index des chassables (huntable, et grid en mode --spatial),
+# chaque proie n'est donc donnée qu'à un seul prédateur. Les prédateurs sont servis dans un ordre aléatoire.
+
+
+# Proie tirée au hasard (monde 2D : parmi celles des cellules voisines du prédateur)
+def match_random(requests: dict, huntable, grid) -> list:
+    order = list(requests)
+    random.shuffle(order)
+    pairs = []
+    for predator in order:
+        if len(huntable) == 0:
+            break
+        if grid is not None:
+            prey = grid.pop_near(*requests[predator])
+            if prey is None:
+                continue
+            huntable.discard(prey)
+        else:
+            prey = huntable.pop_random()
+        pairs.append((predator, prey))
+    return pairs
+
+
+# Proie la plus proche du prédateur dans les cellules voisines (monde 2D uniquement)
+def match_nearest(requests: dict, huntable, grid) -> list:
+    order = list(requests)
+    random.shuffle(order)
+    pairs = []
+    for predator in order:
+        if len(huntable) == 0:
+            break
+        prey = grid.pop_nearest(*requests[predator])
+        if prey is not None:
+            huntable.discard(prey)
+            pairs.append((predator, prey))
+    return pairs
+
+
+POLICIES = {"random": match_random, "nearest": match_nearest}
+SPATIAL_ONLY = {"nearest"}  # politiques qui demandent --spatial
@@ -0,0 +1,183 @@
+import os
+import sys
+import mmap
+import time
+import struct
+import argparse
+import threading
+from collections import namedtuple, Counter
+
+from protocol import ROLES, REASON_TEXT
+
+# Journal binaire des événements d'env : en-tête puis enregistrements de taille fixe, ajout seulement
+MAGIC = b"PPCJ"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")  # magic, version, taille d'un enregistrement
+
+# Enregistrement : instant (epoch), tick, type, rôle, code (raison/commande), 2 ids, valeur
+RECORD = struct.Struct("<dIBBBxqqd")
+RECORD_FIELDS = ("time", "tick", "event", "role", "code", "a", "b", "value")
+Record = namedtuple("Record", RECORD_FIELDS)
+
+# Types d'événements (sens de a / b / code / value)
+EV_JOIN = 1            # a=pid
+EV_MEAL = 2            # a=prédateur, b=proie mangée
+EV_GRAZE = 3           # a=proie, value=herbe consommée
+EV_BIRTH = 4           # a=pid (0 si échec), code=1 si échec, value=latence (s)
+EV_DEATH = 5           # a=pid, code=raison (protocol.REASON_*)
+EV_DROUGHT_START = 6   # value=durée
+EV_DROUGHT_END = 7
+EV_COMMAND = 8         # code=type de commande MQ, value=paramètre numérique
+EVENT_NAMES = {
+    EV_JOIN: "join",
+    EV_MEAL: "meal",
+    EV_GRAZE: "graze",
+    EV_BIRTH: "birth",
+    EV_DEATH: "death",
+    EV_DROUGHT_START: "drought_start",
+    EV_DROUGHT_END: "drought_end",
+    EV_COMMAND: "command",
+}
+
+FLUSH_RECORDS = 4096  # écriture disque au plus tard tous les N enregistrements (et à chaque tick)
+
+
+# Écriture du journal par env (appelée depuis la boucle principale, les threads du manager et le timer)
+class JournalWriter:
+    def __init__(self, path: str):
+        self.path = path
+        self.f = open(path, "ab")
+        if self.f.tell() == 0:
+            self.f.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        else:
+            check_header(path)  # ajout à un journal existant : même format exigé
+        self.buf = bytearray()
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.tick = 0
+        self.records = 0
+
+    def write(self, event: int, role: int = 0, code: int = 0, a: int = 0, b: int = 0, value: float = 0.0):
+        record = RECORD.pack(time.time(), self.tick, event, role, code, a, b, value)
+        with self.lock:
+            if self.f.closed:
+                return  # env en cours d'arrêt
+            self.buf += record
+            self.pending += 1
+            self.records += 1
+            if self.pending >= FLUSH_RECORDS:
+                self._flush()
+
+    def _flush(self):
+        if self.buf:
+            self.f.write(self.buf)
+            self.f.flush()
+            self.buf.clear()
+            self.pending = 0
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def close(self):
+        with self.lock:
+            if not self.f.closed:
+                self._flush()
+                self.f.close()
+
+
+# Vérifie l'en-tête d'un journal, renvoie la taille d'un enregistrement
+def check_header(path: str) -> int:
+    with open(path, "rb") as f:
+        data = f.read(HEADER.size)
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} : en-tête de journal incomplet")
+    magic, version, size = HEADER.unpack(data)
+    if magic != MAGIC or version != VERSION or size != RECORD.size:
+        raise ValueError(f"{path} : format de journal non supporté ({magic!r}, v{version}, {size} octets)")
+    return size
+
+
+# Lecture hors ligne : fichier projeté en mémoire, aucun parsing de texte
+class JournalReader:
+    def __init__(self, path: str):
+        check_header(path)
+        self.f = open(path, "rb")
+        self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+        # un enregistrement incomplet en fin de fichier (arrêt brutal) est ignoré
+        self.count = (len(self.mm) - HEADER.size) // RECORD.size
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        end = HEADER.size + self.count * RECORD.size
+        for values in RECORD.iter_unpack(memoryview(self.mm)[HEADER.size:end]):
+            yield Record(*values)
+
+    # Tableau structuré NumPy (une colonne par champ), vue directe sur le fichier
+    def to_numpy(self):
+        import numpy as np
+        dtype = np.dtype({
+            "names": list(RECORD_FIELDS),
+            "formats": ["<f8", "<u4", "u1", "u1", "u1", "<i8", "<i8", "<f8"],
+            "offsets": [0, 8, 12, 13, 14, 16, 24, 32],
+            "itemsize": RECORD.size,
+        })
+        return np.frombuffer(self.mm, dtype=dtype, count=self.count, offset=HEADER.size)
+
+    def close(self):
+        self.mm.close()
+        self.f.close()
+
+
+# Texte d'un enregistrement (affichage --dump)
+def format_record(r: Record) -> str:
+    name = EVENT_NAMES.get(r.event, str(r.event))
+    role = ROLES.get(r.role, "")
+    if r.event == EV_MEAL:
+        detail = f"predateur={r.a} proie={r.b}"
+    elif r.event == EV_DEATH:
+        detail = f"{role} {r.a} raison={REASON_TEXT.get(r.code, r.code)}"
+    elif r.event == EV_BIRTH:
+        detail = f"{role} {r.a} latence={r.value * 1000:.1f} ms" if r.code == 0 else f"{role} échec"
+    elif r.event == EV_COMMAND:
+        detail = f"commande={r.code} valeur={r.value}"
+    elif r.event in (EV_JOIN, EV_GRAZE):
+        detail = f"{role} {r.a}"
+    else:
+        detail = f"valeur={r.value}"
+    stamp = time.strftime("%H:%M:%S", time.localtime(r.time))
+    return f"{stamp} tick={r.tick} {name} {detail}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lecture d'un journal d'événements d'env")
+    parser.add_argument("path", help="fichier écrit par env.py --journal")
+    parser.add_argument("--dump", action="store_true", help="affiche chaque enregistrement")
+    args = parser.parse_args()
+
+    try:
+        reader = JournalReader(args.path)
+    except (OSError, ValueError) as e:
+        print(f"[journal] {e}", file=sys.stderr, flush=True)
+        sys.exit(1)
+
+    counts = Counter()
+    first = last = None
+    for r in reader:
+        counts[r.event] += 1
+        first = r if first is None else first
+        last = r
+        if args.dump:
+            print(format_record(r))
+    print(f"[journal] {args.path} | {len(reader)} enregistrements | {os.path.getsize(args.path)} octets", flush=True)
+    if first is not None:
+        print(f"[journal] durée={last.time - first.time:.1f}s | ticks {first.tick}..{last.tick}", flush=True)
+    for event, n in sorted(counts.items()):
+        print(f"[journal]   {EVENT_NAMES.get(event, event)}: {n}", flush=True)
+    reader.close()
+
+
+if __name__ == "__main__":
+    main()
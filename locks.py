@@ -0,0 +1,78 @@
+import time
+import threading
+
+
+# Verrou instrumenté (acquire/release/with), compte les acquisitions, les acquisitions en
+# contention (verrou déjà tenu), le temps d'attente et le temps de détention
+class StatLock:
+    def __init__(self, lock=None, name: str = "lock"):
+        self.lock = lock if lock is not None else threading.Lock()
+        self.name = name
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.hold_total = 0.0
+        self.hold_max = 0.0
+        self._acquired_at = 0.0
+
+    # arguments transmis tels quels au second essai (blocking/timeout)
+    def acquire(self, *args):
+        start = time.perf_counter()
+        contended = not self.lock.acquire(False)  # essai sans attente : libre dans le cas courant
+        if contended and not self.lock.acquire(*args):
+            return False
+        now = time.perf_counter()
+        # compteurs mis à jour verrou tenu : pas de course entre threads
+        wait = now - start
+        self.acquisitions += 1
+        self.contended += contended
+        self.wait_total += wait
+        if wait > self.wait_max:
+            self.wait_max = wait
+        self._acquired_at = now
+        return True
+
+    def release(self):
+        hold = time.perf_counter() - self._acquired_at
+        self.hold_total += hold
+        if hold > self.hold_max:
+            self.hold_max = hold
+        self.lock.release()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+    # Statistiques (secondes) pour les rapports et le benchmark
+    def stats(self) -> dict:
+        n = self.acquisitions
+        return {
+            "name": self.name,
+            "acquisitions": n,
+            "contended": self.contended,
+            "wait_total_s": self.wait_total,
+            "wait_mean_s": self.wait_total / n if n else 0.0,
+            "wait_max_s": self.wait_max,
+            "hold_total_s": self.hold_total,
+            "hold_mean_s": self.hold_total / n if n else 0.0,
+            "hold_max_s": self.hold_max,
+        }
+
+
+# Écart entre deux relevés stats() d'un même verrou (rapport périodique) ; les max restent cumulés
+def stats_since(current: dict, previous: dict) -> dict:
+    n = current["acquisitions"] - previous["acquisitions"]
+    wait = current["wait_total_s"] - previous["wait_total_s"]
+    hold = current["hold_total_s"] - previous["hold_total_s"]
+    return dict(
+        current,
+        acquisitions=n,
+        contended=current["contended"] - previous["contended"],
+        wait_total_s=wait,
+        wait_mean_s=wait / n if n else 0.0,
+        hold_total_s=hold,
+        hold_mean_s=hold / n if n else 0.0,
+    )
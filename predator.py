@@ -2,26 +2,45 @@ import os
 import sys
 import time
 import socket
-import signal
 from dataclasses import dataclass
 from typing import Optional
-from multiprocessing.managers import BaseManager
+from multiprocessing.managers import BaseManager, BaseProxy
 from multiprocessing import Lock
 import random
-import errno
 
-# Configuration
+import simlog
+from profiler import Sampler
+from spatial import random_position, random_step
+from protocol import (FrameDecoder, recv_frame, poll_frame, encode_join, encode_death, encode_done, format_control,
+                      MSG_ACK, MSG_STOP, MSG_TICK, MSG_CONTROL, ACK_OK, ACK_REATTACHED, ACK_CLOCK, ACK_LOCKSTEP,
+                      CTRL_PAUSE, CTRL_RESUME, CTRL_PROFILE_START, CTRL_PROFILE_STOP,
+                      REASON_TEXT, REASON_UNKNOWN, REASON_NATURAL, REASON_STOPPED,
+                      REASON_INTERRUPTED, REASON_ERROR, REASON_CONNECTION_LOST)
+
+# Configuration (ports surchargeables par variables d'environnement, ex. bench.py)
 HOST = "127.0.0.1"
-PORT_SOCKET = 5001
-PORT_MANAGER = 5002
+PORT_SOCKET = int(os.environ.get("PPC_PORT_SOCKET", 5001))
+PORT_MANAGER = int(os.environ.get("PPC_PORT_MANAGER", 5002))
 AUTHKEY = b"memoirepartagee"
+REATTACH_TIMEOUT = 30.0  # attente max du redémarrage d'env (secondes)
+REATTACH_RETRY = 0.5
+TICK_PERIOD = 1.0  # période d'un tick sans horloge virtuelle (secondes)
+
+log = simlog.get("predateur", with_pid=True)
+profiler = Sampler("predateur", log)  # fenêtre ouverte par env (commande PROFILE ... AGENTS)
 
-# Definition prédateur
+REPRO_COOLDOWN_INIT = 15  # 1er cooldown avant de pouvoir se reproduire pour la 1ère fois
+
+# Definition prédateur (slots : un herd en garde des milliers en mémoire)
+@dataclass(slots=True)
 class PredatorState:
     energy: float = 0.0
     active: bool = False
     alive: bool = True
-    reproduction_cooldown: int = 15 # 1er cooldown avant de pouvoir se reproduire pour la 1ère fois
+    reproduction_cooldown: int = REPRO_COOLDOWN_INIT
+    reproducible: bool = False   # dans l'ensemble reproducible_predators d'env
+    x: float = 0.0               # position (monde 2D, env.py --spatial)
+    y: float = 0.0
 
 # Variables activité/reproduction
 H = 5.0  
@@ -29,180 +48,216 @@ R = 9.0
 ENERGY_LOST_TICK = 0.4    # énergie perdue par tick
 EAT_GAIN = 8.0          # énergie gagnée
 REPRO_COOLDOWN = 20    # ticks de cooldown après reproduction
+ENERGY_INIT = (10.0, 13.0)  # bornes de l'énergie initiale
 
 class WorldManager(BaseManager):
     pass
 
-WorldManager.register("get_world")
-WorldManager.register("get_huntable")
-WorldManager.register("get_reproducible_preys")
-WorldManager.register("get_reproducible_predators")
-WorldManager.register("get_lock")
+WorldManager.register("get_service")
 
 # Socket join
-def join_simulation(role: str = "PREDATOR") -> socket.socket:
+def join_simulation(role: str = "PREDATOR", reattach: bool = False) -> tuple:
     pid = os.getpid()
-    msg = f"JOIN {role} {pid}\n".encode()
 
     s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     s.connect((HOST, PORT_SOCKET))
-    s.sendall(msg)
+    s.sendall(encode_join(role, pid, reattach=reattach))
 
-    resp = s.recv(64).decode(errors="replace").strip()
+    decoder = FrameDecoder()
+    mtype, fields = recv_frame(s, decoder)
 
-    print(f"[predator:{pid}] rejoint env sur {HOST}:{PORT_SOCKET}", flush=True)
+    log.info("rejoint env sur {host}:{port}", host=HOST, port=PORT_SOCKET)
 
-    if resp != "OK":
+    if mtype != MSG_ACK or fields[1] not in (ACK_OK, ACK_REATTACHED):
         s.close()
         raise Exception("Join request rejeté par env")
     
-    return s
+    return s, decoder, fields[1], fields[2]  # statut, drapeaux d'ACK (ACK_CLOCK, ACK_LOCKSTEP)
 
 # Memory shared connection
 def connect_shared_memory(pid: int):
     memoire_partagee = WorldManager(address=(HOST, PORT_MANAGER), authkey=AUTHKEY)
     memoire_partagee.connect()
-    print(f"[predateur:{pid}] connectée à la shared memory : {HOST}:{PORT_MANAGER}",flush=True)
-    return (memoire_partagee.get_world(),
-            memoire_partagee.get_huntable(),
-            memoire_partagee.get_reproducible_preys(),
-            memoire_partagee.get_reproducible_predators(),
-            memoire_partagee.get_lock())
-
-def predator_tick(st: PredatorState, world, huntable, reproducible_preys, reproducible_predators, world_lock) -> None:
-    pid = os.getpid()
+    log.info("connecté à la shared memory : {host}:{port}", host=HOST, port=PORT_MANAGER)
+    return memoire_partagee.get_service()
 
-    # 1) métabolisme
+# Connexion à env perdue (crash) : attendre son redémarrage et se rattacher avec le même pid
+def reattach(role: str, pid: int, old_socket: socket.socket) -> tuple:
+    try:
+        old_socket.close()
+    except Exception:
+        pass
+    log.warning("connexion à env perdue, tentative de rattachement...")
+    # les proxys gardent leur connexion (cassée) par adresse du manager : l'oublier pour en ouvrir une neuve
+    BaseProxy._address_to_local.pop((HOST, PORT_MANAGER), None)
+    deadline = time.monotonic() + REATTACH_TIMEOUT
+    while True:
+        try:
+            s, decoder, status, flags = join_simulation(role, reattach=True)
+            service = connect_shared_memory(pid)
+            break
+        except (OSError, EOFError):
+            if time.monotonic() >= deadline:
+                raise ConnectionError("env n'a pas redémarré")
+            time.sleep(REATTACH_RETRY)
+    # pid absent du checkpoint (ou env sans --restore) : nouvelle inscription
+    if status != ACK_REATTACHED:
+        service.join(role, pid)
+    return s, decoder, service, flags
+
+# 1) métabolisme
+def predator_metabolism(st: PredatorState, pid: int) -> None:
     st.energy -= ENERGY_LOST_TICK
-    energy_rounded = round(st.energy, 1)
-    print(f"[predateur:{pid}] énergie : {energy_rounded}", flush=True)
+    st.x, st.y = random_step(st.x, st.y)  # déplacement (utilisé par env en mode --spatial)
+    log.debug("énergie : {energy:.1f}", id=pid, energy=st.energy)
     # cooldown reproduction
     if st.reproduction_cooldown > 0:
         st.reproduction_cooldown -= 1
 
-    # 2) manger si faim
-    if st.energy < H:
-        world_lock.acquire()
-        try:
-            if len(huntable) > 0:
-                prey_pid = random.choice(huntable)
-                huntable.remove(prey_pid)
-                world["preys"] = world.get("preys") - 1
-                os.kill(prey_pid, signal.SIGUSR1)  # Tuer la proie
-                st.energy += EAT_GAIN
-                print(f"[predateur:{pid}] a mangé proie {prey_pid}, son énergie augmente à {round(st.energy,1)}", flush=True)
-        finally:
-            world_lock.release()
-
-    # 3) reproduction si énergie haute
-    if st.energy >= R and st.reproduction_cooldown == 0:
-        print(f"[predateur:{pid}] peut se reproduire", flush=True)
-        world_lock.acquire()
-        try:
-            if pid not in reproducible_predators:
-                reproducible_predators.append(pid)
-                print(f"[predateur:{pid}] ajoutée à la reproducible predators list", flush=True)
-                print(f"[predateur:{pid}] reproducible predators list: {list(reproducible_predators)}", flush=True)
-                st.reproduction_cooldown = REPRO_COOLDOWN  # reset cooldown
-        finally:
-            world_lock.release()
-    elif st.energy < R:
-        world_lock.acquire()
-        try:
-            if pid in reproducible_predators:
-                reproducible_predators.remove(pid)
-                print(f"[predateur:{pid}] retiré de la reproducible predator list", flush=True)
-        finally:
-            world_lock.release()
+# Application du résultat renvoyé par env (repas, reproduction, mort naturelle)
+def predator_apply_report(st: PredatorState, pid: int, out: dict) -> None:
+    st.energy = out["energy"]
+    st.reproduction_cooldown = out["cooldown"]
+
+    if out["prey"] is not None:
+        log.debug("a mangé proie {prey}, son énergie augmente à {energy:.1f}", id=pid, prey=out["prey"],
+                  energy=st.energy)
+    if out["reproducible"] != st.reproducible:
+        st.reproducible = out["reproducible"]
+        if st.reproducible:
+            log.debug("peut se reproduire, ajouté à la reproducible predators list", id=pid)
+        else:
+            log.debug("retiré de la reproducible predator list", id=pid)
 
     # 5) mort naturelle
     if st.energy <= 0:
-        st.alive = False      
+        st.alive = False
+
+def predator_tick(st: PredatorState, service) -> None:
+    pid = os.getpid()
+
+    # 1) métabolisme
+    predator_metabolism(st, pid)
+
+    # 2) manger si faim, 3) reproduction si énergie haute
+    # -> un seul appel à env (choix de la proie, retrait de huntable et kill faits par env)
+    out = service.report("PREDATOR", pid, st.energy, st.reproduction_cooldown, st.x, st.y)
+    predator_apply_report(st, pid, out)
 
 def main():
     st = PredatorState()
     pid = os.getpid()
-    reason = ""
+    reason = REASON_UNKNOWN
 
     #Join via la socket
     try:
-        s = join_simulation("PREDATOR")
+        s, decoder, _, flags = join_simulation("PREDATOR")
     except Exception as e:
-        print(f"[predateur] ne peut pas rejoindre env: {e}", file=sys.stderr, flush=True)
+        log.error("ne peut pas rejoindre env: {error}", error=e)
+        simlog.flush()
         sys.exit(1)
 
     # Connexion à la mémoire partagée via Manager
     try:
-        world, huntable, reproducible_preys, reproducible_predators, world_lock = connect_shared_memory(pid)
+        service = connect_shared_memory(pid)
     except Exception as e:
-        print(f"[predateur:{pid}] ne peut pas se connecter à la shared memory: {e}", file=sys.stderr, flush=True)
+        log.error("ne peut pas se connecter à la shared memory: {error}", error=e)
+        simlog.flush()
         sys.exit(1)
 
     # Inscription dans le monde
-    world_lock.acquire()
-    try:
-        world["predators"] = world.get("predators") + 1
-    finally:
-        world_lock.release()
+    service.join("PREDATOR", pid)
     
-    st.energy = random.uniform(10.0, 13.0) #énergie initiale
+    st.energy = random.uniform(*ENERGY_INIT) #énergie initiale
+    st.x, st.y = random_position()
 
-    #Boucle principale
+    #Boucle principale : socket (STOP, TICK, contrôle) et échéance du tick surveillées ensemble (select)
     try:
+        lost = False    # env injoignable : rattachement au prochain tour (après lecture d'un STOP éventuel)
+        paused = False  # pause diffusée par env : aucun tick ni appel au service jusqu'à la reprise
+        next_tick = time.monotonic() + TICK_PERIOD
+        clock, lockstep = bool(flags & ACK_CLOCK), bool(flags & ACK_LOCKSTEP)
         while st.alive:
-            # écouter STOP sans bloquer
+            # sans limite en pause ou avec l'horloge virtuelle (le tick arrive par la socket)
+            timeout = None if clock or paused else max(0.0, next_tick - time.monotonic())
             try:
-                s.settimeout(0.0)
-                data = s.recv(1024)  # peut lever Errno 11
-                if data and data.decode(errors="replace").strip().startswith("STOP"):
-                    reason = "Arrêt de la simulation par env"
+                frame = poll_frame(s, decoder, timeout)
+            except OSError:
+                frame = None
+                lost = True
+            if frame is not None:
+                mtype, fields = frame
+                if mtype == MSG_STOP:
+                    reason = REASON_STOPPED
                     break
+                if mtype == MSG_CONTROL:
+                    log.info("{control}", control=format_control(*fields))
+                    if fields[0] == CTRL_PAUSE:
+                        paused = True
+                    elif fields[0] == CTRL_RESUME and paused:
+                        paused = False
+                        next_tick = time.monotonic() + TICK_PERIOD
+                    elif fields[0] == CTRL_PROFILE_START:
+                        profiler.start(fields[1])
+                    elif fields[0] == CTRL_PROFILE_STOP:
+                        profiler.stop()
+                if mtype != MSG_TICK:
+                    continue
+                tick = fields[0]
+            elif not lost and (clock or paused or time.monotonic() < next_tick):
+                continue  # trame incomplète
+
+            if lost:
+                s, decoder, service, flags = reattach("PREDATOR", pid, s)
+                clock, lockstep = bool(flags & ACK_CLOCK), bool(flags & ACK_LOCKSTEP)
+                lost = False
+                paused = False  # env renvoie PAUSE à l'inscription si besoin
+                next_tick = time.monotonic() + TICK_PERIOD
+                continue
+            if not clock:
+                next_tick = max(next_tick + TICK_PERIOD, time.monotonic())
 
-            except OSError as e:
-                # Errno 11 = normal en non-bloquant => on ignore
-                if e.errno != errno.EAGAIN:
-                    pass
+            # tick de vie du prédateur
+            try:
+                predator_tick(st, service)
+            except (ConnectionError, EOFError):
+                lost = True
 
-            finally:
-                s.settimeout(None)
+            # lockstep : tick terminé (rapport appliqué par env), env peut fermer la barrière
+            if lockstep and not lost:
+                try:
+                    s.sendall(encode_done(tick))
+                except OSError:
+                    lost = True
 
-            # tick de vie du prédateur
-            time.sleep(1.0)
-            predator_tick(st, world, huntable, reproducible_preys, reproducible_predators, world_lock)
-        
         # si on sort car mort "naturelle"
-        if reason == "" and (st.alive == False):
-            reason = "mort naturelle (énergie inférieure à 0)"
+        if reason == REASON_UNKNOWN and (st.alive == False):
+            reason = REASON_NATURAL
 
     except KeyboardInterrupt:
-        reason = "Interrompu par l'utilisateur (ctrl+c)"
+        reason = REASON_INTERRUPTED
+
+    except ConnectionError as e:
+        reason = REASON_CONNECTION_LOST
+        log.error("{error}", error=e)
         
     except Exception as e:
-        reason = f"error: {e}"
-        print(f"[predateur:{pid}] error: {e}", file=sys.stderr, flush=True)
+        reason = REASON_ERROR
+        log.error("error: {error}", error=e)
     
     finally:
-        if reason == "":
-            reason = "INCONNUE"
-
-        print(f"[predateur:{pid}] est mort, raison : {reason}", flush=True)
+        log.info("est mort, raison : {reason}", reason=REASON_TEXT[reason], code=reason)
 
         # prévenir env (ne jamais planter dans le cleanup)
         try:
-            s.sendall(f"PREDATEUR {pid} est MORT, raison : {reason}\n".encode())
+            s.sendall(encode_death("PREDATOR", pid, reason))
         except Exception:
             pass
 
         # cleanup world (protégé)
         try:
-            if reason != "Interrompu par l'utilisateur (ctrl+c)":
-                world_lock.acquire()
-                try:
-                    if pid in reproducible_predators:
-                        reproducible_predators.remove(pid)
-                    world["predators"] = world.get("predators") - 1
-                finally:
-                    world_lock.release()
+            if reason != REASON_STOPPED:
+                service.leave("PREDATOR", pid)
         except Exception:
             pass
 
@@ -211,6 +266,8 @@ def main():
         except Exception:
             pass
 
+        profiler.stop(wait=True)  # rapport d'une fenêtre encore ouverte
+        simlog.flush()  # agent né d'un worker du spawner : pas d'atexit
         sys.exit(0)
 
 
@@ -5,23 +5,44 @@ import socket
 import signal
 from dataclasses import dataclass
 from typing import Optional
-from multiprocessing.managers import BaseManager
+from multiprocessing.managers import BaseManager, BaseProxy
 from multiprocessing import Lock
 import random
-import errno
 
-# Configuration
+import simlog
+from profiler import Sampler
+from spatial import random_position, random_step
+from protocol import (FrameDecoder, recv_frame, poll_frame, encode_join, encode_death, encode_done, format_control,
+                      MSG_ACK, MSG_STOP, MSG_TICK, MSG_CONTROL, ACK_OK, ACK_REATTACHED, ACK_CLOCK, ACK_LOCKSTEP,
+                      CTRL_PAUSE, CTRL_RESUME, CTRL_PROFILE_START, CTRL_PROFILE_STOP,
+                      REASON_TEXT, REASON_UNKNOWN, REASON_NATURAL, REASON_EATEN, REASON_STOPPED,
+                      REASON_INTERRUPTED, REASON_ERROR, REASON_CONNECTION_LOST)
+
+# Configuration (ports surchargeables par variables d'environnement, ex. bench.py)
 HOST = "127.0.0.1"
-PORT_SOCKET = 5001
-PORT_MANAGER = 5002
+PORT_SOCKET = int(os.environ.get("PPC_PORT_SOCKET", 5001))
+PORT_MANAGER = int(os.environ.get("PPC_PORT_MANAGER", 5002))
 AUTHKEY = b"memoirepartagee"
+REATTACH_TIMEOUT = 30.0  # attente max du redémarrage d'env (secondes)
+REATTACH_RETRY = 0.5
+TICK_PERIOD = 1.0  # période d'un tick sans horloge virtuelle (secondes)
+
+log = simlog.get("proie", with_pid=True)
+profiler = Sampler("proie", log)  # fenêtre ouverte par env (commande PROFILE ... AGENTS)
 
-# Definition proie
+REPRO_COOLDOWN_INIT = 15  # 1er cooldown avant de pouvoir se reproduire pour la 1ère fois
+
+# Definition proie (slots : un herd en garde des milliers en mémoire)
+@dataclass(slots=True)
 class PreyState:
     energy: float = 0.0
     active: bool = False
     alive: bool = True
-    reproduction_cooldown: int = 15 # 1er cooldown avant de pouvoir se reproduire pour la 1ère fois
+    reproduction_cooldown: int = REPRO_COOLDOWN_INIT
+    huntable: bool = False       # dans l'ensemble huntable d'env
+    reproducible: bool = False   # dans l'ensemble reproducible_preys d'env
+    x: float = 0.0               # position (monde 2D, env.py --spatial)
+    y: float = 0.0
 
 # Variables activité/reproduction
 H = 5.0  
@@ -30,209 +51,245 @@ ENERGY_LOST_TICK = 0.5   # énergie perdue par tick
 EAT_AMOUNT = 3.0      # herbe consommée
 EAT_GAIN = 7.0          # énergie gagnée
 REPRO_COOLDOWN = 25    # ticks de cooldown après reproduction
+EAT_DELAY = 1.5        # temps pour manger (secondes), la proie reste chassable
+EAT_DELAY_TICKS = 2    # même délai compté en ticks (horloge virtuelle)
+ENERGY_INIT = (8.0, 9.0)  # bornes de l'énergie initiale
 
 class WorldManager(BaseManager):
     pass
 
-WorldManager.register("get_world")
-WorldManager.register("get_huntable")
-WorldManager.register("get_reproducible_preys")
-WorldManager.register("get_reproducible_predators")
-WorldManager.register("get_lock")
+WorldManager.register("get_service")
 
 # Socket join
-def join_simulation(role: str = "PREY") -> socket.socket:
+def join_simulation(role: str = "PREY", reattach: bool = False) -> tuple:
     pid = os.getpid()
-    msg = f"JOIN {role} {pid}\n".encode()
 
     s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     s.connect((HOST, PORT_SOCKET))
-    s.sendall(msg)
+    s.sendall(encode_join(role, pid, reattach=reattach))
 
-    resp = s.recv(64).decode(errors="replace").strip()
+    decoder = FrameDecoder()
+    mtype, fields = recv_frame(s, decoder)
 
-    print(f"[proie:{pid}] rejoint env sur {HOST}:{PORT_SOCKET}", flush=True)
+    log.info("rejoint env sur {host}:{port}", host=HOST, port=PORT_SOCKET)
 
-    if resp != "OK":
+    if mtype != MSG_ACK or fields[1] not in (ACK_OK, ACK_REATTACHED):
         s.close()
         raise Exception("Join request rejeté par env")
     
-    return s
+    return s, decoder, fields[1], fields[2]  # statut, drapeaux d'ACK (ACK_CLOCK, ACK_LOCKSTEP)
 
 # Memory shared connection
 def connect_shared_memory(pid: int):
     memoire_partagee = WorldManager(address=(HOST, PORT_MANAGER), authkey=AUTHKEY)
     memoire_partagee.connect()
-    print(f"[proie:{pid}] connectée à la shared memory : {HOST}:{PORT_MANAGER}",flush=True)
-    return (memoire_partagee.get_world(),
-            memoire_partagee.get_huntable(),
-            memoire_partagee.get_reproducible_preys(),
-            memoire_partagee.get_reproducible_predators(),
-            memoire_partagee.get_lock())
-
-def prey_tick(st: PreyState, world, huntable, reproducible_preys, world_lock) -> None:
-    pid = os.getpid()
+    log.info("connectée à la shared memory : {host}:{port}", host=HOST, port=PORT_MANAGER)
+    return memoire_partagee.get_service()
 
-    # 1) métabolisme
+# Connexion à env perdue (crash) : attendre son redémarrage et se rattacher avec le même pid
+def reattach(role: str, pid: int, old_socket: socket.socket) -> tuple:
+    try:
+        old_socket.close()
+    except Exception:
+        pass
+    log.warning("connexion à env perdue, tentative de rattachement...")
+    # les proxys gardent leur connexion (cassée) par adresse du manager : l'oublier pour en ouvrir une neuve
+    BaseProxy._address_to_local.pop((HOST, PORT_MANAGER), None)
+    deadline = time.monotonic() + REATTACH_TIMEOUT
+    while True:
+        try:
+            s, decoder, status, flags = join_simulation(role, reattach=True)
+            service = connect_shared_memory(pid)
+            break
+        except (OSError, EOFError):
+            if time.monotonic() >= deadline:
+                raise ConnectionError("env n'a pas redémarré")
+            time.sleep(REATTACH_RETRY)
+    # pid absent du checkpoint (ou env sans --restore) : nouvelle inscription
+    if status != ACK_REATTACHED:
+        service.join(role, pid)
+    return s, decoder, service, flags
+
+# 1) métabolisme, renvoie True si la proie a faim
+def prey_metabolism(st: PreyState, pid: int) -> bool:
     st.energy -= ENERGY_LOST_TICK
-    energy_rounded = round(st.energy, 1)
-    print(f"[proie:{pid}] énergie : {energy_rounded}", flush=True)
+    st.x, st.y = random_step(st.x, st.y)  # déplacement (utilisé par env en mode --spatial)
+    log.debug("énergie : {energy:.1f}", id=pid, energy=st.energy)
     # cooldown reproduction
     if st.reproduction_cooldown > 0:
         st.reproduction_cooldown -= 1
-
-    # 2) chassable si énergie < H
-    if st.energy < H:
-        world_lock.acquire()
-        try:
-            if pid not in huntable:
-                huntable.append(pid)
-                print(f"[proie:{pid}] est maintenant chassable | huntable list: {list(huntable)}", flush=True)
-        finally:
-            world_lock.release()
-    if st.energy > H:
-        world_lock.acquire()
-        try:
-            if pid in huntable:
-                huntable.remove(pid)
-                print(f"[proie:{pid}] n'est plus chassable | huntable list: {list(huntable)}", flush=True)
-        finally:
-            world_lock.release()
-
-    # 3) manger si faim
-    if st.energy < H:
-        time.sleep(1.5)  # Simuler le temps pour manger (permettre au prédateur d'attraper la proie)
-        world_lock.acquire()
-        try:
-            if world["grass_unity"] >= EAT_AMOUNT:
-                world["grass_unity"] -= EAT_AMOUNT
-                rounded_grass = round(world["grass_unity"], 1)
-                st.energy += EAT_GAIN
-                energy_rounded = round(st.energy, 1)
-                print(f"[proie:{pid}] a mangé {EAT_AMOUNT} unités d'herbe, son énergie augmente à {energy_rounded}", flush=True)
-        finally:
-            world_lock.release()
-
-    # 4) reproduction si énergie haute
-    if st.energy >= R and st.reproduction_cooldown == 0:
-        print(f"[proie:{pid}] peut se reproduire", flush=True)
-        world_lock.acquire()
-        try:
-            if pid not in reproducible_preys:
-                reproducible_preys.append(pid)
-                print(f"[proie:{pid}] ajoutée à la reproducible preys list", flush=True)
-                print(f"[proie:{pid}] reproducible preys list: {list(reproducible_preys)}", flush=True)
-                st.reproduction_cooldown = REPRO_COOLDOWN  # reset cooldown
-        finally:
-            world_lock.release()
-    elif st.energy < R:
-        world_lock.acquire()
-        try:
-            if pid in reproducible_preys:
-                reproducible_preys.remove(pid)
-                print(f"[proie:{pid}] retirée de la reproducible preys list", flush=True)
-        finally:
-            world_lock.release()
+    return st.energy < H
+
+# Application du résultat renvoyé par env (chassable, repas, reproduction, mort naturelle)
+def prey_apply_report(st: PreyState, pid: int, out: dict) -> None:
+    st.energy = out["energy"]
+    st.reproduction_cooldown = out["cooldown"]
+
+    if out["huntable"] != st.huntable:
+        st.huntable = out["huntable"]
+        if st.huntable:
+            log.debug("est maintenant chassable", id=pid)
+        else:
+            log.debug("n'est plus chassable", id=pid)
+    if out["ate"]:
+        log.debug("a mangé {amount} unités d'herbe, son énergie augmente à {energy:.1f}", id=pid,
+                  amount=EAT_AMOUNT, energy=st.energy)
+    if out["reproducible"] != st.reproducible:
+        st.reproducible = out["reproducible"]
+        if st.reproducible:
+            log.debug("peut se reproduire, ajoutée à la reproducible preys list", id=pid)
+        else:
+            log.debug("retirée de la reproducible preys list", id=pid)
 
     # 5) mort naturelle
     if st.energy <= 0:
-        st.alive = False  
+        st.alive = False
+
+# Renvoie True si la proie prend le temps de manger (l'appelant décale son prochain tick de EAT_DELAY)
+def prey_tick(st: PreyState, service) -> bool:
+    pid = os.getpid()
+
+    # 1) métabolisme
+    hungry = prey_metabolism(st, pid)
+
+    # 2) chassable si énergie < H, 3) manger si faim, 4) reproduction si énergie haute
+    # -> un seul appel à env qui applique tout de façon atomique
+    out = service.report("PREY", pid, st.energy, st.reproduction_cooldown, st.x, st.y)
+    prey_apply_report(st, pid, out)
+
+    # Temps pour manger : la proie reste chassable jusqu'au prochain rapport (permettre au prédateur de l'attraper)
+    return hungry and st.alive
 
 def main():
     st = PreyState()
     pid = os.getpid()
-    reason = ""
+    reason = REASON_UNKNOWN
 
     # Mort car mangé par predateur
     def est_mange(sig, frame):
-        raise SystemExit("MANGÉE par un predateur")
+        raise SystemExit(REASON_EATEN)
 
     signal.signal(signal.SIGUSR1, est_mange)
 
     # Join via la socket
     try:
-        s = join_simulation("PREY")
+        s, decoder, _, flags = join_simulation("PREY")
     except Exception as e:
-        print(f"[proie] ne peut pas rejoindre env: {e}", file=sys.stderr, flush=True)
+        log.error("ne peut pas rejoindre env: {error}", error=e)
+        simlog.flush()
         sys.exit(1)
 
     # Connexion à la mémoire partagée via Manager
     try:
-        world, huntable, reproducible_preys, reproducible_predators, world_lock = connect_shared_memory(pid)
+        service = connect_shared_memory(pid)
     except Exception as e:
-        print(f"[proie:{pid}] ne peut pas se connecter à la shared memory: {e}", file=sys.stderr, flush=True)
+        log.error("ne peut pas se connecter à la shared memory: {error}", error=e)
+        simlog.flush()
         sys.exit(1)
 
     # Inscription dans le monde
-    world_lock.acquire()
-    try:
-        world["preys"] = world.get("preys") + 1
-    finally:
-        world_lock.release()
+    service.join("PREY", pid)
 
-    st.energy = random.uniform(8.0, 9.0)  # Initial energy
+    st.energy = random.uniform(*ENERGY_INIT)  # Initial energy
+    st.x, st.y = random_position()
 
-    # Boucle principale
+    # Boucle principale : socket (STOP, TICK, contrôle) et échéance du tick surveillées ensemble (select)
     try:
+        lost = False    # env injoignable : rattachement au prochain tour (après lecture d'un STOP éventuel)
+        skip = 0        # horloge virtuelle : ticks restants pour manger
+        paused = False  # pause diffusée par env : aucun tick ni appel au service jusqu'à la reprise
+        next_tick = time.monotonic() + TICK_PERIOD
+        clock, lockstep = bool(flags & ACK_CLOCK), bool(flags & ACK_LOCKSTEP)
         while st.alive:
-            # écouter STOP sans bloquer
+            # sans limite en pause ou avec l'horloge virtuelle (le tick arrive par la socket)
+            timeout = None if clock or paused else max(0.0, next_tick - time.monotonic())
             try:
-                s.settimeout(0.0)
-                data = s.recv(1024)  # peut lever Errno 11
-                if data and data.decode(errors="replace").strip().startswith("STOP"):
-                    reason = "Arrêt de la simulation par env"
+                frame = poll_frame(s, decoder, timeout)
+            except OSError:
+                frame = None
+                lost = True
+            if frame is not None:
+                mtype, fields = frame
+                if mtype == MSG_STOP:
+                    reason = REASON_STOPPED
                     break
-
-            except OSError as e:
-                # Errno 11 = normal en non-bloquant => on ignore
-                if e.errno != errno.EAGAIN:
-                    pass
-
-            finally:
-                s.settimeout(None)
-
-            # tick de vie de la proie
-            time.sleep(1.0)
-            prey_tick(st, world, huntable, reproducible_preys, world_lock)
+                if mtype == MSG_CONTROL:
+                    log.info("{control}", control=format_control(*fields))
+                    if fields[0] == CTRL_PAUSE:
+                        paused = True
+                    elif fields[0] == CTRL_RESUME and paused:
+                        paused = False
+                        next_tick = time.monotonic() + TICK_PERIOD
+                    elif fields[0] == CTRL_PROFILE_START:
+                        profiler.start(fields[1])
+                    elif fields[0] == CTRL_PROFILE_STOP:
+                        profiler.stop()
+                if mtype != MSG_TICK:
+                    continue
+                tick = fields[0]
+            elif not lost and (clock or paused or time.monotonic() < next_tick):
+                continue  # trame incomplète
+
+            if lost:
+                s, decoder, service, flags = reattach("PREY", pid, s)
+                clock, lockstep = bool(flags & ACK_CLOCK), bool(flags & ACK_LOCKSTEP)
+                lost = False
+                paused = False  # env renvoie PAUSE à l'inscription si besoin
+                next_tick = time.monotonic() + TICK_PERIOD
+                continue
+            if not clock:
+                next_tick = max(next_tick + TICK_PERIOD, time.monotonic())
+            if skip > 0:  # en train de manger
+                skip -= 1
+            else:
+                # tick de vie de la proie
+                try:
+                    if prey_tick(st, service):
+                        if clock:
+                            skip = EAT_DELAY_TICKS
+                        else:
+                            next_tick += EAT_DELAY
+                except (ConnectionError, EOFError):
+                    lost = True
+
+            # lockstep : tick terminé (rapport appliqué par env), env peut fermer la barrière
+            if lockstep and not lost:
+                try:
+                    s.sendall(encode_done(tick))
+                except OSError:
+                    lost = True
 
         # si on sort car mort "naturelle"
-        if reason == "" and (st.alive == False):
-            reason = "mort naturelle (énergie inférieure à 0)"
+        if reason == REASON_UNKNOWN and (st.alive == False):
+            reason = REASON_NATURAL
 
     except KeyboardInterrupt:
-        reason = "Interrompu par l'utilisateur (ctrl+c)"
+        reason = REASON_INTERRUPTED
+
+    except ConnectionError as e:
+        reason = REASON_CONNECTION_LOST
+        log.error("{error}", error=e)
 
     except Exception as e:
-        reason = f"error: {e}"
-        print(f"[proie:{pid}] error: {e}", file=sys.stderr, flush=True)
+        reason = REASON_ERROR
+        log.error("error: {error}", error=e)
 
     except SystemExit as e:
-        reason = str(e)
+        reason = e.code
 
     finally:
-        if reason == "":
-            reason = "INCONNUE"
-
-        print(f"[prey:{pid}] est mort, raison : {reason}", flush=True)
+        log.info("est morte, raison : {reason}", reason=REASON_TEXT[reason], code=reason)
 
         # prévenir env (ne jamais planter dans le cleanup)
         try:
-            s.sendall(f"PROIE {pid} est MORTE, raison : {reason}\n".encode())
+            s.sendall(encode_death("PREY", pid, reason))
         except Exception:
             pass
 
         # cleanup world (protégé)
         try:
-            if reason != "Arrêt de la simulation par env" and reason != "MANGÉE par un predateur":
-                world_lock.acquire()
-                try:
-                    if pid in huntable:
-                        huntable.remove(pid)
-                    if pid in reproducible_preys:
-                        reproducible_preys.remove(pid)
-                    world["preys"] = world.get("preys") - 1
-                finally:
-                    world_lock.release()
+            if reason != REASON_STOPPED and reason != REASON_EATEN:
+                service.leave("PREY", pid)
         except Exception:
             pass
 
@@ -241,6 +298,8 @@ def main():
         except Exception:
             pass
 
+        profiler.stop(wait=True)  # rapport d'une fenêtre encore ouverte
+        simlog.flush()  # agent né d'un worker du spawner : pas d'atexit
         sys.exit(0)
 
 
@@ -0,0 +1,152 @@
+import os
+import re
+import sys
+import json
+import time
+import socket
+import selectors
+import threading
+from collections import Counter
+from concurrent.futures import thread as futures_thread
+from multiprocessing.connection import Connection
+from multiprocessing.managers import BaseProxy
+
+import protocol
+
+# Profilage à la demande (commande PROFILE d'env, diffusée aux agents par une trame CONTROL) : pendant la fenêtre,
+# un thread relève la pile de tous les threads du process (sys._current_frames) ; hors fenêtre rien ne tourne.
+# Un thread arrêté dans une attente connue (select, recv, wait) compte comme inactif, un thread dans un appel au
+# manager (proxy) compte à part (rpc) ; les fonctions chaudes sont calculées sur les relevés actifs.
+SAMPLE_PERIOD = 0.01   # secondes entre deux relevés
+MAX_SECONDS = 600.0    # durée d'une fenêtre ouverte sans durée (jusqu'à PROFILE STOP)
+TOP = 25               # fonctions écrites par classement
+
+# Fonctions feuilles d'un thread en attente
+IDLE_CODES = {
+    selectors.SelectSelector.select.__code__,
+    selectors.PollSelector.select.__code__,
+    selectors.EpollSelector.select.__code__,
+    threading.Condition.wait.__code__,
+    Connection._recv.__code__,
+    socket.socket.accept.__code__,
+    futures_thread._worker.__code__,  # worker d'un ThreadPoolExecutor en attente de travail
+    protocol.poll_frame.__code__,
+    protocol.recv_frame.__code__,
+}
+RPC_CODE = BaseProxy._callmethod.__code__
+
+
+# Dossier des rapports, surchargeable par variable d'environnement (héritée par les agents nés dans env)
+def profile_dir() -> str:
+    return os.environ.get("PPC_PROFILE_DIR", "profiles")
+
+
+# Écart entre deux relevés de compteurs cumulés (dicts imbriqués de nombres)
+def counters_since(current: dict, previous: dict) -> dict:
+    return {k: counters_since(v, previous[k]) if isinstance(v, dict) else v - previous[k] for k, v in current.items()}
+
+
+def _label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+# Threads d'un même rôle regroupés : "Thread-12 (handle_request)" -> "Thread (handle_request)"
+def _thread_names() -> dict:
+    return {t.ident: re.sub(r"-\d+", "", t.name) for t in threading.enumerate()}
+
+
+# Échantillonneur d'un process ; snapshot : compteurs cumulés du process (dict de nombres), relevés au début
+# et à la fin de la fenêtre, dont l'écart est écrit dans le rapport
+class Sampler:
+    def __init__(self, name: str, log, snapshot=None):
+        self.name = name
+        self.log = log
+        self.snapshot = snapshot
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # Ouvre une fenêtre de seconds secondes (0 : jusqu'à stop), False si une fenêtre est déjà ouverte
+    def start(self, seconds: float = 0.0) -> bool:
+        if self.running:
+            return False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(seconds or MAX_SECONDS,), name="profil", daemon=True)
+        self._thread.start()
+        return True
+
+    # Ferme la fenêtre ; wait : attend l'écriture du rapport (arrêt du process)
+    def stop(self, wait: bool = False):
+        self._stop.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    def _run(self, seconds: float):
+        me = threading.get_ident()
+        before = self.snapshot() if self.snapshot else None
+        started, cpu_started = time.monotonic(), time.process_time()
+        deadline = started + seconds
+        self_hits, total_hits = Counter(), Counter()
+        threads = {}
+        names = {}
+        samples = busy = idle = rpc = 0
+        while not self._stop.wait(SAMPLE_PERIOD) and time.monotonic() < deadline:
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                if tid not in names:
+                    names = _thread_names()
+                per_thread = threads.setdefault(names.get(tid, "?"), Counter())
+                samples += 1
+                leaf = frame.f_code
+                codes = set()
+                while frame is not None:
+                    codes.add(frame.f_code)
+                    frame = frame.f_back
+                if RPC_CODE in codes:
+                    rpc += 1
+                    per_thread["rpc"] += 1
+                elif leaf in IDLE_CODES:
+                    idle += 1
+                    per_thread["idle"] += 1
+                else:
+                    busy += 1
+                    per_thread["busy"] += 1
+                    self_hits[leaf] += 1
+                    total_hits.update(codes)
+        elapsed = time.monotonic() - started
+
+        def ranking(hits: Counter) -> list:
+            return [{"function": _label(code), "samples": n, "pct": 100.0 * n / busy}
+                    for code, n in hits.most_common(TOP)]
+
+        report = {
+            "process": self.name,
+            "pid": os.getpid(),
+            "duration_s": elapsed,
+            "cpu_s": time.process_time() - cpu_started,
+            "sample_period_s": SAMPLE_PERIOD,
+            "samples": samples,
+            "busy": busy,
+            "idle": idle,
+            "rpc": rpc,
+            "threads": {name: dict(c) for name, c in sorted(threads.items(), key=lambda kv: -kv[1]["busy"])},
+            "hot_self": ranking(self_hits),
+            "hot_total": ranking(total_hits),
+        }
+        if before is not None:
+            report["counters"] = counters_since(self.snapshot(), before)
+        path = os.path.join(profile_dir(), f"{self.name}-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        try:
+            os.makedirs(profile_dir(), exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+        except OSError as e:
+            self.log.error("Profil : écriture impossible de {path} : {error}", path=path, error=e)
+            return
+        top = ", ".join(f"{h['function']} {h['pct']:.0f}%" for h in report["hot_self"][:3])
+        self.log.info("Profil écrit dans {path} ({s:.1f}s, {busy} relevés actifs, {rpc} en appel au manager) : {top}",
+                      path=path, s=elapsed, busy=busy, rpc=rpc, top=top or "aucune activité")
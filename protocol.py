@@ -0,0 +1,221 @@
+import struct
+import select
+from collections import deque
+
+# Protocole binaire du canal socket env <-> proies/prédateurs/herds (et instantané d'état pour display)
+# Trame = en-tête (version, type, longueur du contenu) + contenu de taille fixe selon le type
+VERSION = 2
+HEADER = struct.Struct("!BBI")
+
+# Types de trames
+MSG_JOIN = 1    # agent -> env : rôle, drapeaux, pid (0 pour un individu de herd)
+MSG_ACK = 2     # env -> agent : id attribué, statut, drapeaux
+MSG_DEATH = 3   # agent -> env : rôle, id, code de raison
+MSG_STOP = 4    # env -> agent : fin de simulation
+MSG_KILL = 5    # env -> herd : individu mangé
+MSG_TICK = 6    # env -> agent : numéro du tick (horloge virtuelle)
+# 7 réservé (télémétrie)
+MSG_CONTROL = 8  # env -> agent : commande de contrôle diffusée (pause, reprise, sécheresse, paramètre)
+MSG_DONE = 9     # agent -> env : tick terminé (mode lockstep)
+MSG_CULL = 10    # env -> herd : individu arrêté par une commande CULL
+
+PAYLOADS = {
+    MSG_JOIN: struct.Struct("!BBq"),
+    MSG_ACK: struct.Struct("!qBB"),
+    MSG_DEATH: struct.Struct("!BqB"),
+    MSG_STOP: struct.Struct("!"),
+    MSG_KILL: struct.Struct("!q"),
+    MSG_TICK: struct.Struct("!q"),
+    MSG_CONTROL: struct.Struct("!Bd"),
+    MSG_DONE: struct.Struct("!q"),
+    MSG_CULL: struct.Struct("!q"),
+}
+
+# Rôles
+ROLE_PREY = 1
+ROLE_PREDATOR = 2
+ROLES = {ROLE_PREY: "PREY", ROLE_PREDATOR: "PREDATOR"}
+ROLE_CODES = {name: code for code, name in ROLES.items()}
+
+# Drapeaux de JOIN
+JOIN_HERD = 1      # env attribue un id virtuel
+JOIN_REATTACH = 2  # reconnexion après redémarrage d'env : garde son pid (ou id virtuel)
+
+# Statut d'ACK
+ACK_OK = 0
+ACK_REFUSED = 1
+ACK_REATTACHED = 2  # pid restauré depuis un checkpoint : déjà inscrit, pas de nouveau join
+
+# Drapeaux d'ACK
+ACK_CLOCK = 1     # horloge virtuelle : l'agent avance sur les trames TICK au lieu de dormir
+ACK_LOCKSTEP = 2  # lockstep : l'agent répond DONE à chaque TICK une fois son tick terminé
+
+# Commandes de contrôle (MSG_CONTROL : code, valeur)
+CTRL_PAUSE = 1
+CTRL_RESUME = 2
+CTRL_DROUGHT_ON = 3   # valeur = durée
+CTRL_DROUGHT_OFF = 4
+CTRL_GROWTH = 5       # valeur = coefficient de pousse
+CTRL_GRASS = 6        # valeur = plants d'herbe
+CTRL_PROFILE_START = 7  # valeur = durée (0 : jusqu'à CTRL_PROFILE_STOP)
+CTRL_PROFILE_STOP = 8
+CONTROL_TEXT = {
+    CTRL_PAUSE: "simulation en pause",
+    CTRL_RESUME: "reprise de la simulation",
+    CTRL_DROUGHT_ON: "sécheresse déclenchée",
+    CTRL_DROUGHT_OFF: "sécheresse terminée",
+    CTRL_GROWTH: "croissance de l'herbe modifiée",
+    CTRL_GRASS: "plants d'herbe modifiés",
+    CTRL_PROFILE_START: "profilage démarré",
+    CTRL_PROFILE_STOP: "profilage arrêté",
+}
+
+# Codes de raison de mort
+REASON_UNKNOWN = 0
+REASON_NATURAL = 1
+REASON_EATEN = 2
+REASON_STOPPED = 3
+REASON_INTERRUPTED = 4
+REASON_ERROR = 5
+REASON_CONNECTION_LOST = 6
+REASON_TEXT = {
+    REASON_UNKNOWN: "INCONNUE",
+    REASON_NATURAL: "mort naturelle (énergie inférieure à 0)",
+    REASON_EATEN: "MANGÉE par un predateur",
+    REASON_STOPPED: "Arrêt de la simulation par env",
+    REASON_INTERRUPTED: "Interrompu par l'utilisateur (ctrl+c)",
+    REASON_ERROR: "erreur",
+    REASON_CONNECTION_LOST: "Connexion à env perdue",
+}
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def encode(mtype: int, *fields) -> bytes:
+    payload = PAYLOADS[mtype].pack(*fields)
+    return HEADER.pack(VERSION, mtype, len(payload)) + payload
+
+def encode_join(role: str, pid: int, herd: bool = False, reattach: bool = False) -> bytes:
+    flags = (JOIN_HERD if herd else 0) | (JOIN_REATTACH if reattach else 0)
+    return encode(MSG_JOIN, ROLE_CODES[role], flags, pid)
+
+def encode_ack(agent_id: int, status: int = ACK_OK, flags: int = 0) -> bytes:
+    return encode(MSG_ACK, agent_id, status, flags)
+
+def encode_death(role: str, agent_id: int, reason: int) -> bytes:
+    return encode(MSG_DEATH, ROLE_CODES[role], agent_id, reason)
+
+def encode_stop() -> bytes:
+    return encode(MSG_STOP)
+
+def encode_kill(agent_id: int) -> bytes:
+    return encode(MSG_KILL, agent_id)
+
+def encode_tick(tick: int) -> bytes:
+    return encode(MSG_TICK, tick)
+
+def encode_control(code: int, value: float = 0.0) -> bytes:
+    return encode(MSG_CONTROL, code, value)
+
+def encode_done(tick: int) -> bytes:
+    return encode(MSG_DONE, tick)
+
+def encode_cull(agent_id: int) -> bytes:
+    return encode(MSG_CULL, agent_id)
+
+# Contenu décodé : tuple de champs (octets bruts pour un type inconnu d'une version future)
+def decode(mtype: int, payload: bytes):
+    fmt = PAYLOADS.get(mtype)
+    if fmt is None:
+        return payload
+    if len(payload) != fmt.size:
+        raise ProtocolError(f"trame {mtype} de taille {len(payload)} (attendu {fmt.size})")
+    return fmt.unpack(payload)
+
+
+# Découpage incrémental d'un flux d'octets en trames (un décodeur par connexion)
+class FrameDecoder:
+    def __init__(self):
+        self.buf = bytearray()
+        self.pending = deque()  # trames décodées pas encore consommées par recv_frame
+
+    def feed(self, data: bytes) -> list:
+        self.buf += data
+        frames = []
+        while len(self.buf) >= HEADER.size:
+            version, mtype, length = HEADER.unpack_from(self.buf)
+            if version != VERSION:
+                raise ProtocolError(f"version {version} non supportée")
+            end = HEADER.size + length
+            if len(self.buf) < end:
+                break  # trame incomplète : attendre la suite
+            frames.append((mtype, decode(mtype, bytes(self.buf[HEADER.size:end]))))
+            del self.buf[:end]
+        return frames
+
+
+# Lecture bloquante d'une trame complète (join des agents)
+def recv_frame(sock, decoder: FrameDecoder):
+    while not decoder.pending:
+        data = sock.recv(4096)
+        if not data:
+            raise ConnectionError("connexion fermée par env")
+        decoder.pending.extend(decoder.feed(data))
+    return decoder.pending.popleft()
+
+
+# Lecture d'une trame avec délai (select) : None si rien n'est arrivé avant timeout (None = sans limite)
+def poll_frame(sock, decoder: FrameDecoder, timeout):
+    if not decoder.pending:
+        readable, _, _ = select.select([sock], [], [], timeout)
+        if not readable:
+            return None
+        data = sock.recv(4096)
+        if not data:
+            raise ConnectionError("connexion fermée par env")
+        decoder.pending.extend(decoder.feed(data))
+        if not decoder.pending:
+            return None  # trame incomplète : l'appelant attend à nouveau
+    return decoder.pending.popleft()
+
+
+# Lecture asyncio d'une trame complète (herd.py)
+async def read_frame(reader):
+    version, mtype, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if version != VERSION:
+        raise ProtocolError(f"version {version} non supportée")
+    return mtype, decode(mtype, await reader.readexactly(length))
+
+
+# Canal d'état env -> display (MQ) : instantané binaire de taille fixe, numéroté
+STATE = struct.Struct("!Qqqqdqqd")
+STATE_FIELDS = ("predators", "preys", "grass_plant", "grass_unity", "drought", "pause", "grass_growth")
+
+def encode_state(seq: int, w) -> bytes:
+    return STATE.pack(seq, *(w[key] for key in STATE_FIELDS))
+
+def decode_state(data: bytes) -> tuple:
+    values = STATE.unpack(data)
+    return values[0], dict(zip(STATE_FIELDS, values[1:]))
+
+# Texte d'une commande de contrôle affiché par les agents
+def format_control(code: int, value: float) -> str:
+    text = CONTROL_TEXT.get(code, f"contrôle {code}")
+    if code in (CTRL_DROUGHT_ON, CTRL_GROWTH, CTRL_GRASS, CTRL_PROFILE_START):
+        text += f" ({value:g})"
+    return text
+
+# Texte d'état affiché par display (et par le mode headless)
+def format_state(w) -> str:
+    grass_unity_rounded = round(float(w["grass_unity"]), 1)
+    return (
+        f"predateurs={w['predators']} | "
+        f"proies={w['preys']} | "
+        f"plants d'herbe={w['grass_plant']} | "
+        f"unités d'herbe={grass_unity_rounded} | "
+        f"sécheresse={w['drought']} | "
+        f"pause={w['pause']} | "
+        f"coef pousse={w['grass_growth']}"
+    )
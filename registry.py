@@ -0,0 +1,166 @@
+import time
+from typing import Optional
+
+import numpy as np
+
+from protocol import ROLES, ROLE_CODES
+
+# Drapeaux d'un individu (colonne flags)
+FLAG_HUNTABLE = 1      # dans l'ensemble huntable d'env
+FLAG_REPRODUCIBLE = 2  # dans reproducible_preys / reproducible_predators
+NO_CONN = -1           # connexion inconnue (individu restauré pas encore rattaché)
+
+INITIAL_CAPACITY = 1024
+COLUMNS = {
+    "pid": np.int64,
+    "role": np.uint8,        # ROLE_PREY / ROLE_PREDATOR (protocol.py)
+    "flags": np.uint8,
+    "cooldown": np.int32,    # dernier cooldown de reproduction rapporté
+    "conn": np.int32,        # descripteur de la socket de l'agent (ou de son herd)
+    "joined_at": np.float64,
+    "energy": np.float32,    # dernière énergie rapportée (NaN avant le premier rapport)
+    "x": np.float32,         # dernière position rapportée (NaN avant le premier rapport)
+    "y": np.float32,
+}
+
+
+# Registre des individus inscrits dans env : un enregistrement par pid dans des colonnes NumPy,
+# lignes 0..n-1 denses (un retrait déplace la dernière ligne dans le trou), pid -> ligne dans un dict.
+# Pas de verrou interne : env le protège par census_lock.
+class Registry:
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        self.n = 0
+        self.cols = {name: np.zeros(capacity, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self.rows = {}       # pid -> ligne
+        self.counts = {role: 0 for role in ROLE_CODES}
+        self.pending_conn = {}  # connexion annoncée (JOIN socket) avant l'inscription au service
+
+    def __len__(self):
+        return self.n
+
+    def __contains__(self, pid):
+        return pid in self.rows
+
+    def _grow(self):
+        for name, col in self.cols.items():
+            bigger = np.zeros(2 * len(col), dtype=col.dtype)
+            bigger[:self.n] = col[:self.n]
+            self.cols[name] = bigger
+
+    # Inscription, renvoie False si le pid est déjà inscrit
+    def add(self, pid: int, role: str, energy: float = np.nan) -> bool:
+        if pid in self.rows:
+            return False
+        if self.n == len(self.cols["pid"]):
+            self._grow()
+        i = self.n
+        c = self.cols
+        c["pid"][i] = pid
+        c["role"][i] = ROLE_CODES[role]
+        c["flags"][i] = 0
+        c["cooldown"][i] = 0
+        c["conn"][i] = self.pending_conn.pop(pid, NO_CONN)
+        c["joined_at"][i] = time.time()
+        c["energy"][i] = energy
+        c["x"][i] = c["y"][i] = np.nan
+        self.rows[pid] = i
+        self.n += 1
+        self.counts[role] += 1
+        return True
+
+    # Retrait, renvoie le rôle de l'individu retiré (None s'il n'était pas inscrit)
+    def remove(self, pid: int) -> Optional[str]:
+        self.pending_conn.pop(pid, None)
+        i = self.rows.pop(pid, None)
+        if i is None:
+            return None
+        role = ROLES[int(self.cols["role"][i])]
+        self.n -= 1
+        last = self.n
+        if i != last:  # la dernière ligne prend la place de la ligne retirée
+            for col in self.cols.values():
+                col[i] = col[last]
+            self.rows[int(self.cols["pid"][i])] = i
+        self.counts[role] -= 1
+        return role
+
+    def role(self, pid: int) -> Optional[str]:
+        i = self.rows.get(pid)
+        return None if i is None else ROLES[int(self.cols["role"][i])]
+
+    def count(self, role: str) -> int:
+        return self.counts[role]
+
+    # Dernier rapport de tick de l'individu
+    def update(self, pid: int, energy: float, cooldown: int, flags: int, x: float = np.nan, y: float = np.nan):
+        i = self.rows.get(pid)
+        if i is None:
+            return
+        c = self.cols
+        c["energy"][i] = energy
+        c["cooldown"][i] = cooldown
+        c["flags"][i] = flags
+        c["x"][i] = x
+        c["y"][i] = y
+
+    # Position connue sans rapport (checkpoint restauré)
+    def place(self, pid: int, x: float, y: float):
+        i = self.rows.get(pid)
+        if i is not None:
+            self.cols["x"][i] = x
+            self.cols["y"][i] = y
+
+    # {pid: (x, y)} des inscrits dont une position est connue
+    def positions(self) -> dict:
+        c = {name: self.cols[name][:self.n] for name in ("pid", "x", "y")}
+        known = ~np.isnan(c["x"])
+        return dict(zip(c["pid"][known].tolist(), zip(c["x"][known].tolist(), c["y"][known].tolist())))
+
+    # Connexion de l'agent : retenue jusqu'à son inscription si elle arrive avant
+    def bind(self, pid: int, conn: int):
+        i = self.rows.get(pid)
+        if i is None:
+            self.pending_conn[pid] = conn
+        else:
+            self.cols["conn"][i] = conn
+
+    def pids(self, role: Optional[str] = None) -> list:
+        pids = self.cols["pid"][:self.n]
+        if role is not None:
+            pids = pids[self.cols["role"][:self.n] == ROLE_CODES[role]]
+        return pids.tolist()
+
+    # [(pid, connexion)] des inscrits d'un rôle
+    def members(self, role: str) -> list:
+        mask = self.cols["role"][:self.n] == ROLE_CODES[role]
+        return list(zip(self.cols["pid"][:self.n][mask].tolist(), self.cols["conn"][:self.n][mask].tolist()))
+
+    # {pid: rôle} de tous les inscrits
+    def entries(self) -> dict:
+        roles = self.cols["role"][:self.n].tolist()
+        return {pid: ROLES[code] for pid, code in zip(self.cols["pid"][:self.n].tolist(), roles)}
+
+    def nbytes(self) -> int:
+        return sum(col.nbytes for col in self.cols.values())
+
+    # Recensement par rôle en un passage vectorisé sur les colonnes
+    def summary(self) -> dict:
+        c = {name: col[:self.n] for name, col in self.cols.items()}
+        out = {}
+        for role, code in ROLE_CODES.items():
+            mask = c["role"] == code
+            n = int(np.count_nonzero(mask))
+            energy = c["energy"][mask]
+            energy = energy[~np.isnan(energy)]
+            flags = c["flags"][mask]
+            out[role] = {
+                "count": n,
+                "reported": len(energy),
+                "energy_mean": float(energy.mean()) if len(energy) else 0.0,
+                "energy_min": float(energy.min()) if len(energy) else 0.0,
+                "huntable": int(np.count_nonzero(flags & FLAG_HUNTABLE)),
+                "reproducible": int(np.count_nonzero(flags & FLAG_REPRODUCIBLE)),
+                "unbound": int(np.count_nonzero(c["conn"][mask] == NO_CONN)),
+            }
+        out["bytes"] = self.nbytes()  # colonnes (sans le dict pid -> ligne)
+        return out
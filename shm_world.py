@@ -0,0 +1,99 @@
+import time
+import struct
+import threading
+from multiprocessing import shared_memory, resource_tracker
+
+SPIN_MAX = 0.001  # attente max (s) entre deux relectures pendant une écriture (backoff exponentiel)
+
+# Disposition binaire du bloc : compteur seqlock puis un champ de 8 octets par clé du monde
+SEQ = struct.Struct("<Q")
+FIELDS = {
+    "preys": "q",
+    "predators": "q",
+    "grass_plant": "q",
+    "grass_unity": "d",
+    "drought": "q",
+    "drought_duration": "q",
+    "pause": "q",
+    "grass_growth": "d",
+    "quit": "q",
+}
+LAYOUT = struct.Struct("<" + "".join(FIELDS.values()))
+OFFSETS = {key: SEQ.size + 8 * i for i, key in enumerate(FIELDS)}
+SIZE = SEQ.size + LAYOUT.size
+
+
+# Nom du segment, propre à chaque simulation (même clé que la Message Queue d'env)
+def segment_name(mq_key: int) -> str:
+    return f"ppc_world_{mq_key}"
+
+
+# Bloc "world" en mémoire partagée, utilisable comme le dict (world["preys"], world.get(...))
+# Les écritures (threads d'env, sous des verrous différents selon le champ) sont sérialisées
+# par write_lock et incrémentent le seqlock, les lectures de snapshot() sont sans verrou (display attaché au bloc).
+class SharedWorld:
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.buf = shm.buf
+        self.owner = owner
+        self.write_lock = threading.Lock()
+
+    # Création par env à partir du dict initial, FileExistsError si le segment existe déjà (autre env, même clé)
+    @classmethod
+    def create(cls, name: str, initial: dict) -> "SharedWorld":
+        w = cls(shared_memory.SharedMemory(name=name, create=True, size=SIZE), owner=True)
+        SEQ.pack_into(w.buf, 0, 0)
+        LAYOUT.pack_into(w.buf, SEQ.size, *(initial[key] for key in FIELDS))
+        return w
+
+    # Attache en lecture (display) au bloc créé par env, FileNotFoundError si env n'utilise pas --shm
+    @classmethod
+    def attach(cls, name: str) -> "SharedWorld":
+        shm = shared_memory.SharedMemory(name=name)
+        # sinon le resource_tracker du lecteur supprime le segment d'env à sa sortie
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, owner=False)
+
+    def __getitem__(self, key):
+        return struct.unpack_from("<" + FIELDS[key], self.buf, OFFSETS[key])[0]
+
+    def __setitem__(self, key, value):
+        fmt = "<" + FIELDS[key]
+        with self.write_lock:
+            seq = SEQ.unpack_from(self.buf, 0)[0]
+            SEQ.pack_into(self.buf, 0, seq + 1)  # impair : écriture en cours
+            struct.pack_into(fmt, self.buf, OFFSETS[key], int(value) if FIELDS[key] == "q" else float(value))
+            SEQ.pack_into(self.buf, 0, seq + 2)
+
+    def __contains__(self, key):
+        return key in FIELDS
+
+    def get(self, key, default=None):
+        if key not in FIELDS:
+            return default
+        return self[key]
+
+    def keys(self):
+        return FIELDS.keys()
+
+    # Copie cohérente de tout le bloc (relit tant qu'une écriture est en cours, en cédant le CPU à l'écrivain)
+    def snapshot(self) -> dict:
+        delay = 0.0
+        while True:
+            seq = SEQ.unpack_from(self.buf, 0)[0]
+            if seq % 2 == 1:
+                time.sleep(delay)
+                delay = min(SPIN_MAX, delay * 2 or 1e-6)
+                continue
+            values = LAYOUT.unpack_from(self.buf, SEQ.size)
+            if SEQ.unpack_from(self.buf, 0)[0] == seq:
+                return dict(zip(FIELDS, values))
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,132 @@
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+from collections import deque
+
+# Journal texte d'env et des agents : niveaux, champs structurés, écriture différée
+# Un appel sous le niveau courant ne fait rien ; sinon l'enregistrement (gabarit + champs bruts) est posé
+# dans un tampon circulaire et un thread d'écriture le formate et l'écrit par lots (un write + un flush).
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR}
+LEVEL_NAMES = {code: name for name, code in LEVELS.items()}
+
+RING_SIZE = 65536    # enregistrements en attente au-delà desquels les plus anciens sont perdus
+FLUSH_PERIOD = 0.2   # écriture des enregistrements en attente (secondes)
+
+# Niveau et format surchargeables par variables d'environnement (héritées par les agents nés dans env)
+level = LEVELS.get(os.environ.get("PPC_LOG_LEVEL", "info").lower(), INFO)
+json_format = os.environ.get("PPC_LOG_FORMAT", "text") == "json"
+
+_ring = deque(maxlen=RING_SIZE)
+_write_lock = threading.Lock()
+_wake = threading.Event()
+_writer = None   # thread d'écriture de ce process (démarré au premier enregistrement)
+dropped = 0      # enregistrements perdus (tampon plein)
+
+
+def set_level(name: str):
+    global level
+    level = LEVELS[name.lower()]
+
+
+# Source de messages : "env", "proie", "predateur"... (with_pid : préfixe [nom:id] des agents, id = champ "id"
+# de l'enregistrement s'il est fourni, individu d'un herd, sinon pid du process)
+class Logger:
+    def __init__(self, name: str, with_pid: bool = False):
+        self.name = name
+        self.with_pid = with_pid
+
+    def debug(self, msg: str, **fields):
+        if level <= DEBUG:
+            _emit(self, DEBUG, msg, fields)
+
+    def info(self, msg: str, **fields):
+        if level <= INFO:
+            _emit(self, INFO, msg, fields)
+
+    def warning(self, msg: str, **fields):
+        if level <= WARNING:
+            _emit(self, WARNING, msg, fields)
+
+    def error(self, msg: str, **fields):
+        if level <= ERROR:
+            _emit(self, ERROR, msg, fields)
+            _wake.set()  # erreurs écrites sans attendre la période
+
+
+def get(name: str, with_pid: bool = False) -> Logger:
+    return Logger(name, with_pid)
+
+
+# Chemin chaud : un append, aucun formatage ni appel système
+def _emit(logger: Logger, lvl: int, msg: str, fields: dict):
+    global dropped
+    if _writer is None:
+        _start_writer()
+    if len(_ring) == RING_SIZE:
+        dropped += 1
+    _ring.append((time.time(), lvl, logger, msg, fields))
+
+
+def _start_writer():
+    global _writer
+    _writer = threading.Thread(target=_writer_loop, name="simlog", daemon=True)
+    _writer.start()
+
+
+def _writer_loop():
+    while True:
+        _wake.wait(FLUSH_PERIOD)
+        _wake.clear()
+        flush()
+
+
+def _format(record) -> tuple:
+    t, lvl, logger, msg, fields = record
+    try:
+        text = msg.format(**fields) if fields else msg
+    except (KeyError, IndexError, ValueError) as e:
+        text = f"{msg} (format invalide : {e})"
+    source = f"{logger.name}:{fields.get('id', os.getpid())}" if logger.with_pid else logger.name
+    if json_format:
+        fields = {k: v if isinstance(v, (int, float, str, bool, type(None))) else str(v) for k, v in fields.items()}
+        return lvl, json.dumps({"t": round(t, 6), "level": LEVEL_NAMES[lvl], "source": source, "msg": text, **fields},
+                               ensure_ascii=False)
+    return lvl, f"[{source}] {text}"
+
+
+# Formate et écrit tout ce qui est en attente (thread d'écriture, atexit, et avant de quitter un agent né
+# d'un worker multiprocessing qui ne passe pas par atexit)
+def flush():
+    with _write_lock:
+        out, err = [], []
+        while _ring:
+            lvl, line = _format(_ring.popleft())
+            (err if lvl >= ERROR else out).append(line)
+        for stream, lines in ((sys.stdout, out), (sys.stderr, err)):
+            if lines:
+                try:
+                    stream.write("\n".join(lines) + "\n")
+                    stream.flush()
+                except (OSError, ValueError):
+                    pass  # sortie fermée
+
+
+# Process forké (workers du spawner) : le thread d'écriture du parent n'existe pas dans l'enfant
+def _after_fork():
+    global _writer, _write_lock, _wake, dropped
+    _writer = None
+    _write_lock = threading.Lock()  # verrous éventuellement tenus par un thread du parent au moment du fork
+    _wake = threading.Event()
+    _ring.clear()
+    dropped = 0
+
+
+os.register_at_fork(after_in_child=_after_fork)
+atexit.register(flush)
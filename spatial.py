@@ -0,0 +1,107 @@
+import math
+import random
+
+# Monde 2D optionnel (env.py --spatial) : carré torique découpé en cellules de taille fixe
+WORLD_SIZE = 100.0  # côté du monde
+CELL_SIZE = 10.0    # côté d'une cellule de l'index
+MOVE_STEP = 2.0     # déplacement max par tick et par axe
+HUNT_RADIUS = 1     # un prédateur chasse dans sa cellule et les cellules voisines (3x3)
+
+
+# Position initiale aléatoire
+def random_position() -> tuple:
+    return random.uniform(0.0, WORLD_SIZE), random.uniform(0.0, WORLD_SIZE)
+
+
+# Marche aléatoire d'un tick (le monde se referme sur lui-même)
+def random_step(x: float, y: float) -> tuple:
+    return ((x + random.uniform(-MOVE_STEP, MOVE_STEP)) % WORLD_SIZE,
+            (y + random.uniform(-MOVE_STEP, MOVE_STEP)) % WORLD_SIZE)
+
+
+# Index en grille uniforme : cellule -> PIDs, recherche limitée aux cellules voisines
+class SpatialGrid:
+    def __init__(self, size: float = WORLD_SIZE, cell_size: float = CELL_SIZE):
+        self.size = size
+        self.cell_size = cell_size
+        self.dim = max(1, math.ceil(size / cell_size))  # cellules par côté
+        self.cells = {}  # (cx, cy) -> liste de PIDs
+        self.where = {}  # pid -> (cellule, position dans la liste)
+        self.pos = {}    # pid -> dernière position (x, y)
+
+    def __len__(self):
+        return len(self.where)
+
+    def __contains__(self, pid):
+        return pid in self.where
+
+    def cell_of(self, x: float, y: float) -> tuple:
+        return int(x // self.cell_size) % self.dim, int(y // self.cell_size) % self.dim
+
+    # Ajout ou déplacement d'un individu
+    def place(self, pid: int, x: float, y: float):
+        cell = self.cell_of(x, y)
+        current = self.where.get(pid)
+        if current is not None and current[0] != cell:
+            self.remove(pid)
+            current = None
+        self.pos[pid] = (x, y)
+        if current is None:
+            items = self.cells.setdefault(cell, [])
+            self.where[pid] = (cell, len(items))
+            items.append(pid)
+
+    def remove(self, pid: int):
+        current = self.where.pop(pid, None)
+        if current is None:
+            return
+        del self.pos[pid]
+        cell, i = current
+        items = self.cells[cell]
+        last = items.pop()
+        if i < len(items):  # le dernier prend la place du retiré
+            items[i] = last
+            self.where[last] = (cell, i)
+        if not items:
+            del self.cells[cell]
+
+    # Cellules à moins de radius cellules de (x, y)
+    def neighbourhood(self, x: float, y: float, radius: int = HUNT_RADIUS) -> list:
+        cx, cy = self.cell_of(x, y)
+        span = range(-radius, radius + 1)
+        cells = {((cx + dx) % self.dim, (cy + dy) % self.dim) for dx in span for dy in span}
+        return [self.cells[c] for c in cells if c in self.cells]
+
+    # Tire au hasard un individu proche et le retire de l'index (None si aucun)
+    def pop_near(self, x: float, y: float, radius: int = HUNT_RADIUS):
+        candidates = self.neighbourhood(x, y, radius)
+        total = sum(len(items) for items in candidates)
+        if total == 0:
+            return None
+        k = random.randrange(total)
+        for items in candidates:
+            if k < len(items):
+                pid = items[k]
+                self.remove(pid)
+                return pid
+            k -= len(items)
+
+    # Retire de l'index l'individu le plus proche (distance torique) des cellules voisines (None si aucun)
+    def pop_nearest(self, x: float, y: float, radius: int = HUNT_RADIUS):
+        best, best_d = None, math.inf
+        for items in self.neighbourhood(x, y, radius):
+            for pid in items:
+                px, py = self.pos[pid]
+                dx = abs(px - x) % self.size
+                dy = abs(py - y) % self.size
+                d = min(dx, self.size - dx) ** 2 + min(dy, self.size - dy) ** 2
+                if d < best_d:
+                    best, best_d = pid, d
+        if best is not None:
+            self.remove(best)
+        return best
+
+    def clear(self):
+        self.cells.clear()
+        self.where.clear()
+        self.pos.clear()
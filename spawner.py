@@ -0,0 +1,163 @@
+import os
+import time
+import queue
+import threading
+from collections import deque
+import multiprocessing as mp
+
+import prey
+import predator
+import simlog
+
+AGENTS = {"PREY": prey, "PREDATOR": predator}
+SPAWN_TIMEOUT = 2.0  # attente max de l'accusé de démarrage d'un worker (secondes)
+
+log = simlog.get("env")
+
+
+# Worker pré-chargé : prey/predator déjà importés, attend qu'env lui confie une naissance
+def _warm_worker(role: str, conn):
+    agent = AGENTS[role]
+    try:
+        msg = conn.recv()
+    except EOFError:
+        return  # env fermé avant utilisation
+    if msg != "GO":
+        return
+    conn.send(os.getpid())
+    conn.close()
+    agent.main()
+
+
+# Service de naissance d'env : pool de workers pré-forkés (forkserver) par rôle. Les lots de naissances sont
+# confiés à un thread (démarrages à froid, accusés des workers et remplissage du pool hors de la boucle d'env),
+# leurs pids relevés par env à un tour de boucle suivant (completed)
+class Spawner:
+    def __init__(self, pool_size: int = 2):
+        try:
+            self.ctx = mp.get_context("forkserver")
+            self.ctx.set_forkserver_preload(["__main__", "prey", "predator"])
+        except ValueError:  # forkserver indisponible sur cette plateforme
+            self.ctx = mp.get_context("spawn")
+        self.pool_size = pool_size
+        self.idle = {role: [] for role in AGENTS}  # utilisé par le seul thread du spawner après __init__
+        self.jobs = queue.Queue()   # (rôle, n, étiquette) ; None : arrêt du thread
+        self.results = deque()      # (rôle, étiquette, pids, latence en s) des lots terminés
+        self.births = 0
+        self.failures = 0
+        self.latencies = []  # secondes, une par naissance réussie
+        for role in AGENTS:
+            self.refill(role)
+        self.thread = threading.Thread(target=self._run, name="spawner", daemon=True)
+        self.thread.start()
+
+    def _start_worker(self, role: str):
+        parent_conn, child_conn = self.ctx.Pipe()
+        p = self.ctx.Process(target=_warm_worker, args=(role, child_conn), name=f"warm-{role.lower()}")
+        p.start()
+        child_conn.close()
+        return p, parent_conn
+
+    # Démarrage à froid d'un worker, None si échec (compté comme naissance ratée par spawn_batch)
+    def _cold_start(self, role: str):
+        try:
+            return self._start_worker(role)
+        except Exception as e:
+            log.error("Spawner : impossible de démarrer un worker {role} : {error}", role=role, error=e)
+            return None
+
+    # Complète le pool de workers en attente jusqu'à pool_size
+    def refill(self, role: str):
+        while len(self.idle[role]) < self.pool_size:
+            worker = self._cold_start(role)
+            if worker is None:
+                return
+            self.idle[role].append(worker)
+
+    # Lot de naissances confié au thread du spawner, sans attente ; étiquette rendue avec les pids
+    def submit(self, role: str, n: int, tag=None):
+        self.jobs.put((role, n, tag))
+
+    # Lots terminés depuis le dernier appel : liste de (rôle, étiquette, pids, latence en s)
+    def completed(self) -> list:
+        out = []
+        while self.results:
+            out.append(self.results.popleft())
+        return out
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            role, n, tag = job
+            start = time.perf_counter()
+            pids = self.spawn_batch(role, n)
+            self.results.append((role, tag, pids, time.perf_counter() - start))
+            if self.jobs.empty():  # pas d'autre lot en attente : pool complété pour le suivant
+                mp.active_children()  # récupère les individus terminés (pas de zombies)
+                for r in AGENTS:
+                    self.refill(r)
+
+    # Lot de n naissances (thread du spawner) : confie un slot à n workers chauds, démarrés à froid si le pool
+    # ne suffit pas (GO envoyé à tous, puis accusés relevés, attentes superposées). Renvoie un pid par naissance
+    # (None si échec)
+    def spawn_batch(self, role: str, n: int) -> list:
+        start = time.perf_counter()
+        workers = self.idle[role][:n]
+        del self.idle[role][:n]
+        while len(workers) < n:  # pool trop petit : démarrage à froid des workers manquants
+            worker = self._cold_start(role)
+            if worker is None:
+                break
+            workers.append(worker)
+
+        sent = []
+        for p, conn in workers:
+            try:
+                conn.send("GO")
+                sent.append((p, conn))
+            except OSError:
+                conn.close()  # worker mort pendant l'attente
+        pids = []
+        for p, conn in sent:
+            pid = None
+            try:
+                if conn.poll(SPAWN_TIMEOUT):
+                    pid = conn.recv()
+                else:
+                    p.kill()
+            except (OSError, EOFError):
+                pass  # worker mort pendant l'attente
+            conn.close()
+            pids.append(pid)
+        pids += [None] * (n - len(pids))
+
+        latency = time.perf_counter() - start
+        for pid in pids:
+            if pid is None:
+                self.failures += 1
+            else:
+                self.births += 1
+                self.latencies.append(latency)
+        return pids
+
+    def summary(self) -> str:
+        if self.latencies:
+            mean_ms = sum(self.latencies) / len(self.latencies) * 1000
+            max_ms = max(self.latencies) * 1000
+        else:
+            mean_ms = max_ms = 0.0
+        return (f"naissances={self.births} | échecs={self.failures} | "
+                f"latence moyenne={mean_ms:.1f} ms | latence max={max_ms:.1f} ms")
+
+    # Arrêt des workers inutilisés (les individus nés reçoivent STOP comme les autres)
+    def close(self):
+        self.jobs.put(None)
+        self.thread.join(timeout=5.0)
+        for role in AGENTS:
+            for p, conn in self.idle[role]:
+                conn.close()  # le worker reçoit EOF et se termine
+            for p, conn in self.idle[role]:
+                p.join(timeout=1.0)
+            self.idle[role].clear()
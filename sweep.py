@@ -0,0 +1,108 @@
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import simlog
+from engine import HeadlessEngine, DEFAULT_PARAMS
+
+COLUMNS = ("tick", "preys", "predators", "grass_unity", "drought")
+
+
+# Une simulation headless : aucune socket, MQ ni manager, donc rien à isoler entre workers
+def run_one(run_id: int, params: dict, seed: int, n_preys: int, n_predators: int, ticks: int, every: int) -> tuple:
+    engine = HeadlessEngine(n_preys, n_predators, seed=seed, params=params)
+    series = [(0, len(engine.preys), len(engine.predators), engine.world["grass_unity"], engine.world["drought"])]
+    for _ in range(ticks):
+        engine.step()
+        extinct = len(engine.preys) == 0 and len(engine.predators) == 0
+        if engine.tick % every == 0 or extinct:
+            w = engine.world
+            series.append((engine.tick, w["preys"], w["predators"], w["grass_unity"], w["drought"]))
+        if extinct:
+            break
+    return run_id, series
+
+
+# Grille "nom=v1,v2,..." -> {nom: [valeurs]}
+def parse_grid(items: list) -> dict:
+    grid = {}
+    for item in items:
+        name, _, values = item.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_PARAMS:
+            raise ValueError(f"paramètre inconnu : {name} (connus : {', '.join(DEFAULT_PARAMS)})")
+        kind = type(DEFAULT_PARAMS[name])
+        grid[name] = [kind(float(v)) if kind is int else kind(v) for v in values.split(",") if v.strip()]
+    return grid
+
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}m{seconds:02d}s" if minutes else f"{seconds}s"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Balayage de paramètres en parallèle (moteur headless)")
+    parser.add_argument("--grid", action="append", default=[], metavar="NOM=V1,V2,...",
+                        help="valeurs d'un paramètre (répétable), ex. --grid prey_h=4,5,6 --grid grass_growth=0.05,0.1")
+    parser.add_argument("--grid-file", default=None, help="grille au format JSON {nom: [valeurs]}")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[1], help="graines aléatoires")
+    parser.add_argument("--preys", type=int, default=1000)
+    parser.add_argument("--predators", type=int, default=100)
+    parser.add_argument("--ticks", type=int, default=500)
+    parser.add_argument("--every", type=int, default=1, help="ticks entre deux points de la série temporelle")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="taille du pool de process")
+    parser.add_argument("--out", default="sweep_results.csv", help="table des résultats (CSV)")
+    args = parser.parse_args()
+
+    try:
+        grid = parse_grid(args.grid)
+        if args.grid_file:
+            with open(args.grid_file) as f:
+                grid.update(parse_grid([f"{k}={','.join(map(str, v))}" for k, v in json.load(f).items()]))
+    except (OSError, ValueError) as e:
+        print(f"[sweep] grille invalide : {e}", file=sys.stderr, flush=True)
+        sys.exit(1)
+
+    names = list(grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+    runs = [(params, seed) for params in combos for seed in args.seeds]
+    print(f"[sweep] {len(combos)} combinaisons x {len(args.seeds)} graines = {len(runs)} simulations | "
+          f"{args.workers} workers | {args.ticks} ticks", flush=True)
+
+    start = time.perf_counter()
+    done = 0
+    # workers sans messages d'info du moteur (sécheresses), avertissements et erreurs conservés
+    with open(args.out, "w", newline="") as f, ProcessPoolExecutor(max_workers=args.workers, initializer=simlog.set_level,
+                                                                   initargs=("warning",)) as pool:
+        table = csv.writer(f)
+        table.writerow(("run", "seed", *names, *COLUMNS))
+        futures = [pool.submit(run_one, run_id, params, seed, args.preys, args.predators, args.ticks, args.every)
+                   for run_id, (params, seed) in enumerate(runs)]
+        try:
+            for future in as_completed(futures):
+                run_id, series = future.result()
+                params, seed = runs[run_id]
+                for row in series:
+                    table.writerow((run_id, seed, *(params[n] for n in names), *row))
+                done += 1
+                elapsed = time.perf_counter() - start
+                eta = elapsed / done * (len(runs) - done)
+                print(f"[sweep] {done}/{len(runs)} | écoulé {format_duration(elapsed)} | ETA {format_duration(eta)} | "
+                      f"run {run_id} : proies={series[-1][1]} prédateurs={series[-1][2]} au tick {series[-1][0]}",
+                      flush=True)
+        except KeyboardInterrupt:
+            print("[sweep] Interrompu par l'utilisateur (ctrl+c)", flush=True)
+            for future in futures:
+                future.cancel()
+
+    print(f"[sweep] Résultats écrits dans {args.out} ({format_duration(time.perf_counter() - start)})", flush=True)
+
+
+if __name__ == "__main__":
+    main()
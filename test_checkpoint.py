@@ -0,0 +1,76 @@
+import struct
+
+import checkpoint
+from checkpoint import save_checkpoint, load_checkpoint, SETS
+from journal import JournalWriter, JournalReader, EV_JOIN, EV_MEAL, EV_DROUGHT_START
+from shm_world import FIELDS, LAYOUT
+
+WORLD = {"preys": 2, "predators": 1, "grass_plant": 40, "grass_unity": 12.5, "drought": 1, "drought_duration": 7,
+         "pause": 0, "grass_growth": 0.25, "quit": 0}
+
+
+def state() -> dict:
+    return {
+        "tick": 42,
+        "drought_in": 3.5,
+        "next_virtual_id": (1 << 22) + 7,
+        "world": dict(WORLD),
+        "alive_preys": [11, 12],
+        "alive_predators": [21],
+        "huntable": [12],
+        "reproducible_preys": [11],
+        "reproducible_predators": [],
+        "reproduced": {21: 60},
+        "positions": {12: (4.5, 80.25), 21: (0.0, 1.0)},
+    }
+
+
+# Sauvegarde puis lecture : état identique, pas de fichier temporaire laissé
+def test_checkpoint_round_trip(tmp_path):
+    path = str(tmp_path / "world.ckpt")
+    save_checkpoint(path, state())
+    loaded = load_checkpoint(path)
+    del loaded["saved_at"]
+    assert loaded == state()
+    assert [p.name for p in tmp_path.iterdir()] == ["world.ckpt"]
+
+
+# Checkpoint version 1 (sans fenêtres de cooldown ni positions) toujours lisible
+def test_checkpoint_v1_loads(tmp_path):
+    s = state()
+    parts = [checkpoint.HEADER.pack(checkpoint.MAGIC, 1, s["tick"], 0.0, s["drought_in"], s["next_virtual_id"]),
+             LAYOUT.pack(*(s["world"][key] for key in FIELDS))]
+    for name in SETS:
+        parts.append(checkpoint.COUNT.pack(len(s[name])) + struct.pack(f"<{len(s[name])}q", *s[name]))
+    path = tmp_path / "v1.ckpt"
+    path.write_bytes(b"".join(parts))
+    loaded = load_checkpoint(str(path))
+    assert loaded["alive_preys"] == [11, 12] and loaded["huntable"] == [12]
+    assert loaded["reproduced"] == {} and loaded["positions"] == {}
+
+
+# Journal : enregistrements relus dans l'ordre, ajout à un journal existant, fin tronquée ignorée
+def test_journal_round_trip(tmp_path):
+    path = str(tmp_path / "events.bin")
+    journal = JournalWriter(path)
+    journal.write(EV_JOIN, 1, a=11)
+    journal.tick = 3
+    journal.write(EV_MEAL, 2, a=21, b=11)
+    journal.close()
+    journal = JournalWriter(path)
+    journal.write(EV_DROUGHT_START, value=7.0)
+    journal.close()
+    with open(path, "ab") as f:
+        f.write(b"\0" * 5)  # arrêt brutal pendant une écriture
+
+    reader = JournalReader(path)
+    try:
+        records = list(reader)
+        assert len(reader) == 3
+        assert [(r.tick, r.event, r.role, r.a, r.b, r.value) for r in records] == [
+            (0, EV_JOIN, 1, 11, 0, 0.0), (3, EV_MEAL, 2, 21, 11, 0.0), (0, EV_DROUGHT_START, 0, 0, 0, 7.0)]
+        table = reader.to_numpy()
+        assert table["a"].tolist() == [11, 21, 0]
+        del table
+    finally:
+        reader.close()
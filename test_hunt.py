@@ -0,0 +1,67 @@
+from collections import deque
+
+import pytest
+
+import env
+from hunt import match_nearest
+from registry import Registry
+from spatial import SpatialGrid
+
+PREY = env.VIRTUAL_ID_BASE + 1  # individus de herd : une proie mangée est prévenue par pending_kills
+PREY_FAR = env.VIRTUAL_ID_BASE + 2
+PREDATOR = env.VIRTUAL_ID_BASE + 3
+
+
+# Monde 2D neuf : une proie près du prédateur, une autre à l'opposé
+@pytest.fixture
+def world(monkeypatch):
+    registry = Registry()
+    for pid, role in ((PREY, "PREY"), (PREY_FAR, "PREY"), (PREDATOR, "PREDATOR")):
+        registry.add(pid, role)
+    huntable, grid = env.PidSet(), SpatialGrid()
+    for pid, xy in ((PREY, (11.0, 10.0)), (PREY_FAR, (60.0, 60.0))):
+        huntable.add(pid)
+        grid.place(pid, *xy)
+    for name, value in (("registry", registry), ("huntable", huntable), ("grid", grid), ("hunt_requests", {}),
+                        ("meals", {}), ("hunt_stats", {"rounds": 0, "requests": 0, "matches": 0}),
+                        ("hunt_policy", match_nearest), ("pending_kills", deque()), ("journal", None),
+                        ("reproducible_preys", env.PidSet()), ("reproducible_predators", env.PidSet())):
+        monkeypatch.setattr(env, name, value)
+    env.hunt_requests[PREDATOR] = (10.0, 10.0)
+    return env
+
+
+# Proie la plus proche attribuée, retirée du monde et prévenue ; l'autre reste chassable
+def test_hunt_step_meal(world):
+    world.hunt_step()
+    assert world.meals == {PREDATOR: PREY}
+    assert PREY not in world.registry and PREY not in world.huntable and PREY not in world.grid
+    assert list(world.pending_kills) == [PREY]
+    assert PREY_FAR in world.huntable and PREY_FAR in world.grid
+    assert world.hunt_stats == {"rounds": 1, "requests": 1, "matches": 1}
+
+
+# Prédateur parti pendant l'appariement : sa proie redevient chassable, placée à la position de la demande
+def test_hunt_step_departed_predator(world, monkeypatch):
+    def leaving(requests, huntable, grid):
+        pairs = match_nearest(requests, huntable, grid)
+        world.registry.remove(PREDATOR)
+        return pairs
+
+    monkeypatch.setattr(env, "hunt_policy", leaving)
+    world.hunt_step()
+    assert world.meals == {} and not world.pending_kills
+    assert PREY in world.registry and PREY in world.huntable
+    assert world.grid.pos[PREY] == (10.0, 10.0)
+
+
+# Index spatial : voisinage torique, retrait du plus proche
+def test_grid_pop_nearest_wraps():
+    grid = SpatialGrid()
+    grid.place(1, 99.5, 50.0)
+    grid.place(2, 5.0, 50.0)
+    assert grid.pop_nearest(0.5, 50.0) == 1  # 1 unité en passant par le bord
+    assert 1 not in grid and len(grid) == 1
+    grid.place(2, 90.0, 90.0)  # déplacement vers une autre cellule
+    assert grid.pop_near(50.0, 50.0) is None
+    assert grid.pop_near(90.0, 90.0) == 2
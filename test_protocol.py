@@ -0,0 +1,38 @@
+import socket
+
+from protocol import (FrameDecoder, poll_frame, encode_kill, encode_tick, encode_control, MSG_KILL, MSG_TICK,
+                      MSG_CONTROL, CTRL_GROWTH)
+
+
+# Deux trames arrivées dans le même recv : décodées toutes les deux
+def test_feed_two_frames_in_one_chunk():
+    decoder = FrameDecoder()
+    frames = decoder.feed(encode_kill(4194305) + encode_tick(12))
+    assert frames == [(MSG_KILL, (4194305,)), (MSG_TICK, (12,))]
+    assert not decoder.buf
+
+
+# Une trame coupée en deux recv : rien avant la fin, puis la trame entière
+def test_feed_one_frame_across_two_chunks():
+    decoder = FrameDecoder()
+    data = encode_control(CTRL_GROWTH, 2.5)
+    assert decoder.feed(data[:3]) == []
+    assert decoder.feed(data[3:]) == [(MSG_CONTROL, (CTRL_GROWTH, 2.5))]
+    assert not decoder.buf
+
+
+# poll_frame : trame incomplète -> None, trames regroupées rendues une par une
+def test_poll_frame_split_and_merged():
+    a, b = socket.socketpair()
+    try:
+        decoder = FrameDecoder()
+        data = encode_tick(1)
+        a.sendall(data[:2])
+        assert poll_frame(b, decoder, 1.0) is None
+        a.sendall(data[2:] + encode_tick(2))
+        assert poll_frame(b, decoder, 1.0) == (MSG_TICK, (1,))
+        assert poll_frame(b, decoder, 0.0) == (MSG_TICK, (2,))
+        assert poll_frame(b, decoder, 0.0) is None
+    finally:
+        a.close()
+        b.close()
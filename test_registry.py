@@ -0,0 +1,55 @@
+import math
+
+from env import PidSet
+from registry import Registry, NO_CONN
+
+
+# Retrait au milieu : la dernière ligne comble le trou, les autres pids restent joignables
+def test_remove_moves_last_row():
+    registry = Registry(capacity=2)  # agrandi au troisième ajout
+    for pid, role in ((10, "PREY"), (11, "PREDATOR"), (12, "PREY")):
+        assert registry.add(pid, role)
+    assert not registry.add(10, "PREY")
+    assert registry.remove(10) == "PREY"
+    assert registry.remove(10) is None
+    assert len(registry) == 2 and 10 not in registry
+    assert registry.role(12) == "PREY" and registry.role(11) == "PREDATOR"
+    assert registry.count("PREY") == 1 and registry.count("PREDATOR") == 1
+    assert sorted(registry.pids()) == [11, 12]
+    assert registry.entries() == {11: "PREDATOR", 12: "PREY"}
+
+
+# Connexion annoncée avant l'inscription : retenue puis appliquée
+def test_bind_before_add():
+    registry = Registry()
+    registry.bind(5, 42)
+    registry.add(5, "PREY")
+    registry.add(6, "PREY")
+    assert dict(registry.members("PREY")) == {5: 42, 6: NO_CONN}
+
+
+# Dernier rapport : énergie, drapeaux et position ; positions inconnues exclues
+def test_update_and_positions():
+    registry = Registry()
+    registry.add(1, "PREY")
+    registry.add(2, "PREY")
+    registry.update(1, 3.5, 4, 1, 10.0, 20.0)
+    assert registry.positions() == {1: (10.0, 20.0)}
+    registry.place(2, 1.0, 2.0)
+    assert registry.positions() == {1: (10.0, 20.0), 2: (1.0, 2.0)}
+    summary = registry.summary()["PREY"]
+    assert summary["count"] == 2
+    assert math.isclose(summary["energy_mean"], 3.5)
+
+
+# PidSet : appartenance, retrait au milieu, tirage qui vide l'ensemble
+def test_pidset():
+    pids = PidSet()
+    for pid in (1, 2, 3):
+        pids.add(pid)
+    pids.add(2)
+    pids.discard(1)
+    pids.discard(99)
+    assert len(pids) == 2 and 1 not in pids and 3 in pids
+    assert sorted(pids.pop_random() for _ in range(2)) == [2, 3]
+    assert len(pids) == 0
@@ -0,0 +1,62 @@
+import pytest
+
+import env
+from engine import HeadlessEngine
+
+
+# Listes de reproduction, fenêtres et compteurs neufs pour chaque test
+@pytest.fixture
+def repro(monkeypatch):
+    monkeypatch.setattr(env, "reproducible_preys", env.PidSet())
+    monkeypatch.setattr(env, "reproducible_predators", env.PidSet())
+    monkeypatch.setattr(env, "reproduced", {})
+    monkeypatch.setattr(env, "repro_stats", {"pairs": 0, "capped_couple_ticks": 0})
+    monkeypatch.setattr(env, "tick", 100)
+    monkeypatch.setattr(env, "birth_cap", 8)
+    return env
+
+
+def fill(pids: env.PidSet, first: int, n: int):
+    for pid in range(first, first + n):
+        pids.add(pid)
+
+
+# floor(n/2) couples : l'individu sans partenaire reste candidat, les parents entrent dans leur fenêtre
+def test_pairs_floor_half(repro):
+    fill(repro.reproducible_preys, 1, 5)
+    out = repro.reproduction_step()
+    assert out == {"PREY": (5, 2), "PREDATOR": (0, 0)}
+    assert len(repro.reproducible_preys) == 1
+    assert len(repro.reproduced) == 4
+    assert set(repro.reproduced.values()) == {100 + env.PREY_REPRO_COOLDOWN}
+
+
+# Plafond réparti à tour de rôle ; les couples reportés restent candidats et sont comptés en couple-ticks
+def test_cap_round_robin(repro, monkeypatch):
+    monkeypatch.setattr(env, "birth_cap", 3)
+    fill(repro.reproducible_preys, 1, 10)
+    fill(repro.reproducible_predators, 100, 4)
+    out = repro.reproduction_step()
+    assert out == {"PREY": (10, 2), "PREDATOR": (4, 1)}
+    assert repro.repro_stats == {"pairs": 3, "capped_couple_ticks": 4}
+    assert len(repro.reproducible_preys) == 6 and len(repro.reproducible_predators) == 2
+    out = repro.reproduction_step()  # tick suivant : reports servis en premier selon le même partage
+    assert out == {"PREY": (6, 2), "PREDATOR": (2, 1)}
+
+
+# Fenêtres échues oubliées au début de l'appariement
+def test_expired_windows_dropped(repro):
+    repro.reproduced.update({1: 100, 2: 101})
+    repro.reproduction_step()
+    assert repro.reproduced == {2: 101}
+
+
+# Moteur headless : jamais plus de birth_cap naissances par tick
+def test_headless_birth_cap():
+    engine = HeadlessEngine(2000, 200, seed=1, params={"birth_cap": 3, "prey_r": 0.0, "pred_r": 0.0})
+    births = []
+    for _ in range(40):
+        before = engine.next_id
+        engine.step()
+        births.append(engine.next_id - before)
+    assert max(births) == 3